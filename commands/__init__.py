@@ -1,18 +1,27 @@
-from .creator import FileCreator
-from .scanner import VirusScanner
-from .searcher import FileSearcher
-from .info import FileInfo
-from .helper import HelpDisplay
-from .ai_assistant import AIAssistant
-from .package_manager import PackageManager
-from .file_manager import FileManager
-from .converter import Converter
-from .p2pmsg import P2PMessenger
+import importlib
+
+# Handler classes are imported on first access so that importing one command
+# (e.g. the scanner) does not drag in the crypto stack behind P2PMessenger.
+_LAZY_EXPORTS = {
+    'FileCreator': '.creator',
+    'VirusScanner': '.scanner',
+    'FileSearcher': '.searcher',
+    'CodeIndexer': '.indexer',
+    'FileInfo': '.info',
+    'HelpDisplay': '.helper',
+    'AIAssistant': '.ai_assistant',
+    'PackageManager': '.package_manager',
+    'FileManager': '.file_manager',
+    'Converter': '.converter',
+    'P2PMessenger': '.p2pmsg',
+    'HttpBenchmark': '.bench',
+}
 
 __all__ = [
     'FileCreator',
     'VirusScanner',
     'FileSearcher',
+    'CodeIndexer',
     'FileInfo',
     'HelpDisplay',
     'AIAssistant',
@@ -20,4 +29,18 @@ __all__ = [
     'FileManager',
     'Converter',
     'P2PMessenger',
-]
\ No newline at end of file
+    'HttpBenchmark',
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
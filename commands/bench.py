@@ -0,0 +1,177 @@
+import ssl
+import time
+import asyncio
+import urllib.parse
+
+from utils.run_stats import percentile
+
+HISTOGRAM_BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Delay before a client retries after an error, doubling up to the maximum while errors persist
+BACKOFF_MIN = 0.01
+BACKOFF_MAX = 0.5
+
+
+class _Target:
+    def __init__(self, url: str, keep_alive: bool):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"expected an http:// or https:// URL, got '{url}'")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        host_header = parts.netloc.rsplit('@', 1)[-1]
+        connection = '' if keep_alive else 'Connection: close\r\n'
+        self.request = (f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: RunIT-bench\r\n"
+                        f"Accept: */*\r\n{connection}\r\n").encode('latin-1')
+
+
+class HttpBenchmark:
+    """asyncio HTTP/1.1 load generator behind the `bench` command."""
+
+    async def _read_response(self, reader):
+        """Read one response; return (status, body bytes, server keeps the connection)."""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        version, status = lines[0].split(' ', 2)[:2]
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        keep = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        size = 0
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                chunk = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                await reader.readexactly(chunk + 2)
+                size += chunk
+                if chunk == 0:
+                    # Skip trailers up to the blank line
+                    while (await reader.readuntil(b'\r\n')) != b'\r\n':
+                        pass
+                    break
+        elif 'content-length' in headers:
+            size = int(headers['content-length'])
+            remaining = size
+            while remaining:
+                # A body cut short raises IncompleteReadError, which counts as an error
+                remaining -= len(await reader.readexactly(min(remaining, 1 << 16)))
+        elif int(status) not in (204, 304) and not 100 <= int(status) < 200:
+            while data := await reader.read(1 << 16):
+                size += len(data)
+            keep = False
+        return int(status), size, keep
+
+    async def _client(self, target: _Target, state: dict, timeout: float):
+        reader = writer = None
+        backoff = 0.0
+        while True:
+            if state['remaining'] is not None:
+                if state['remaining'] <= 0:
+                    break
+                state['remaining'] -= 1
+            elif time.perf_counter() >= state['deadline']:
+                break
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(target.host, target.port, ssl=target.ssl, limit=1 << 20), timeout)
+                    state['connections'] += 1
+                writer.write(target.request)
+                status, size, keep = await asyncio.wait_for(self._read_response(reader), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    ValueError) as e:
+                kind = 'timeout' if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+                state['errors'][kind] = state['errors'].get(kind, 0) + 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                # Back off so a server that is down does not turn every client into a busy loop
+                backoff = min(max(backoff * 2, BACKOFF_MIN), BACKOFF_MAX)
+                if state['remaining'] is None:
+                    await asyncio.sleep(min(backoff, max(state['deadline'] - time.perf_counter(), 0)))
+                else:
+                    await asyncio.sleep(backoff)
+                continue
+            backoff = 0.0
+            state['latencies'].append(time.perf_counter() - started)
+            state['statuses'][status] = state['statuses'].get(status, 0) + 1
+            state['bytes'] += size
+            if not keep:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def _drive(self, target: _Target, concurrency: int, duration: float | None, requests: int | None,
+                     timeout: float) -> dict:
+        state = {'remaining': requests, 'deadline': time.perf_counter() + (duration or 0), 'latencies': [],
+                 'statuses': {}, 'errors': {}, 'bytes': 0, 'connections': 0}
+        started = time.perf_counter()
+        await asyncio.gather(*(self._client(target, state, timeout) for _ in range(concurrency)))
+        state['elapsed'] = time.perf_counter() - started
+        return state
+
+    def run(self, url: str, concurrency: int = 10, duration: float | None = None, requests: int | None = None,
+            keep_alive: bool = True, timeout: float = 10.0) -> bool:
+        try:
+            target = _Target(url, keep_alive)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        if duration is None and requests is None:
+            duration = 10.0
+        limit = f"{requests} requests" if requests is not None else f"{duration:g}s"
+        print(f"🏋️  Benchmarking {url}: {concurrency} connections, {limit}, "
+              f"keep-alive {'on' if keep_alive else 'off'}")
+        try:
+            state = asyncio.run(self._drive(target, concurrency, duration, requests, timeout))
+        except KeyboardInterrupt:
+            print("\n⛔ Benchmark interrupted")
+            return False
+        return self.report(state)
+
+    def report(self, state: dict) -> bool:
+        latencies = sorted(state['latencies'])
+        done = len(latencies)
+        errors = sum(state['errors'].values())
+        elapsed = state['elapsed'] or 1e-9
+        print("=" * 60)
+        print(f"   Requests: {done} in {elapsed:.2f}s  ({done / elapsed:,.1f} req/s)")
+        print(f"   Transfer: {state['bytes'] / (1024 * 1024):.2f} MB  ({state['bytes'] / (1024 * 1024) / elapsed:.2f} MB/s)"
+              f"  over {state['connections']} connections")
+        if state['statuses']:
+            print("   Status:   " + '  '.join(f"{code}: {count}" for code, count in sorted(state['statuses'].items())))
+        if errors:
+            print(f"   Errors:   {errors}  (" + ', '.join(f"{k}: {v}" for k, v in sorted(state['errors'].items())) + ")")
+        if not latencies:
+            print("❌ No successful requests")
+            return False
+        ms = [value * 1000 for value in latencies]
+        print(f"   Latency:  p50 {percentile(ms, 50):.2f}ms  p90 {percentile(ms, 90):.2f}ms  "
+              f"p99 {percentile(ms, 99):.2f}ms  max {ms[-1]:.2f}ms  mean {sum(ms) / done:.2f}ms")
+        self._histogram(ms)
+        failed = errors + sum(count for code, count in state['statuses'].items() if code >= 500)
+        return failed == 0
+
+    def _histogram(self, ms: list):
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for value in ms:
+            for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        peak = max(counts)
+        labels = [f"≤ {b:g}ms" for b in HISTOGRAM_BOUNDS_MS] + [f"> {HISTOGRAM_BOUNDS_MS[-1]:g}ms"]
+        first = next(i for i, c in enumerate(counts) if c)
+        last = len(counts) - next(i for i, c in enumerate(reversed(counts)) if c)
+        print("   Histogram:")
+        for label, count in zip(labels[first:last], counts[first:last]):
+            bar = '█' * max(1 if count else 0, round(40 * count / peak))
+            print(f"     {label:>10} {count:>9}  {bar}")
@@ -0,0 +1,134 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from commands.searcher import BINARY_SNIFF_BYTES, _batches
+from utils.tree_walk import iter_files
+from utils.trigram_index import (INDEXED, UNINDEXED, BINARY, TrigramIndex, encode_postings, index_path, trigrams,
+                                 write_index)
+
+# Larger files are not broken into trigrams; searches always scan them
+MAX_INDEXED_BYTES = 16 * 1024 * 1024
+
+
+def _index_batch(paths: list) -> list:
+    """Return (kind, trigram list) for each file of a batch."""
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(MAX_INDEXED_BYTES + 1)
+        except OSError:
+            results.append((UNINDEXED, []))
+            continue
+        if b'\0' in data[:BINARY_SNIFF_BYTES]:
+            results.append((BINARY, []))
+        elif len(data) > MAX_INDEXED_BYTES:
+            results.append((UNINDEXED, []))
+        else:
+            results.append((INDEXED, sorted(trigrams(data))))
+    return results
+
+
+def _merge(old, added: dict):
+    """Old posting lists with the ids of re-indexed files appended, in trigram order."""
+    pending = sorted(added.items())
+    position = 0
+    for gram, data, last in old.entries() if old is not None else ():
+        while position < len(pending) and pending[position][0] < gram:
+            new_gram, ids = pending[position]
+            yield new_gram, encode_postings(ids), ids[-1]
+            position += 1
+        if position < len(pending) and pending[position][0] == gram:
+            ids = pending[position][1]
+            yield gram, data + encode_postings(ids, last), ids[-1]
+            position += 1
+        else:
+            yield gram, data, last
+    for gram, ids in pending[position:]:
+        yield gram, encode_postings(ids), ids[-1]
+
+
+class CodeIndexer:
+    """Builds and refreshes the on-disk trigram index that ``search --indexed`` narrows candidates with."""
+
+    def build(self, root: str, jobs: int | None = None):
+        return self.update(root, jobs, rebuild=True)
+
+    def update(self, root: str, jobs: int | None = None, rebuild: bool = False):
+        if not os.path.isdir(root):
+            print(f"❌ Directory not found: {root}")
+            return False
+        root = os.path.realpath(root)
+        path = index_path(root)
+        old = None
+        if not rebuild and path.exists():
+            try:
+                old = TrigramIndex(path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Rebuilding unreadable index: {e}")
+        elif not rebuild:
+            print(f"ℹ️  No index for {root} yet, building one")
+        try:
+            return self._update(root, path, old, jobs)
+        finally:
+            if old is not None:
+                old.close()
+
+    def _update(self, root: str, path, old, jobs: int | None):
+        started = time.perf_counter()
+        previous = {entry[0]: entry for entry in old.files} if old is not None else {}
+        next_id = old.next_id if old is not None else 0
+        files, stale = [], []
+        for full, _ in iter_files(root):
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            rel = os.path.relpath(full, root)
+            prior = previous.get(rel)
+            if prior is not None and prior[1] == st.st_size and prior[2] == st.st_mtime_ns:
+                files.append(prior)
+                continue
+            entry = [rel, st.st_size, st.st_mtime_ns, next_id, UNINDEXED]
+            next_id += 1
+            files.append(entry)
+            stale.append(entry)
+        removed = len(previous.keys() - {entry[0] for entry in files})
+        if old is not None:
+            if not stale and not removed:
+                print(f"✅ Index of {root} is up to date ({len(files)} files)")
+                return True
+            if next_id - len(files) > len(files):
+                # Mostly dead ids in the posting lists: start over with a compact index
+                print("ℹ️  Compacting the index")
+                old.close()
+                return self.update(root, jobs, rebuild=True)
+        added = {}
+        batches = list(_batches((os.path.join(root, entry[0]), entry[1]) for entry in stale))
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(batches) < 2:
+            self._collect(stale, map(_index_batch, batches), added)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                self._collect(stale, pool.map(_index_batch, batches), added)
+        try:
+            write_index(path, root, next_id, files, _merge(old, added))
+        except OSError as e:
+            print(f"❌ Cannot write index {path}: {e}")
+            return False
+        unindexed = sum(1 for entry in files if entry[4] == UNINDEXED)
+        print(f"✅ Indexed {len(files)} files in {root} ({len(stale)} read, {removed} removed, "
+              f"{unindexed} too large to index, {time.perf_counter() - started:.2f}s)")
+        print(f"🗂️  {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+        return True
+
+    @staticmethod
+    def _collect(stale: list, results, added: dict):
+        entries = iter(stale)
+        for batch in results:
+            for kind, grams in batch:
+                entry = next(entries)
+                entry[4] = kind
+                for gram in grams:
+                    added.setdefault(gram, []).append(entry[3])
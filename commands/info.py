@@ -10,7 +10,7 @@ class FileInfo:
         p = Path(filename).resolve()
         if not p.exists() or not p.is_file():
             print(f"❌ File not found: {filename}")
-            return
+            return False
         stat = p.stat()
         print(f"\n📊 File Information: {p.name}")
         print("=" * 60)
@@ -1,15 +1,100 @@
-from pathlib import Path
+import os
+
+from utils.pattern_set import compile_automaton
+
+CHUNK_BYTES = 1024 * 1024
+MAX_REPORTED_HITS = 100
+DEFAULT_RULES = {
+    'eval-call': 'eval(',
+    'exec-call': 'exec(',
+    'dynamic-import': '__import__',
+    'shell-command': 'os.system',
+    'subprocess-spawn': 'subprocess.Popen',
+}
+
+
+def iter_hits(stream, signatures: tuple, chunk_bytes: int = CHUNK_BYTES):
+    """Yield (offset, line number, signature index) for every occurrence of every signature in ``stream``.
+
+    The stream is read in chunks and the last ``longest - 1`` bytes of each
+    window are carried into the next one, so a signature split across a
+    chunk boundary is still found, and found once. Memory stays at about
+    one chunk however large the input is.
+    """
+    automaton = compile_automaton(signatures)
+    starts = automaton.regex.search
+    overlap = automaton.longest - 1
+    window = b''
+    base = 0
+    line = 1
+    while True:
+        chunk = stream.read(chunk_bytes)
+        window += chunk
+        # Starts at or past ``limit`` might run beyond the window; the next one sees them whole
+        limit = len(window) if not chunk else max(len(window) - overlap, 0)
+        anchor = 0
+        position = 0
+        while True:
+            match = starts(window, position)
+            if match is None or match.start() >= limit:
+                break
+            hit = match.start()
+            line += window.count(b'\n', anchor, hit)
+            anchor = hit
+            for index in automaton.starting_at(window, hit):
+                yield base + hit, line, index
+            position = hit + 1
+        if not chunk:
+            return
+        line += window.count(b'\n', anchor, limit)
+        base += limit
+        window = window[limit:]
 
 
 class VirusScanner:
-    def scan_file(self, filename: str):
-        p = Path(filename)
-        if not p.exists():
+    @staticmethod
+    def load_rules(path: str) -> dict:
+        """Read ``name = signature`` lines; blank lines and ``#`` comments are skipped."""
+        rules = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                name, sep, signature = line.partition('=')
+                name, signature = name.strip(), signature.strip()
+                if not sep or not name or not signature:
+                    raise ValueError(f"{path}:{number}: expected 'name = signature'")
+                rules[name] = signature
+        if not rules:
+            raise ValueError(f"{path} defines no rules")
+        return rules
+
+    def scan_file(self, filename: str, rules: dict | None = None):
+        if not os.path.isfile(filename):
             print(f"❌ File not found: {filename}")
-            return
-        content = p.read_text(encoding='utf-8', errors='ignore')
-        suspicious = any(x in content for x in ['eval(', 'exec(', '__import__', 'os.system', 'subprocess.Popen'])
-        if suspicious:
-            print("🔴 Potentially suspicious patterns detected")
-        else:
-            print("✅ No suspicious patterns found")
\ No newline at end of file
+            return False
+        rules = rules or DEFAULT_RULES
+        names = list(rules)
+        signatures = tuple(rules[name].encode('utf-8') for name in names)
+        counts = dict.fromkeys(names, 0)
+        hits = 0
+        try:
+            with open(filename, 'rb') as f:
+                for offset, line, index in iter_hits(f, signatures):
+                    if hits == 0:
+                        print("🔴 Potentially suspicious patterns detected")
+                    hits += 1
+                    counts[names[index]] += 1
+                    if hits <= MAX_REPORTED_HITS:
+                        print(f"   offset {offset:>10}  line {line:>7}  {names[index]}")
+        except OSError as e:
+            print(f"❌ Cannot read {filename}: {e}")
+            return False
+        if not hits:
+            print(f"✅ No suspicious patterns found ({len(names)} rules)")
+            return True
+        if hits > MAX_REPORTED_HITS:
+            print(f"   ... {hits - MAX_REPORTED_HITS} more")
+        print(f"\n📊 {hits} hits: " + ", ".join(f"{name} {count}" for name, count in counts.items() if count))
+        return False
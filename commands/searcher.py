@@ -1,16 +1,362 @@
-from pathlib import Path
+import os
+import re
+import mmap
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.tree_walk import iter_files
+from utils.pattern_set import compile_patterns
+from utils.trigram_index import INDEXED, BINARY, TrigramIndex, index_path, regex_literals
+
+BINARY_SNIFF_BYTES = 8192
+BATCH_FILES = 64
+BATCH_BYTES = 8 * 1024 * 1024
+MMAP_MIN_BYTES = 1024 * 1024
+COUNT_WINDOW = 16 * 1024 * 1024
+# DENSE_HITS matching lines within DENSE_SPAN bytes switch counting to a regex over the next window
+DENSE_HITS = 64
+DENSE_SPAN = 64 * 1024
+DENSE_WINDOW = 4 * 1024 * 1024
+
+
+@contextmanager
+def open_buffer(path: str):
+    """Yield the file's contents: bytes for small files, a read-only mmap for large ones."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 or size < MMAP_MIN_BYTES:
+            yield f.read()
+            return
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if hasattr(buf, 'madvise'):
+                buf.madvise(mmap.MADV_SEQUENTIAL)
+            yield buf
+        finally:
+            buf.close()
+
+
+def _count_newlines(buf, start: int, end: int) -> int:
+    if isinstance(buf, bytes):
+        return buf.count(b'\n', start, end)
+    # mmap has no count(); bounded slices keep memory flat on huge gaps
+    total = 0
+    while start < end:
+        stop = min(end, start + COUNT_WINDOW)
+        total += buf[start:stop].count(b'\n')
+        start = stop
+    return total
+
+
+def count_matching_lines(buf, needle: bytes) -> int:
+    """Number of lines containing ``needle``, without tracking line numbers.
+
+    Sparse hits are skipped to with find(); once hits get dense the next
+    window is handed to a regex that consumes one matching line per match.
+    """
+    line_rest = re.compile(re.escape(needle) + rb'[^\n]*')
+    size = len(buf)
+    count = 0
+    pos = 0
+    mark_pos, mark_count = 0, 0
+    while pos < size:
+        hit = buf.find(needle, pos)
+        if hit == -1:
+            break
+        count += 1
+        line_end = buf.find(b'\n', hit)
+        if line_end == -1:
+            break
+        pos = line_end + 1
+        if count - mark_count >= DENSE_HITS:
+            if pos - mark_pos < DENSE_SPAN:
+                end = buf.find(b'\n', min(size, pos + DENSE_WINDOW) - 1)
+                end = size if end == -1 else end + 1
+                count += len(line_rest.findall(buf[pos:end]))
+                pos = end
+            mark_pos, mark_count = pos, count
+    return count
+
+
+def scan_buffer(buf, patterns, max_count: int | None = None, count_only: bool = False, before: int = 0,
+                after: int = 0):
+    """Find the lines of ``buf`` that match a PatternSet in one forward pass.
+
+    Returns (match count, records). Records are (line number, pattern
+    indices, line bytes) in file order, with None as the indices of context
+    lines and None between non-adjacent groups when context is requested.
+    Line numbers are counted incrementally between hits; with
+    ``count_only`` they are not counted at all.
+    """
+    needle = patterns.needle
+    if count_only and max_count is None and needle is not None and b'\n' not in needle:
+        return count_matching_lines(buf, needle), []
+    size = len(buf)
+    count = 0
+    records = []
+    anchor_pos, anchor_line = 0, 1
+    printed = 0
+    pos = 0
+    # Stop once no line starts at pos: patterns that can match empty text
+    # (`$`, `a*`) would otherwise keep matching at the end of the buffer
+    while pos < size and (max_count is None or count < max_count):
+        hit = patterns.find(buf, pos)
+        if hit == -1:
+            break
+        count += 1
+        line_end = buf.find(b'\n', hit)
+        if line_end == -1:
+            line_end = size
+        pos = line_end + 1
+        if count_only:
+            continue
+        newline = buf.rfind(b'\n', anchor_pos, hit)
+        line_start = anchor_pos if newline == -1 else newline + 1
+        line_no = anchor_line + _count_newlines(buf, anchor_pos, line_start)
+        anchor_pos, anchor_line = line_start, line_no
+        context = []
+        start = line_start
+        while len(context) < before and line_no - len(context) - 1 > printed and start > 0:
+            previous = buf.rfind(b'\n', 0, start - 1) + 1
+            context.append((line_no - len(context) - 1, None, buf[previous:start - 1]))
+            start = previous
+        first = context[-1][0] if context else line_no
+        if (before or after) and records and first > printed + 1:
+            records.append(None)
+        records.extend(reversed(context))
+        line = buf[line_start:line_end]
+        records.append((line_no, patterns.tags(line), line))
+        printed = line_no
+        end = line_end
+        for _ in range(after):
+            if end + 1 >= size:
+                break
+            next_end = buf.find(b'\n', end + 1)
+            if next_end == -1:
+                next_end = size
+            line = buf[end + 1:next_end]
+            if patterns.in_line(line):
+                break
+            printed += 1
+            records.append((printed, None, line))
+            end = next_end
+            anchor_pos, anchor_line = end + 1, printed + 1
+            pos = end + 1
+    return count, records
+
+
+def _search_batch(spec: tuple, paths: list, options: tuple) -> list:
+    """Search a batch of files; return (path, count, records), with count None when binary/unreadable."""
+    patterns = compile_patterns(*spec)
+    results = []
+    for path in paths:
+        try:
+            with open_buffer(path) as buf:
+                if b'\0' in buf[:BINARY_SNIFF_BYTES]:
+                    results.append((path, None, None))
+                    continue
+                results.append((path, *scan_buffer(buf, patterns, *options)))
+        except (OSError, ValueError):
+            results.append((path, None, None))
+    return results
+
+
+def pattern_label(pattern: str, width: int = 40) -> str:
+    return pattern if len(pattern) <= width else pattern[:width - 1] + '…'
+
+
+def print_records(records: list, labels: list | None = None):
+    """Print match (``N:``) and context (``N-``) lines; with ``labels``, prefix matches with their patterns."""
+    for record in records:
+        if record is None:
+            print("   --")
+            continue
+        line_no, tags, line = record
+        text = line.rstrip(b'\r').decode('utf-8', 'replace')
+        if tags is not None and labels:
+            text = f"[{', '.join(labels[i] for i in tags)}] {text}"
+        print(f"{line_no:5}{':' if tags is not None else '-'} {text}")
+
+
+def _tally(tally: list, records: list):
+    for record in records:
+        if record is not None and record[1] is not None:
+            for index in record[1]:
+                tally[index] += 1
+
+
+def _print_tally(tally: list, labels: list):
+    print("🏷️  Lines per pattern:")
+    for label, lines in zip(labels, tally):
+        print(f"{lines:>8}  {label}")
+
+
+def _batches(files):
+    batch, size = [], 0
+    for path, file_size in files:
+        batch.append(path)
+        size += file_size
+        if len(batch) >= BATCH_FILES or size >= BATCH_BYTES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _pattern_spec(patterns, regex: bool) -> tuple:
+    """(patterns tuple, regex) as handed to compile_patterns; raises ValueError for an unusable set."""
+    spec = ((patterns,) if isinstance(patterns, str) else tuple(patterns), regex)
+    compile_patterns(*spec)
+    return spec
 
 
 class FileSearcher:
-    def search_in_file(self, keyword: str, filename: str):
-        p = Path(filename)
-        if not p.exists():
+    """``patterns`` is a keyword or a list of literals (regexes with ``regex``), all matched in one pass."""
+
+    def search_in_file(self, patterns, filename: str, max_count: int | None = None, count_only: bool = False,
+                       before: int = 0, after: int = 0, regex: bool = False):
+        if not os.path.isfile(filename):
             print(f"❌ File not found: {filename}")
+            return False
+        try:
+            spec = _pattern_spec(patterns, regex)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        try:
+            with open_buffer(filename) as buf:
+                count, records = scan_buffer(buf, compile_patterns(*spec), max_count, count_only, before, after)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read {filename}: {e}")
+            return False
+        labels = [pattern_label(p) for p in spec[0]] if len(spec[0]) > 1 else None
+        print_records(records, labels)
+        limited = " (stopped at --max-count)" if max_count is not None and count >= max_count else ""
+        print(f"\n🔎 Matches: {count}{limited}")
+        if labels and not count_only:
+            tally = [0] * len(labels)
+            _tally(tally, records)
+            _print_tally(tally, labels)
+        return count > 0
+
+    def iter_tree_matches(self, patterns, root: str, jobs: int | None = None, max_count: int | None = None,
+                          count_only: bool = False, before: int = 0, after: int = 0, regex: bool = False,
+                          files=None):
+        """Yield (path, count, records) for every file under ``root`` (or in ``files``), in walk order.
+
+        Files are searched in batches on a process pool; results come back in
+        the order the walk produced them while later batches are still running.
+        Binary or unreadable files have a count of None.
+        """
+        spec = _pattern_spec(patterns, regex)
+        options = (max_count, count_only, before, after)
+        batches = _batches(iter_files(root) if files is None else files)
+        jobs = jobs or os.cpu_count() or 1
+        first = next(batches, None)
+        second = next(batches, None) if first is not None else None
+        if first is None:
             return
-        count = 0
-        with p.open('r', encoding='utf-8', errors='ignore') as f:
-            for i, line in enumerate(f, 1):
-                if keyword in line:
-                    count += 1
-                    print(f"{i:5}: {line.rstrip()}")
-        print(f"\n🔎 Matches: {count}")
\ No newline at end of file
+        if jobs == 1 or second is None:
+            # Small trees finish before a pool would have started
+            for batch in (first, second, *batches):
+                if batch is not None:
+                    yield from _search_batch(spec, batch, options)
+            return
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending = deque([pool.submit(_search_batch, spec, first, options),
+                             pool.submit(_search_batch, spec, second, options)])
+            for batch in batches:
+                if len(pending) >= jobs * 4:
+                    yield from pending.popleft().result()
+                pending.append(pool.submit(_search_batch, spec, batch, options))
+            while pending:
+                yield from pending.popleft().result()
+
+    def search_tree(self, patterns, root: str, jobs: int | None = None, max_count: int | None = None,
+                    count_only: bool = False, before: int = 0, after: int = 0, regex: bool = False, files=None):
+        if not os.path.isdir(root):
+            print(f"❌ Directory not found: {root}")
+            return False
+        try:
+            spec = _pattern_spec(patterns, regex)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        labels = [pattern_label(p) for p in spec[0]] if len(spec[0]) > 1 else None
+        tally = [0] * len(spec[0])
+        started = time.perf_counter()
+        searched = matched_files = total = skipped = 0
+        for path, count, records in self.iter_tree_matches(spec[0], root, jobs, max_count, count_only, before,
+                                                           after, regex, files):
+            searched += 1
+            if count is None:
+                skipped += 1
+                continue
+            if not count:
+                continue
+            matched_files += 1
+            total += count
+            if count_only:
+                print(f"{count:>8}  {os.path.relpath(path, root)}")
+                continue
+            print(f"\n📄 {os.path.relpath(path, root)} ({count} match{'es' if count != 1 else ''})")
+            print_records(records, labels)
+            _tally(tally, records)
+        print(f"\n🔎 Matches: {total} in {matched_files} files "
+              f"({searched - skipped} files searched, {skipped} binary or unreadable skipped, "
+              f"{time.perf_counter() - started:.2f}s)")
+        if labels and not count_only:
+            _print_tally(tally, labels)
+        return total > 0
+
+    def search_indexed(self, patterns, root: str, jobs: int | None = None, max_count: int | None = None,
+                       count_only: bool = False, before: int = 0, after: int = 0, regex: bool = False):
+        """Search a tree through its trigram index (see ``index build``).
+
+        The index only rules files out; every candidate is scanned as in
+        ``search_tree``. The tree is still walked, so files that changed or
+        appeared since the index was written are always scanned.
+        """
+        if not os.path.isdir(root):
+            print(f"❌ Directory not found: {root}")
+            return False
+        try:
+            spec = _pattern_spec(patterns, regex)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        path = index_path(root)
+        if not path.exists():
+            print(f"❌ No index for {root} (create one with: index build {root})")
+            return False
+        try:
+            index = TrigramIndex(path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read index: {e}")
+            return False
+        try:
+            encoded = [p.encode('utf-8') for p in spec[0]]
+            ids = index.candidates([regex_literals(p) if regex else [p] for p in encoded])
+            indexed = {entry[0]: entry for entry in index.files}
+        finally:
+            index.close()
+        files = []
+        changed = total = 0
+        for full, _ in iter_files(root):
+            total += 1
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            entry = indexed.get(os.path.relpath(full, root))
+            if entry is None or st.st_size != entry[1] or st.st_mtime_ns != entry[2]:
+                changed += 1
+            elif entry[4] == BINARY or (entry[4] == INDEXED and ids is not None and entry[3] not in ids):
+                continue
+            files.append((full, st.st_size))
+        print(f"🗂️  Index narrowed the search to {len(files)} of {total} files")
+        if changed:
+            print(f"⚠️  {changed} files are new or changed since the index was built (run: index update {root})")
+        return self.search_tree(spec[0], root, jobs, max_count, count_only, before, after, regex, files)
@@ -0,0 +1,181 @@
+import os
+import time
+import shlex
+import hashlib
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.build_cache import default_cache_root, parse_depfile
+
+C_SOURCES = {'.c'}
+CXX_SOURCES = {'.cpp', '.cc', '.cxx', '.c++'}
+SKIP_DIRS = {'.git', '.hg', '.svn', 'node_modules', '__pycache__', 'build', '.runit-build'}
+
+
+class ProjectBuilder:
+    """Incremental, parallel build of a multi-file C/C++ program.
+
+    Objects live in a per-project directory under the RunIT cache. A unit is
+    recompiled only when its object is missing, older than the source or any
+    header listed in its ``-MMD`` depfile, or was built with another command.
+    """
+
+    def __init__(self, project_dir: Path, jobs: int | None = None, cache_root: Path | None = None):
+        self.project_dir = Path(project_dir).resolve()
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        digest = hashlib.sha256(str(self.project_dir).encode('utf-8')).hexdigest()[:16]
+        root = Path(cache_root) if cache_root else default_cache_root().parent / 'projects'
+        self.build_dir = root / f"{self.project_dir.name}-{digest}"
+        self.obj_dir = self.build_dir / 'obj'
+        self.output = self.build_dir / 'bin' / (self.project_dir.name or 'a.out')
+
+    def discover_units(self) -> list:
+        units = []
+        stack = [self.project_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS and not entry.name.startswith('.'):
+                                stack.append(Path(entry.path))
+                        elif Path(entry.name).suffix.lower() in C_SOURCES | CXX_SOURCES:
+                            units.append(Path(entry.path))
+            except OSError:
+                continue
+        return sorted(units)
+
+    def _is_cxx(self, source: Path) -> bool:
+        return source.suffix.lower() in CXX_SOURCES
+
+    def _compile_command(self, source: Path, obj: Path, depfile: Path) -> list:
+        if self._is_cxx(source):
+            compiler, flags = 'g++', os.environ.get('CXXFLAGS', '')
+        else:
+            compiler, flags = 'gcc', os.environ.get('CFLAGS', '')
+        return [compiler, '-c', str(source), '-o', str(obj), '-MMD', '-MF', str(depfile),
+                f'-I{self.project_dir}'] + shlex.split(flags)
+
+    def _object_paths(self, source: Path):
+        rel = source.relative_to(self.project_dir)
+        obj = self.obj_dir / rel.parent / (rel.name + '.o')
+        return obj, obj.with_suffix('.d'), obj.with_suffix('.cmd')
+
+    def _is_stale(self, source: Path, obj: Path, depfile: Path, stamp: Path, command: list) -> bool:
+        try:
+            obj_mtime = obj.stat().st_mtime_ns
+            if stamp.read_text(encoding='utf-8') != shlex.join(command):
+                return True
+        except OSError:
+            return True
+        inputs = [source] + [self.project_dir / d for d in parse_depfile(depfile)]
+        for path in inputs:
+            try:
+                if os.stat(path).st_mtime_ns > obj_mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _compile_unit(self, source: Path):
+        obj, depfile, stamp = self._object_paths(source)
+        command = self._compile_command(source, obj, depfile)
+        if not self._is_stale(source, obj, depfile, stamp, command):
+            return {'source': source, 'object': obj, 'compiled': False, 'ok': True, 'seconds': 0.0, 'stderr': ''}
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, cwd=self.project_dir)
+            ok, stderr = result.returncode == 0, result.stderr
+        except OSError as e:
+            ok, stderr = False, str(e)
+        if ok:
+            stamp.write_text(shlex.join(command), encoding='utf-8')
+        else:
+            stamp.unlink(missing_ok=True)
+        return {'source': source, 'object': obj, 'compiled': True, 'ok': ok,
+                'seconds': time.perf_counter() - started, 'stderr': stderr}
+
+    def _link(self, objects: list, cxx: bool, relink: bool):
+        linker = 'g++' if cxx else 'gcc'
+        command = [linker] + [str(o) for o in objects] + ['-o', str(self.output)]
+        command += shlex.split(os.environ.get('LDFLAGS', '')) + shlex.split(os.environ.get('LDLIBS', ''))
+        stamp = self.output.with_name(self.output.name + '.cmd')
+        try:
+            up_to_date = (not relink and stamp.read_text(encoding='utf-8') == shlex.join(command)
+                          and self.output.stat().st_mtime_ns >= max(o.stat().st_mtime_ns for o in objects))
+        except OSError:
+            up_to_date = False
+        if up_to_date:
+            return True, 0.0, False
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        print(f"🔗 Linking {self.output.name}...")
+        result = subprocess.run(command, capture_output=True, text=True, cwd=self.project_dir)
+        if result.returncode != 0:
+            print("❌ Linking failed!")
+            if result.stderr:
+                print(result.stderr)
+            stamp.unlink(missing_ok=True)
+            return False, 0.0, True
+        stamp.write_text(shlex.join(command), encoding='utf-8')
+        return True, time.perf_counter() - started, True
+
+    def build(self):
+        """Compile and link the project; return the executable path or None."""
+        units = self.discover_units()
+        if not units:
+            print(f"❌ No C/C++ translation units found in {self.project_dir}")
+            return None
+        print(f"🔨 Building {self.project_dir.name}: {len(units)} units, {self.jobs} jobs")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(self._compile_unit, units))
+        failed = [r for r in results if not r['ok']]
+        for r in failed:
+            print(f"❌ {r['source'].relative_to(self.project_dir)}")
+            if r['stderr']:
+                print(r['stderr'].rstrip())
+        compiled = [r for r in results if r['compiled']]
+        self._report(compiled, len(results) - len(compiled))
+        if failed:
+            print(f"❌ Build failed: {len(failed)} of {len(units)} units did not compile")
+            return None
+        cxx = any(self._is_cxx(u) for u in units)
+        ok, link_seconds, linked = self._link([r['object'] for r in results], cxx, relink=bool(compiled))
+        if not ok:
+            return None
+        if linked:
+            print(f"   link: {link_seconds * 1000:.1f} ms")
+        print(f"✅ Build finished in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return self.output
+
+    def _report(self, compiled: list, up_to_date: int):
+        print(f"⏱️  Compiled {len(compiled)} units, {up_to_date} up to date")
+        for r in sorted(compiled, key=lambda r: r['seconds'], reverse=True):
+            status = '' if r['ok'] else '  (failed)'
+            print(f"   {r['seconds'] * 1000:9.1f} ms  {r['source'].relative_to(self.project_dir)}{status}")
+
+    def build_and_run(self, run_child=None) -> bool:
+        """Build, then run the program; ``run_child(command, cwd)`` returns its exit code."""
+        executable = self.build()
+        if executable is None:
+            return False
+        print(f"🚀 Running {executable.name}...")
+        print("-" * 50)
+        try:
+            if run_child is None:
+                returncode = subprocess.run([str(executable)], cwd=self.project_dir).returncode
+            else:
+                returncode = run_child([str(executable)], self.project_dir)
+        except Exception as e:
+            print(f"❌ Error running {executable.name}: {e}")
+            return False
+        print("-" * 50)
+        if returncode == 0:
+            print(f"✅ {executable.name} executed successfully!")
+            return True
+        print(f"❌ {executable.name} execution failed with code {returncode}")
+        return False
@@ -1,15 +1,17 @@
-import socket
-import http.server
-import socketserver
 import os
-import functools
-import threading
 import time
+import errno
+import socket
+
+from utils.file_cache import HotFileCache
+from utils.deploy_metrics import METRICS_PATH, AccessLog, DeployMetrics, latency_quantile
+from utils.static_server import StaticServer
 
 
 class LinuxDeployer:
     def __init__(self):
         self.PORT = 8000
+        self.HOST = os.environ.get('RUNIT_DEPLOY_HOST', 'localhost')
         self.server = None
 
     def set_port(self, port: int):
@@ -24,14 +26,15 @@ class LinuxDeployer:
         try:
             if self.server:
                 try:
-                    self.server.shutdown()
-                    self.server.server_close()
+                    self.server.stop()
                     self.server = None
                     print("✅ Local server stopped successfully")
                 except Exception as e:
                     print(f"❌ Failed to stop local server: {e}")
             def is_port_free():
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                # Closed connections linger in TIME_WAIT; they don't block a redeploy
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 try:
                     sock.bind(("127.0.0.1", self.PORT))
                     sock.close()
@@ -48,50 +51,157 @@ class LinuxDeployer:
             print(f"❌ Error stopping deployment: {str(e)}")
             return False
 
-    def deploy_site(self, site_folder: str):
+    ENGINES = ('threaded', 'async')
+
+    def deploy_site(self, site_folder: str, cache_mb: int | None = None, precompress: bool = False,
+                    engine: str = 'threaded', workers: int = 1, access_log: str | None = None, live: bool = False,
+                    proxy: list | None = None):
         if not os.path.exists(site_folder):
             print(f"❌ Folder not found: {site_folder}")
             return False
+        if self.server:
+            print(f"❌ A deployment is already running at http://localhost:{self.PORT}")
+            print("Use 'stopdeploy' first")
+            return False
+        if engine not in self.ENGINES:
+            print(f"❌ Unknown engine '{engine}' (choose from: {', '.join(self.ENGINES)})")
+            return False
+        routes = self._proxy_routes(proxy or [])
+        if routes is None:
+            return False
+        abs_site_folder = os.path.abspath(site_folder)
+        assets = self._precompress(abs_site_folder) if precompress else None
+        file_cache = HotFileCache(None if cache_mb is None else cache_mb * 1024 * 1024)
+        if engine == 'async':
+            from utils.async_static_server import AsyncStaticServer
+            server_class = AsyncStaticServer
+        else:
+            server_class = StaticServer
+        address = (self.HOST, self.PORT)
+
+        def make_metrics(stats_dir=None):
+            # Built inside each worker: the access log's writer thread must not cross a fork
+            return DeployMetrics(file_cache, AccessLog(access_log) if access_log else None, stats_dir)
+
+        def make_live():
+            if not live:
+                return None
+            from utils.live_reload import LiveReload
+            return LiveReload(abs_site_folder)
 
-    def share(self):
-        print("⚠️  The share feature is currently not available on RunIT-Linux.")
-        print(f"ℹ️  Access your site locally at http://localhost:{self.PORT}")
-        return False
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            sock.bind(("127.0.0.1", self.PORT))
-            sock.close()
-        except socket.error:
-            print(f"❌ Port {self.PORT} is already in use")
+            if workers > 1:
+                from utils.deploy_workers import DeployWorkers
+                stats_dir = self._stats_dir()
+                self.server = DeployWorkers(address, lambda: server_class(
+                    address, abs_site_folder, file_cache=file_cache, assets=assets, reuse_port=True,
+                    metrics=make_metrics(stats_dir), live=make_live(), proxy=routes), workers, stats_dir=stats_dir)
+            else:
+                live_reload = make_live()
+                try:
+                    self.server = server_class(address, abs_site_folder, file_cache=file_cache, assets=assets,
+                                               metrics=make_metrics(), live=live_reload, proxy=routes)
+                except OSError:
+                    if live_reload is not None:
+                        live_reload.close()
+                    raise
+            self.server.start()
+        except OSError as e:
+            self.server = None
+            print(f"❌ Port {self.PORT} is already in use" if e.errno == errno.EADDRINUSE else f"❌ Server error: {e}")
             print("Use 'setport <number>' to try a different port")
             return False
-        original_dir = os.getcwd()
-        try:
-            abs_site_folder = os.path.abspath(site_folder)
-            os.chdir(abs_site_folder)
-            handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=abs_site_folder)
-            self.server = socketserver.TCPServer(("localhost", self.PORT), handler)
-            self.server.allow_reuse_address = True
-            t = threading.Thread(target=self.server.serve_forever)
-            t.daemon = True
-            t.start()
-            time.sleep(1)
+        mode = f"{engine} engine" + (f", {workers} worker processes" if workers > 1 else "")
+        print(f"✨ Local server started at: http://localhost:{self.PORT} ({mode})")
+        print(f"📂 Serving files from: {abs_site_folder}")
+        print(f"🧠 Hot-file cache: {file_cache.max_bytes // (1024 * 1024)} MB" + (" per worker" if workers > 1 else ""))
+        print(f"📊 Metrics: http://localhost:{self.PORT}{METRICS_PATH} (or 'deploystats')")
+        for route in routes:
+            print(f"🔀 Proxy: {route.prefix} → {route.url} (timeout {route.timeout:g}s)")
+        if live:
+            print(f"🔁 Live reload: pages refresh when files under {abs_site_folder} change")
+        if access_log:
+            print(f"📝 Access log: {os.path.abspath(access_log)}")
+        return True
+
+    def _proxy_routes(self, specs: list):
+        from utils.reverse_proxy import parse_proxy_spec
+        routes = []
+        for spec in specs:
             try:
-                test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                test_socket.connect(("localhost", self.PORT))
-                test_socket.close()
-                server_url = f"http://localhost:{self.PORT}"
-                print(f"✨ Local server started at: {server_url}")
-                print(f"📂 Serving files from: {abs_site_folder}")
-                os.chdir(original_dir)
-                return True
-            except socket.error:
-                print("❌ Failed to start server")
-                self.stop_deployment()
-                os.chdir(original_dir)
-                return False
-        except Exception as e:
-            print(f"❌ Server error: {str(e)}")
-            self.stop_deployment()
-            os.chdir(original_dir)
-            return False
\ No newline at end of file
+                route = parse_proxy_spec(spec)
+            except ValueError as e:
+                print(f"❌ Invalid --proxy: {e}")
+                return None
+            if route.port == self.PORT and route.host in ('localhost', '127.0.0.1', '::1', '0.0.0.0', self.HOST):
+                print(f"❌ Proxy {route.prefix} points back at the deploy port {self.PORT}")
+                return None
+            if any(r.prefix == route.prefix for r in routes):
+                print(f"❌ Duplicate proxy prefix {route.prefix}")
+                return None
+            routes.append(route)
+        return routes
+
+    def _stats_dir(self) -> str:
+        from utils.ipc import default_socket_path
+        path = os.path.join(os.path.dirname(default_socket_path()), f"runit-deploy-{os.getuid()}-{self.PORT}")
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        for name in os.listdir(path):
+            try:
+                os.unlink(os.path.join(path, name))
+            except OSError:
+                pass
+        return path
+
+    def show_stats(self):
+        if not self.server:
+            print("❌ No deployment is running")
+            print("Start one with: deploy <folder>")
+            return False
+        if hasattr(self.server, 'metrics_snapshot'):
+            snap = self.server.metrics_snapshot()
+        else:
+            snap = self.server.files.metrics.aggregate()
+        total = sum(snap['requests'].values())
+        by_class = {}
+        by_prefix = {}
+        for key, count in snap['requests'].items():
+            status, prefix = key.split(' ', 1)
+            by_class[status[0] + 'xx'] = by_class.get(status[0] + 'xx', 0) + count
+            by_prefix[prefix] = by_prefix.get(prefix, 0) + count
+        uptime = time.time() - snap['started']
+        print(f"\n📊 Deployment stats: http://localhost:{self.PORT} ({snap['processes']} process"
+              f"{'es' if snap['processes'] != 1 else ''}, up {uptime:.0f}s)")
+        print("=" * 60)
+        print(f"   Requests: {total}  (" + ', '.join(f"{k}: {v}" for k, v in sorted(by_class.items())) + ")")
+        print(f"   Sent: {snap['bytes_sent'] / (1024 * 1024):.2f} MB")
+        quantiles = [latency_quantile(snap, q) for q in (0.5, 0.9, 0.99)]
+        if quantiles[0] is not None:
+            print("   Latency: " + '  '.join(
+                f"p{label} ≤ {'∞' if q == float('inf') else f'{q * 1000:g}ms'}"
+                for label, q in zip((50, 90, 99), quantiles)) + f"  (mean {snap['latency_sum'] / snap['latency_count'] * 1000:.2f}ms)")
+        lookups = snap['cache_hits'] + snap['cache_misses']
+        if lookups:
+            print(f"   Hot-file cache: {snap['cache_hits']} hits / {snap['cache_misses']} misses "
+                  f"({snap['cache_hits'] / lookups:.0%} hit rate)")
+        print(f"   Connections: {snap['connections_open']} open, {snap['connections_total']} total")
+        if by_prefix:
+            print("   Top paths:")
+            for prefix, count in sorted(by_prefix.items(), key=lambda item: -item[1])[:10]:
+                print(f"     {count:>8}  {prefix}")
+        return True
+
+    def _precompress(self, site_folder: str):
+        from utils.precompress import PrecompressedAssets
+        assets = PrecompressedAssets(site_folder)
+        print(f"🗜️  Precompressing assets ({', '.join(assets.encodings)})...")
+        summary = assets.build()
+        print(f"   {summary['files']} compressible files: {summary['compressed']} variants built, "
+              f"{summary['reused']} reused from cache, {summary['saved_bytes'] / 1024:.1f} KB saved "
+              f"in {summary['seconds']:.2f}s")
+        return assets
+
+    def share(self):
+        print("⚠️  The share feature is currently not available on RunIT-Linux.")
+        print(f"ℹ️  Access your site locally at http://localhost:{self.PORT}")
+        return False
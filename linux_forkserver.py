@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Warm Python fork-server behind `run --warm`.
+
+The server pre-imports a module list once and forks a child per script run.
+The client hands over its stdin/stdout/stderr with SCM_RIGHTS, so the child
+writes straight to the caller's terminal or pipe, and gets back the child's
+pid followed by its exit code.
+"""
+import os
+import sys
+import json
+import time
+import errno
+import signal
+import socket
+import selectors
+import subprocess
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from utils.ipc import check_peer, send_message, MessageReader
+
+DEFAULT_IDLE_SECONDS = 900
+RUSAGE_FIELDS = ['ru_utime', 'ru_stime', 'ru_maxrss', 'ru_nvcsw', 'ru_nivcsw', 'ru_inblock', 'ru_oublock']
+
+
+def default_forkserver_path() -> str:
+    from utils.ipc import default_socket_path
+    base, _ = os.path.splitext(default_socket_path())
+    return f"{base}-forkserver.sock"
+
+
+def configured_modules() -> list:
+    raw = os.environ.get('RUNIT_WARM_MODULES', '')
+    return [m.strip() for m in raw.split(',') if m.strip()]
+
+
+def _recv_request(conn):
+    data, fds, _, _ = socket.recv_fds(conn, 1 << 16, 3)
+    return MessageReader(conn, initial=data).read(), fds
+
+
+def _forget_runit_modules():
+    """Drop our own modules (utils, utils.ipc, ...) so the script imports its own of the same name."""
+    prefix = str(BASE_DIR) + os.sep
+    for name, module in list(sys.modules.items()):
+        if name != '__main__' and (getattr(module, '__file__', None) or '').startswith(prefix):
+            del sys.modules[name]
+
+
+def _child_main(request: dict, fds: list):
+    # Own session, so the client can signal the whole script (and anything it
+    # spawns) without hitting the server; the client forwards Ctrl-C itself
+    os.setsid()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = os.fdopen(0, 'r', closefd=False)
+    sys.stdout = os.fdopen(1, 'w', buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = os.fdopen(2, 'w', buffering=1, closefd=False)
+    os.environ.clear()
+    os.environ.update(request.get('env', {}))
+    os.chdir(request['cwd'])
+    argv = request['argv']
+    sys.argv = list(argv)
+    _forget_runit_modules()
+    sys.path[:] = [os.path.dirname(os.path.abspath(argv[0]))] + [p for p in sys.path[1:] if p != str(BASE_DIR)]
+    code = 0
+    try:
+        import runpy
+        runpy.run_path(argv[0], run_name='__main__')
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except KeyboardInterrupt:
+        code = 130
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    os._exit(code & 0xFF)
+
+
+class ForkServer:
+    def __init__(self, socket_path: str, modules: list, idle_seconds: int = DEFAULT_IDLE_SECONDS,
+                 launcher: str = ''):
+        self.socket_path = socket_path
+        self.modules = modules
+        self.launcher = launcher
+        self.listener = None
+        self.idle_seconds = idle_seconds
+        self.loaded = []
+        self.failed = []
+        self.children = {}
+        self.running = True
+
+    def preload(self):
+        import importlib
+        for name in self.modules:
+            try:
+                importlib.import_module(name)
+                self.loaded.append(name)
+            except Exception:
+                self.failed.append(name)
+        import gc
+        gc.collect()
+        # Keep preloaded objects out of the collector so forked children
+        # don't dirty (and copy) those pages when gc runs
+        gc.freeze()
+
+    def hello(self) -> dict:
+        return {'type': 'hello', 'pid': os.getpid(), 'python': sys.executable, 'launcher': self.launcher,
+                'modules': self.modules, 'loaded': self.loaded, 'failed': self.failed}
+
+    def serve_forever(self):
+        self.preload()
+        listener = self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        wake_r, wake_w = os.pipe()
+        os.set_blocking(wake_r, False)
+        os.set_blocking(wake_w, False)
+        signal.set_wakeup_fd(wake_w)
+        signal.signal(signal.SIGCHLD, lambda *_: None)
+        signal.signal(signal.SIGTERM, self._stop)
+        selector = selectors.DefaultSelector()
+        selector.register(listener, selectors.EVENT_READ, 'accept')
+        selector.register(wake_r, selectors.EVENT_READ, 'wake')
+        last_activity = time.monotonic()
+        try:
+            while self.running:
+                for key, _ in selector.select(timeout=5.0):
+                    if key.data == 'accept':
+                        conn, _ = listener.accept()
+                        last_activity = time.monotonic()
+                        self._handle(conn)
+                    elif key.data == 'wake':
+                        try:
+                            while os.read(wake_r, 512):
+                                pass
+                        except BlockingIOError:
+                            pass
+                self._reap()
+                if not self.children and time.monotonic() - last_activity > self.idle_seconds:
+                    break
+        finally:
+            listener.close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def _stop(self, signum, frame):
+        self.running = False
+
+    def _handle(self, conn):
+        try:
+            check_peer(conn)
+            request, fds = _recv_request(conn)
+        except (OSError, ValueError):
+            conn.close()
+            return
+        if request is None:
+            conn.close()
+            return
+        if request.get('type') == 'hello':
+            send_message(conn, self.hello())
+            conn.close()
+            return
+        if request.get('type') == 'shutdown':
+            self.running = False
+            conn.close()
+            return
+        if len(fds) != 3:
+            send_message(conn, {'type': 'error', 'message': 'expected stdin, stdout and stderr'})
+            conn.close()
+            for fd in fds:
+                os.close(fd)
+            return
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            self.listener.close()
+            try:
+                _child_main(request, fds)
+            finally:
+                os._exit(1)
+        for fd in fds:
+            os.close(fd)
+        self.children[pid] = conn
+        try:
+            send_message(conn, {'type': 'started', 'pid': pid})
+        except OSError:
+            pass
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status, rusage = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            conn = self.children.pop(pid, None)
+            if conn is None:
+                continue
+            try:
+                send_message(conn, {'type': 'exit', 'code': os.waitstatus_to_exitcode(status),
+                                    'rusage': {field: getattr(rusage, field) for field in RUSAGE_FIELDS}})
+            except OSError:
+                pass
+            conn.close()
+
+
+class WarmPythonClient:
+    """Starts (or reuses) the fork-server and runs scripts through it."""
+
+    def __init__(self, python: str = 'python3', socket_path: str | None = None, modules: list | None = None):
+        self.python = python
+        self.socket_path = socket_path or default_forkserver_path()
+        self.modules = configured_modules() if modules is None else modules
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            # We hand over our environment and terminal; only to a server of our own
+            check_peer(sock)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _hello(self):
+        try:
+            sock = self._connect()
+        except OSError:
+            return None
+        try:
+            send_message(sock, {'type': 'hello'})
+            return MessageReader(sock).read()
+        except (OSError, ValueError):
+            return None
+        finally:
+            sock.close()
+
+    def _shutdown(self):
+        try:
+            sock = self._connect()
+            send_message(sock, {'type': 'shutdown'})
+            sock.close()
+        except OSError:
+            pass
+
+    def ensure_running(self, timeout: float = 30.0) -> bool:
+        info = self._hello()
+        if info and info.get('modules') == self.modules and info.get('launcher') == self.python:
+            return True
+        if info:
+            self._shutdown()
+            time.sleep(0.05)
+        print(f"🔥 Starting warm Python server (preloading: {', '.join(self.modules) or 'nothing'})...")
+        subprocess.Popen([self.python, str(Path(__file__).resolve()), '--serve', '--socket', self.socket_path,
+                          '--modules', ','.join(self.modules), '--launcher', self.python],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True, cwd='/')
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            info = self._hello()
+            if info:
+                if info.get('failed'):
+                    print(f"⚠️  Could not preload: {', '.join(info['failed'])}")
+                return True
+            time.sleep(0.05)
+        print("❌ Warm Python server did not start")
+        return False
+
+    def run(self, argv: list, cwd: str, stdio=(0, 1, 2), on_start=None):
+        """Run a script in a forked child; return (exit code, resource usage)."""
+        from types import SimpleNamespace
+        from utils.run_stats import usage_from_rusage
+        started = time.perf_counter()
+        sock = self._connect()
+        pid = None
+        try:
+            request = {'argv': argv, 'cwd': cwd, 'env': dict(os.environ)}
+            payload = json.dumps(request).encode('utf-8') + b'\n'
+            socket.send_fds(sock, [payload], list(stdio))
+            reader = MessageReader(sock)
+            while True:
+                try:
+                    message = reader.read()
+                except OSError as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    raise
+                except KeyboardInterrupt:
+                    # Forward Ctrl-C to the forked child and keep waiting for its exit
+                    if pid:
+                        try:
+                            os.kill(pid, signal.SIGINT)
+                        except ProcessLookupError:
+                            pass
+                    continue
+                if message is None:
+                    raise ConnectionError('warm Python server went away')
+                if message.get('type') == 'started':
+                    pid = message['pid']
+                    if on_start:
+                        on_start(pid)
+                elif message.get('type') == 'exit':
+                    rusage = SimpleNamespace(**message['rusage']) if message.get('rusage') else None
+                    return int(message['code']), usage_from_rusage(rusage, time.perf_counter() - started)
+                elif message.get('type') == 'error':
+                    raise ConnectionError(message.get('message', 'warm Python server error'))
+        finally:
+            sock.close()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='RunIT warm Python fork-server')
+    parser.add_argument('--serve', action='store_true', required=True)
+    parser.add_argument('--socket', default=None)
+    parser.add_argument('--modules', default='')
+    parser.add_argument('--launcher', default='')
+    parser.add_argument('--idle', type=int, default=int(os.environ.get('RUNIT_WARM_IDLE', DEFAULT_IDLE_SECONDS)))
+    options = parser.parse_args()
+    modules = [m for m in options.modules.split(',') if m]
+    ForkServer(options.socket or default_forkserver_path(), modules, options.idle, options.launcher).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,531 @@
+import os
+import sys
+import time
+import shlex
+import shutil
+import signal
+import threading
 from pathlib import Path
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.build_cache import BuildCache, parse_depfile
+from utils.interpreter_cache import InterpreterCache
+from utils.run_stats import RunStats, usage_from_rusage
+from utils.output import is_redirected, current_stdout, redirect_thread_stdout
+
+
+class _JobOutput:
+    """Collects one job's output and either prefixes it line by line or holds it until the end."""
+
+    def __init__(self, name: str, stream, lock, mode: str = 'prefix'):
+        self.name = name
+        self.stream = stream
+        self.lock = lock
+        self.mode = mode
+        self.pending = ''
+        self.chunks = []
+
+    def write(self, s):
+        if self.mode == 'buffer':
+            self.chunks.append(s)
+            return len(s)
+        self.pending += s
+        if '\n' in self.pending:
+            lines, self.pending = self.pending.rsplit('\n', 1)
+            with self.lock:
+                for line in lines.split('\n'):
+                    self.stream.write(f"[{self.name}] {line}\n")
+                self.stream.flush()
+        return len(s)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self.lock:
+            if self.mode == 'buffer':
+                text = ''.join(self.chunks)
+                if text:
+                    self.stream.write(f"===== {self.name} =====\n{text}")
+                    if not text.endswith('\n'):
+                        self.stream.write('\n')
+            elif self.pending:
+                self.stream.write(f"[{self.name}] {self.pending}\n")
+            self.stream.flush()
+        self.pending = ''
+        self.chunks = []
+
+
+class _ChildHandle:
+    """Popen-like handle for a child we did not spawn ourselves (warm runs)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode = None
+
+    def terminate(self):
+        try:
+            os.kill(self.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
 
 
 class LinuxFileRunner:
+    INTERPRETER_MAP = {
+        '.py': ['python3'],
+        '.js': ['node'],
+        '.html': ['xdg-open'],
+        '.css': ['xdg-open'],
+        '.php': ['php'],
+        '.sh': ['bash'],
+        '.c': None,
+        '.cpp': None,
+        '.java': None,
+        '.ts': ['ts-node'],
+        '.json': ['xdg-open'],
+        '.xml': ['xdg-open'],
+        '.txt': ['xdg-open'],
+        '.md': ['xdg-open'],
+        '.bat': ['bash'],
+        '.cmd': ['bash'],
+    }
+    COMPILE_RULES = {
+        '.c': {'compiler': 'gcc', 'flags_env': 'CFLAGS'},
+        '.cpp': {'compiler': 'g++', 'flags_env': 'CXXFLAGS'},
+        '.java': {'compiler': 'javac', 'flags_env': 'JAVACFLAGS'},
+    }
+
+    WATCHED_SUFFIXES = {'.py', '.js', '.ts', '.php', '.sh', '.c', '.cpp', '.cc', '.cxx',
+                        '.h', '.hpp', '.java', '.html', '.css', '.json'}
+
     def __init__(self):
-        pass
+        self.interpreters = InterpreterCache()
+        self.build_cache = BuildCache()
+        self.stats = RunStats()
+        self._local = threading.local()
+
+    def known_interpreters(self) -> list:
+        names = {command[0] for command in self.INTERPRETER_MAP.values() if command}
+        return sorted(names - {'xdg-open'}) + [rule['compiler'] for rule in self.COMPILE_RULES.values()]
 
     def get_interpreter_command(self, file_path: Path):
         extension = file_path.suffix.lower()
-        interpreter_map = {
-            '.py': ['python3'],
-            '.js': ['node'],
-            '.html': ['xdg-open'],
-            '.css': ['xdg-open'],
-            '.php': ['php'],
-            '.sh': ['bash'],
-            '.c': None,
-            '.cpp': None,
-            '.java': None,
-            '.ts': ['ts-node'],
-            '.json': ['xdg-open'],
-            '.xml': ['xdg-open'],
-            '.txt': ['xdg-open'],
-            '.md': ['xdg-open'],
-            '.bat': ['bash'],
-            '.cmd': ['bash'],
-        }
-        if extension in interpreter_map:
-            command = interpreter_map[extension]
+        if extension in self.INTERPRETER_MAP:
+            command = self.INTERPRETER_MAP[extension]
             if command is None:
                 return None
             return command + [str(file_path)]
         return None
 
-    def check_interpreter_availability(self, interpreter: str) -> bool:
+    def check_interpreter_availability(self, interpreter: str, trust_cache: bool = False) -> bool:
+        return self.interpreters.is_available(interpreter, trust=trust_cache)
+
+    def _run_child(self, command, cwd, on_start=None):
+        """Run ``command`` to completion and return (exit code, resource usage)."""
+        on_start = on_start or getattr(self._local, 'on_start', None)
+        started = time.perf_counter()
+        # Children inherit our stdout unless this thread's prints are being
+        # captured (batch --jobs, run --jobs); then their output is copied in.
+        captured = is_redirected() or on_start is not None
+        if captured:
+            # Tracked jobs get their own process group so cancelling one also
+            # stops whatever it spawned (e.g. `sleep` under a bash script)
+            proc = subprocess.Popen(command, cwd=cwd, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    start_new_session=on_start is not None)
+        else:
+            proc = subprocess.Popen(command, cwd=cwd, shell=False)
         try:
-            result = subprocess.run([interpreter, '--version'], capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except Exception:
-            try:
-                result = subprocess.run([interpreter, '-v'], capture_output=True, text=True, timeout=5)
-                return result.returncode == 0
-            except Exception:
-                return False
+            if on_start:
+                on_start(proc)
+            if captured:
+                out = sys.stdout
+                for chunk in iter(lambda: proc.stdout.read1(65536), b''):
+                    out.write(chunk.decode('utf-8', errors='replace'))
+                proc.stdout.close()
+            return self._wait_with_usage(proc, started)
+        except BaseException:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            raise
 
-    def handle_compilation_required(self, file_path: Path):
-        extension = file_path.suffix.lower()
-        info = None
-        if extension == '.c':
-            info = {'compiler': 'gcc', 'command': f'gcc "{file_path}" -o "{file_path.stem}"', 'run_command': f'./{file_path.stem}'}
-        elif extension == '.cpp':
-            info = {'compiler': 'g++', 'command': f'g++ "{file_path}" -o "{file_path.stem}"', 'run_command': f'./{file_path.stem}'}
-        elif extension == '.java':
-            info = {'compiler': 'javac', 'command': f'javac "{file_path}"', 'run_command': f'java "{file_path.stem}"'}
-        if not info:
-            print("❌ Unsupported compilation type")
+    @staticmethod
+    def _wait_with_usage(proc, started: float):
+        try:
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        except ChildProcessError:
+            proc.wait()
+            rusage = None
+        return proc.returncode, usage_from_rusage(rusage, time.perf_counter() - started)
+
+    @staticmethod
+    def _terminate_group(proc):
+        # Only look at returncode: poll() here could reap the child before the
+        # owning thread's wait4() collects its resource usage
+        if proc.returncode is not None:
             return
-        print(f"⚠️  File '{file_path.name}' requires compilation first.")
-        print(f"Compiler needed: {info['compiler']}")
-        print(f"Compile with: {info['command']}")
-        print(f"Then run with: {info['run_command']}")
-        if self.check_interpreter_availability(info['compiler']):
-            resp = input("Would you like to compile and run now? (y/n): ").lower()
-            if resp in ['y', 'yes']:
-                try:
-                    print(f"🔨 Compiling {file_path.name}...")
-                    compile_result = subprocess.run(info['command'], shell=True, capture_output=True, text=True, cwd=file_path.parent)
-                    if compile_result.returncode == 0:
-                        print("✅ Compilation successful!")
-                        run_result = subprocess.run(info['run_command'], shell=True, cwd=file_path.parent)
-                        if run_result.returncode == 0:
-                            print("✅ Program executed successfully!")
-                        else:
-                            print(f"❌ Program execution failed with code {run_result.returncode}")
-                    else:
-                        print("❌ Compilation failed!")
-                        if compile_result.stderr:
-                            print(compile_result.stderr)
-                except Exception as e:
-                    print(f"❌ Compilation error: {e}")
-
-    def run_file(self, filename: str):
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            proc.terminate()
+
+    def compile_file(self, file_path: Path, check: bool = True, rebuild: bool = False, interactive: bool = True):
+        """Return the command that runs ``file_path``'s build, compiling on a cache miss.
+
+        Returns None when the compiler is missing, the user declines, or the
+        compilation fails.
+        """
+        rule = self.COMPILE_RULES[file_path.suffix.lower()]
+        compiler = rule['compiler']
+        entry = self.interpreters.resolve(compiler, trust=not check)
+        self.interpreters.save()
+        if not entry or not entry.get('available'):
+            print(f"⚠️  File '{file_path.name}' requires compilation first.")
+            print(f"❌ Compiler '{compiler}' not found on system.")
+            return None
+        flags = shlex.split(os.environ.get(rule['flags_env'], ''))
+        key = self.build_cache.key(file_path, f"{entry['path']}|{entry.get('version', '')}", flags, kind=compiler)
+        artifact = None if rebuild else self.build_cache.lookup(key)
+        if artifact is not None:
+            print(f"⚡ Using cached build of {file_path.name}")
+        else:
+            print(f"⚠️  File '{file_path.name}' requires compilation first.")
+            print(f"Compiler needed: {compiler}")
+            if interactive and sys.stdin.isatty():
+                resp = input("Would you like to compile and run now? (y/n): ").lower()
+                if resp not in ['y', 'yes']:
+                    return None
+            artifact = self._compile_into_cache(file_path, entry['path'], flags, key)
+            if artifact is None:
+                return None
+        if file_path.suffix.lower() == '.java':
+            return ['java', '-cp', str(artifact), file_path.stem]
+        return [str(artifact / file_path.stem)]
+
+    def _compile_into_cache(self, file_path: Path, compiler_path: str, flags: list, key: str):
+        build_dir = self.build_cache.temp_dir()
+        depfile = build_dir / 'deps.d'
+        if file_path.suffix.lower() == '.java':
+            command = [compiler_path, '-d', str(build_dir)] + flags + [str(file_path)]
+        else:
+            command = [compiler_path, str(file_path), '-o', str(build_dir / file_path.stem),
+                       '-MMD', '-MF', str(depfile)] + flags
+        try:
+            print(f"🔨 Compiling {file_path.name}...")
+            compile_result = subprocess.run(command, capture_output=True, text=True, cwd=file_path.parent)
+        except Exception as e:
+            print(f"❌ Compilation error: {e}")
+            shutil.rmtree(build_dir, ignore_errors=True)
+            return None
+        if compile_result.returncode != 0:
+            print("❌ Compilation failed!")
+            if compile_result.stderr:
+                print(compile_result.stderr)
+            shutil.rmtree(build_dir, ignore_errors=True)
+            return None
+        print("✅ Compilation successful!")
+        deps = [file_path.parent / d for d in parse_depfile(depfile)]
+        deps = [d for d in deps if d.resolve() != file_path]
+        depfile.unlink(missing_ok=True)
+        return self.build_cache.store(key, build_dir, deps, {'source': str(file_path)})
+
+    def _report_usage(self, file_path: Path, returncode, usage: dict, mode: str = 'normal'):
+        self.stats.print_usage(usage)
+        self.stats.record(file_path, returncode, usage, mode)
+
+    def handle_compilation_required(self, file_path: Path, check: bool = True, rebuild: bool = False,
+                                    timed: bool = False, interactive: bool = True):
+        if file_path.suffix.lower() not in self.COMPILE_RULES:
+            print("❌ Unsupported compilation type")
+            return False
+        command = self.compile_file(file_path, check=check, rebuild=rebuild, interactive=interactive)
+        if command is None:
+            return False
+        try:
+            returncode, usage = self._run_child(command, file_path.parent)
+        except Exception as e:
+            print(f"❌ Error running {file_path.name}: {e}")
+            return False
+        if timed:
+            self._report_usage(file_path, returncode, usage, 'compiled')
+        if returncode == 0:
+            print("✅ Program executed successfully!")
+            return True
+        print(f"❌ Program execution failed with code {returncode}")
+        return False
+
+    def run_project(self, directory: str, jobs: int | None = None) -> bool:
+        from linux_builder import ProjectBuilder
+        project_dir = Path(directory).resolve()
+        if not project_dir.is_dir():
+            print(f"❌ Not a directory: {directory}")
+            return False
+        return ProjectBuilder(project_dir, jobs=jobs).build_and_run(
+            run_child=lambda command, cwd: self._run_child(command, cwd)[0])
+
+    def _run_warm(self, file_path: Path, check: bool = True):
+        from linux_forkserver import WarmPythonClient
+        entry = self.interpreters.resolve('python3', trust=not check)
+        if not entry or not entry.get('available'):
+            print("❌ Interpreter 'python3' not found on system.")
+            return None
+        client = WarmPythonClient(python=entry['path'])
+        if not client.ensure_running():
+            return None
+        argv, cwd = [str(file_path)], str(file_path.parent)
+        hook = getattr(self._local, 'on_start', None)
+        on_start = (lambda pid: hook(_ChildHandle(pid))) if hook else None
+        if not is_redirected():
+            return client.run(argv, cwd, on_start=on_start)
+        # Output is being captured: hand the child a pipe and copy it over
+        read_fd, write_fd = os.pipe()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        result = {}
+
+        def run():
+            try:
+                result['outcome'] = client.run(argv, cwd, (devnull, write_fd, write_fd), on_start)
+            finally:
+                # Our copies must go so the pipe reaches EOF once the script exits
+                os.close(write_fd)
+                os.close(devnull)
+
+        t = threading.Thread(target=run)
+        t.start()
+        # Drain while the script runs; it would block on a full pipe otherwise
+        with os.fdopen(read_fd, 'rb') as pipe:
+            out = sys.stdout
+            for chunk in iter(lambda: pipe.read1(65536), b''):
+                out.write(chunk.decode('utf-8', errors='replace'))
+        t.join()
+        return result.get('outcome', (1, {}))
+
+    def run_file(self, filename: str, check: bool = True, rebuild: bool = False, warm: bool = False,
+                 timed: bool = False, interactive: bool = True):
         try:
             file_path = Path(filename).resolve()
             if not file_path.exists() or not file_path.is_file():
                 print(f"❌ File not found: {filename}")
-                return
+                return False
             command = self.get_interpreter_command(file_path)
             if command is None:
-                self.handle_compilation_required(file_path)
-                return
+                return self.handle_compilation_required(file_path, check=check, rebuild=rebuild, timed=timed,
+                                                        interactive=interactive)
             interpreter = command[0]
-            if not self.check_interpreter_availability(interpreter) and interpreter != 'xdg-open':
+            if interpreter != 'xdg-open' and not self.check_interpreter_availability(interpreter, trust_cache=not check):
                 print(f"❌ Interpreter '{interpreter}' not found on system.")
-                return
-            print(f"🚀 Running {file_path.name}...")
-            print("-" * 50)
-            result = subprocess.run(
-                command,
-                cwd=file_path.parent,
-                shell=False
-            )
+                return False
+            if warm and file_path.suffix.lower() == '.py':
+                print(f"🔥 Running {file_path.name} (warm)...")
+                print("-" * 50)
+                outcome = self._run_warm(file_path, check=check)
+                if outcome is None:
+                    return False
+                returncode, usage = outcome
+            else:
+                print(f"🚀 Running {file_path.name}...")
+                print("-" * 50)
+                returncode, usage = self._run_child(command, file_path.parent)
             print("-" * 50)
-            if result.returncode == 0:
+            if timed:
+                self._report_usage(file_path, returncode, usage, 'warm' if warm else 'normal')
+            if returncode == 0:
                 print(f"✅ {file_path.name} executed successfully!")
-            else:
-                print(f"❌ {file_path.name} execution failed with code {result.returncode}")
+                return True
+            print(f"❌ {file_path.name} execution failed with code {returncode}")
+            return False
         except KeyboardInterrupt:
             print("\n⚠️  Execution interrupted by user")
+            return False
         except Exception as e:
-            print(f"❌ Error running file: {e}")
\ No newline at end of file
+            print(f"❌ Error running file: {e}")
+            return False
+
+    def _prepare_job(self, file_path: Path, check: bool, rebuild: bool):
+        if not file_path.is_file():
+            print(f"❌ File not found: {file_path}")
+            return None
+        command = self.get_interpreter_command(file_path)
+        if command is None:
+            if file_path.suffix.lower() not in self.COMPILE_RULES:
+                print("❌ Unsupported file type")
+                return None
+            return self.compile_file(file_path, check=check, rebuild=rebuild, interactive=False)
+        interpreter = command[0]
+        if interpreter != 'xdg-open' and not self.check_interpreter_availability(interpreter, trust_cache=not check):
+            print(f"❌ Interpreter '{interpreter}' not found on system.")
+            return None
+        return command
+
+    def run_many(self, filenames: list, jobs: int | None = None, fail_fast: bool = False,
+                 output_mode: str = 'prefix', check: bool = True, rebuild: bool = False,
+                 timed: bool = False) -> bool:
+        """Run several files concurrently on at most ``jobs`` child processes.
+
+        Each job's output is prefixed with its file name (or, with
+        ``output_mode='buffer'``, printed in one block when the job ends) and a
+        summary of exit codes and durations follows. With ``fail_fast`` the
+        first failure stops pending jobs and terminates running ones.
+        """
+        jobs = max(1, jobs or os.cpu_count() or 1)
+        stream = current_stdout()
+        lock = threading.Lock()
+        stop = threading.Event()
+        running = set()
+        paths = [Path(f).resolve() for f in filenames]
+        names = [p.name if [q.name for q in paths].count(p.name) == 1 else f for p, f in zip(paths, filenames)]
+        print(f"🚀 Running {len(paths)} files with {min(jobs, len(paths))} jobs ({'fail-fast' if fail_fast else 'keep-going'})...")
+        print("-" * 50)
+
+        def track(proc, job_procs):
+            job_procs.append(proc)
+            with lock:
+                running.add(proc)
+            if stop.is_set():
+                self._terminate_group(proc)
+
+        def cancel_all():
+            stop.set()
+            with lock:
+                procs = list(running)
+            for proc in procs:
+                self._terminate_group(proc)
+
+        def run_job(index):
+            file_path, name = paths[index], names[index]
+            if stop.is_set():
+                return {'name': name, 'status': 'skipped', 'code': None, 'seconds': 0.0, 'usage': {}}
+            started = time.perf_counter()
+            output = _JobOutput(name, stream, lock, output_mode)
+            code = None
+            usage = {}
+            job_procs = []
+            try:
+                with redirect_thread_stdout(output):
+                    command = self._prepare_job(file_path, check, rebuild)
+                    if command is not None:
+                        code, usage = self._run_child(command, file_path.parent,
+                                                      on_start=lambda proc: track(proc, job_procs))
+                        if timed:
+                            self.stats.record(file_path, code, usage)
+            except Exception as e:
+                with redirect_thread_stdout(output):
+                    print(f"❌ Error running file: {e}")
+            finally:
+                output.close()
+                with lock:
+                    running.difference_update(job_procs)
+            seconds = time.perf_counter() - started
+            if code == 0:
+                status = 'ok'
+            elif code is not None and code < 0 and stop.is_set():
+                status = 'cancelled'
+            else:
+                status = 'failed'
+            if status == 'failed' and fail_fast and not stop.is_set():
+                cancel_all()
+            return {'name': name, 'status': status, 'code': code, 'seconds': seconds, 'usage': usage}
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(run_job, i) for i in range(len(paths))]
+            try:
+                results = [f.result() for f in futures]
+            except KeyboardInterrupt:
+                print("\n⚠️  Execution interrupted by user")
+                cancel_all()
+                results = [f.result() for f in futures]
+        print("-" * 50)
+        print(f"📋 Summary ({(time.perf_counter() - started):.2f}s wall):")
+        icons = {'ok': '✅', 'failed': '❌', 'cancelled': '⛔', 'skipped': '⏭️ '}
+        width = max(len(r['name']) for r in results)
+        for r in results:
+            code = '-' if r['code'] is None else r['code']
+            line = f"   {icons[r['status']]} {r['name']:<{width}}  exit {code!s:>4}  {r['seconds'] * 1000:9.1f} ms  {r['status']}"
+            if timed and 'user_s' in r['usage']:
+                u = r['usage']
+                line += f"  (user {u['user_s']:.3f}s, sys {u['sys_s']:.3f}s, max RSS {u['max_rss_kb'] / 1024:.1f} MB)"
+            print(line)
+        failed = sum(1 for r in results if r['status'] != 'ok')
+        if failed:
+            print(f"❌ {failed} of {len(results)} files did not succeed")
+            return False
+        print(f"✅ All {len(results)} files executed successfully!")
+        return True
+
+    def _is_watched_source(self, name: str) -> bool:
+        suffix = os.path.splitext(name)[1].lower()
+        return suffix in self.WATCHED_SUFFIXES
+
+    def watch(self, target: str, check: bool = True, rebuild: bool = False, warm: bool = False,
+              timed: bool = False, jobs: int | None = None) -> bool:
+        """Rerun ``target`` whenever it or its sibling sources change.
+
+        A file is rerun through run_file; a directory is rebuilt and run as a
+        C/C++ project. A run still in progress when the next change settles
+        is cancelled first.
+        """
+        from utils.file_watch import StatSnapshot, FileWatcher
+        path = Path(target).resolve()
+        if not path.exists():
+            print(f"❌ File not found: {target}")
+            return False
+        if path.is_dir():
+            snapshot = StatSnapshot(path, recursive=True, include=self._is_watched_source)
+            run = lambda: self.run_project(str(path), jobs=jobs)
+        else:
+            snapshot = StatSnapshot(path.parent, recursive=False, include=self._is_watched_source)
+            # Runs happen on a background thread, which must never prompt
+            run = lambda: self.run_file(str(path), check=check, rebuild=rebuild, warm=warm, timed=timed,
+                                        interactive=False)
+        watcher = FileWatcher(snapshot.scan())
+        print(f"👀 Watching {snapshot.root} ({len(snapshot.files)} source files). Press Ctrl+C to stop.")
+        current = None
+        try:
+            while True:
+                current = self._start_watched_run(run)
+                changes = watcher.wait_for_changes()
+                if changes is None:
+                    break
+                names = ', '.join(os.path.basename(p) for p in changes.paths()[:5])
+                print(f"\n🔄 Change detected ({changes.summary()}: {names})")
+                if self._cancel_watched_run(current):
+                    print("⛔ Previous run cancelled")
+        except KeyboardInterrupt:
+            self._cancel_watched_run(current)
+            print("\n👋 Stopped watching")
+        return True
+
+    def _start_watched_run(self, run):
+        state = {'procs': [], 'cancelled': threading.Event(), 'lock': threading.Lock()}
+
+        def track(proc):
+            with state['lock']:
+                state['procs'].append(proc)
+            if state['cancelled'].is_set():
+                self._terminate_group(proc)
+
+        def target():
+            self._local.on_start = track
+            try:
+                run()
+            finally:
+                self._local.on_start = None
+
+        state['thread'] = threading.Thread(target=target, daemon=True)
+        state['thread'].start()
+        return state
+
+    def _cancel_watched_run(self, state) -> bool:
+        if state is None or not state['thread'].is_alive():
+            return False
+        state['cancelled'].set()
+        with state['lock']:
+            procs = list(state['procs'])
+        for proc in procs:
+            self._terminate_group(proc)
+        state['thread'].join()
+        return True
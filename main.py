@@ -10,49 +10,71 @@ BASE_DIR = Path(__file__).resolve().parent
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
-from commands import (
-    FileCreator,
-    VirusScanner,
-    FileSearcher,
-    FileInfo,
-    HelpDisplay,
-    AIAssistant,
-    PackageManager,
-    FileManager,
-    Converter,
-    P2PMessenger,
-)
+# --startup-profile has to be honoured before anything else is imported
+STARTUP_PROFILER = None
+if '--startup-profile' in sys.argv[1:]:
+    from utils.startup_profile import StartupProfiler
+    STARTUP_PROFILER = StartupProfiler()
+    STARTUP_PROFILER.install()
+
+import time
+import argparse
+import threading
+import importlib
+
+from utils.args import CommandArgParser
 from utils.logger import Logger
 
-# Linux-specific adapters
-from linux_runner import LinuxFileRunner
-from linux_deployer import LinuxDeployer
-from sysinfo import SystemInfo
+STATUS_OK = 0
+STATUS_FAILED = 1
+STATUS_UNKNOWN = 127
+# Commands that change the process-wide working directory, which every --jobs line shares
+CWD_COMMANDS = {'go'}
+
+
+def command_status(result):
+    """Map a handler's return value onto a shell-style exit status."""
+    if result is False:
+        return STATUS_FAILED
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return STATUS_OK
+
+
+# Command subsystems, resolved the first time a command touches them:
+# attribute name -> (module, class)
+HANDLERS = {
+    'runner': ('linux_runner', 'LinuxFileRunner'),
+    'creator': ('commands.creator', 'FileCreator'),
+    'scanner': ('commands.scanner', 'VirusScanner'),
+    'searcher': ('commands.searcher', 'FileSearcher'),
+    'indexer': ('commands.indexer', 'CodeIndexer'),
+    'bencher': ('commands.bench', 'HttpBenchmark'),
+    'info': ('commands.info', 'FileInfo'),
+    'helper': ('commands.helper', 'HelpDisplay'),
+    'ai_assistant': ('commands.ai_assistant', 'AIAssistant'),
+    'package_manager': ('commands.package_manager', 'PackageManager'),
+    'file_manager': ('commands.file_manager', 'FileManager'),
+    'deployer': ('linux_deployer', 'LinuxDeployer'),
+    'converter': ('commands.converter', 'Converter'),
+    'p2pmsg': ('commands.p2pmsg', 'P2PMessenger'),
+    'sysinfo': ('sysinfo', 'SystemInfo'),
+}
 
 
 class RunITLinuxCLI:
     def __init__(self):
         self.logger = Logger()
-        # Use Linux-specific runner and deployer
-        self.runner = LinuxFileRunner()
-        self.creator = FileCreator()
-        self.scanner = VirusScanner()
-        self.searcher = FileSearcher()
-        self.info = FileInfo()
-        self.helper = HelpDisplay()
-        self.ai_assistant = AIAssistant()
-        self.package_manager = PackageManager()
-        self.file_manager = FileManager()
-        self.deployer = LinuxDeployer()
-        self.converter = Converter()
-        self.p2pmsg = P2PMessenger()
-        self.sysinfo = SystemInfo()
+        self.profiler = None
+        self._handler_lock = threading.RLock()
         self.running = True
 
         self.commands = {
             'run': self.cmd_run,
+            'runstats': self.cmd_runstats,
             'create': self.cmd_create,
             'search': self.cmd_search,
+            'index': self.cmd_index,
             'scan': self.cmd_scan,
             'info': self.cmd_info,
             'help': self.cmd_help,
@@ -70,6 +92,8 @@ class RunITLinuxCLI:
             'preview': self.cmd_preview,
             'deploy': self.cmd_deploy,
             'stopdeploy': self.cmd_stopdeploy,
+            'deploystats': self.cmd_deploystats,
+            'bench': self.cmd_bench,
             'share': self.cmd_share,
             'setport': lambda args: self.deployer.set_port(int(args[0])) if args and args[0].isdigit() else print("❌ Please provide a valid port number (e.g. 'setport 8080')"),
             'convert': self.cmd_convert,
@@ -84,6 +108,39 @@ class RunITLinuxCLI:
 
         self._load_package_commands()
 
+    def __getattr__(self, name):
+        if name not in HANDLERS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return self._resolve_handler(name)
+
+    def _resolve_handler(self, name):
+        with self._handler_lock:
+            handler = self.__dict__.get(name)
+            if handler is None:
+                module_name, class_name = HANDLERS[name]
+                handler = getattr(importlib.import_module(module_name), class_name)()
+                setattr(self, name, handler)
+                if self.profiler:
+                    self.profiler.report(f"Loaded '{name}' ({module_name}.{class_name})")
+            return handler
+
+    def preload_handlers(self, names=None):
+        for name in names or HANDLERS:
+            try:
+                self._resolve_handler(name)
+            except Exception as e:
+                self.logger.warning(f"Could not preload '{name}': {e}")
+
+    def warm_caches(self, background=True):
+        if background:
+            # The runner is only imported on this thread, so startup stays as lazy as the command needs
+            threading.Thread(target=self.warm_caches, args=(False,), daemon=True).start()
+            return
+        try:
+            self.runner.interpreters.prewarm(self.runner.known_interpreters())
+        except Exception as e:
+            self.logger.warning(f"Interpreter cache warm-up failed: {e}")
+
     def _load_package_commands(self):
         installed_packages = self.package_manager.get_installed_packages()
         for package_name, package_info in installed_packages.items():
@@ -142,39 +199,210 @@ class RunITLinuxCLI:
             return None, []
 
     def cmd_run(self, args):
+        usage = ("Usage: run <filename> [--no-check] [--rebuild] [--warm] [--time]\n"
+                 "       run <file> <file> ... [--jobs N] [--fail-fast] [--output prefix|buffer] [--time]\n"
+                 "       run --build <dir> [--jobs N]\n"
+                 "       run --watch <file|dir> [--warm] [--time]")
         if not args:
             print("❌ Error: Please specify a filename to run")
-            print("Usage: run <filename>")
-            return
-        self.runner.run_file(args[0])
+            print(usage)
+            return False
+        parser = CommandArgParser('run')
+        parser.add_argument('filenames', nargs='*')
+        parser.add_argument('--no-check', action='store_true')
+        parser.add_argument('--rebuild', action='store_true')
+        parser.add_argument('--warm', action='store_true')
+        parser.add_argument('--time', dest='timed', action='store_true')
+        parser.add_argument('--build', metavar='DIR')
+        parser.add_argument('--watch', metavar='TARGET')
+        parser.add_argument('--jobs', type=int, metavar='N')
+        parser.add_argument('--fail-fast', action='store_true')
+        parser.add_argument('--keep-going', dest='fail_fast', action='store_false')
+        parser.add_argument('--output', choices=['prefix', 'buffer'], default='prefix')
+        try:
+            options = parser.parse_args(args)
+            if options.jobs is not None and options.jobs < 1:
+                raise ValueError("--jobs must be at least 1")
+            if sum(map(bool, (options.build, options.watch, options.filenames))) != 1:
+                raise ValueError("specify either filenames, --build <dir> or --watch <file|dir>")
+            if options.warm and (options.build or len(options.filenames) > 1 or options.jobs):
+                raise ValueError("--warm runs a single file (or --watch target) and cannot be used with "
+                                 "several files, --jobs or --build")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print(usage)
+            return False
+        if options.watch:
+            return self.runner.watch(options.watch, check=not options.no_check, rebuild=options.rebuild,
+                                     warm=options.warm, timed=options.timed, jobs=options.jobs)
+        if options.build:
+            return self.runner.run_project(options.build, jobs=options.jobs)
+        if len(options.filenames) > 1 or options.jobs:
+            return self.runner.run_many(options.filenames, jobs=options.jobs, fail_fast=options.fail_fast,
+                                        output_mode=options.output, check=not options.no_check,
+                                        rebuild=options.rebuild, timed=options.timed)
+        return self.runner.run_file(options.filenames[0], check=not options.no_check, rebuild=options.rebuild,
+                                    warm=options.warm, timed=options.timed)
+
+    def cmd_runstats(self, args):
+        if not args:
+            print("❌ Error: Please specify a file")
+            print("Usage: runstats <filename> [--last N]")
+            return False
+        parser = CommandArgParser('runstats')
+        parser.add_argument('filename')
+        parser.add_argument('--last', type=int, metavar='N')
+        try:
+            options = parser.parse_args(args)
+            if options.last is not None and options.last < 1:
+                raise ValueError("--last must be at least 1")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print("Usage: runstats <filename> [--last N]")
+            return False
+        return self.runner.stats.show(Path(options.filename).resolve(), last=options.last)
 
     def cmd_create(self, args):
         if len(args) < 2:
             print("❌ Error: Please specify language and filename")
             print("Usage: create <language> <filename>")
-            return
-        self.creator.create_file(args[0].lower(), args[1])
+            return False
+        return self.creator.create_file(args[0].lower(), args[1])
 
     def cmd_search(self, args):
+        usage = ("Usage: search <keyword> <filename|directory -r> [-j N] [-m/--max-count N] [-c/--count-only]\n"
+                 "              [-A N] [-B N] [-C N]\n"
+                 "       search -e PATTERN [-e PATTERN ...] [-f FILE] [--regex] <filename|directory -r> ...\n"
+                 "       search <keyword> <directory> --indexed ...\n"
+                 "       search [options] -- <-keyword> <filename>   (for keywords starting with '-')")
         if len(args) < 2:
             print("❌ Error: Please specify keyword and filename")
-            print("Usage: search <keyword> <filename>")
-            return
-        self.searcher.search_in_file(args[0], args[1])
+            print(usage)
+            return False
+        parser = CommandArgParser('search')
+        parser.add_argument('operands', nargs='*')
+        parser.add_argument('-e', '--pattern', action='append', dest='patterns', default=[], metavar='PATTERN')
+        parser.add_argument('-f', '--pattern-file', action='append', dest='pattern_files', default=[],
+                            metavar='FILE')
+        parser.add_argument('--regex', action='store_true')
+        parser.add_argument('-r', '--recursive', action='store_true')
+        parser.add_argument('--indexed', action='store_true')
+        parser.add_argument('-j', '--jobs', type=int, metavar='N')
+        parser.add_argument('-m', '--max-count', type=int, metavar='N')
+        parser.add_argument('-c', '--count-only', action='store_true')
+        parser.add_argument('-A', '--after-context', type=int, default=0, metavar='N')
+        parser.add_argument('-B', '--before-context', type=int, default=0, metavar='N')
+        parser.add_argument('-C', '--context', type=int, metavar='N')
+        try:
+            # Everything after `--` is an operand, even when it starts with '-'
+            rest = []
+            if '--' in args:
+                split = args.index('--')
+                args, rest = args[:split], args[split + 1:]
+            try:
+                # Options may come anywhere, e.g. `search foo -r dir`
+                options = parser.parse_intermixed_args(args)
+            except ValueError:
+                if rest or len(args) != 2 or not args[0].startswith('-'):
+                    raise
+                # The original two-word form: `search -keyword file`
+                options = parser.parse_intermixed_args([])
+                rest = args
+            options.operands += rest
+            patterns = list(options.patterns)
+            for pattern_file in options.pattern_files:
+                try:
+                    with open(pattern_file, 'r', encoding='utf-8') as f:
+                        patterns.extend(line for line in f.read().splitlines() if line)
+                except OSError as e:
+                    raise ValueError(f"cannot read pattern file {pattern_file}: {e.strerror}") from None
+            if options.patterns or options.pattern_files:
+                if len(options.operands) != 1:
+                    raise ValueError("with -e/-f give only the filename or directory")
+                if not patterns:
+                    raise ValueError("no patterns given")
+            elif len(options.operands) != 2:
+                raise ValueError("expected a keyword and a filename")
+            else:
+                patterns = [options.operands[0]]
+            path = options.operands[-1]
+            if not all(patterns):
+                raise ValueError("the keyword must not be empty")
+            patterns = list(dict.fromkeys(patterns))
+            if options.jobs is not None and options.jobs < 1:
+                raise ValueError("-j must be at least 1")
+            if options.max_count is not None and options.max_count < 1:
+                raise ValueError("--max-count must be at least 1")
+            if options.context is not None:
+                options.after_context = options.before_context = options.context
+            if min(options.after_context, options.before_context) < 0:
+                raise ValueError("context line counts must not be negative")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print(usage)
+            return False
+        if options.indexed:
+            return self.searcher.search_indexed(patterns, path, jobs=options.jobs, max_count=options.max_count,
+                                                count_only=options.count_only, before=options.before_context,
+                                                after=options.after_context, regex=options.regex)
+        if os.path.isdir(path):
+            if not options.recursive:
+                print(f"❌ Error: '{path}' is a directory (add -r to search it recursively)")
+                return False
+            return self.searcher.search_tree(patterns, path, jobs=options.jobs, max_count=options.max_count,
+                                             count_only=options.count_only, before=options.before_context,
+                                             after=options.after_context, regex=options.regex)
+        return self.searcher.search_in_file(patterns, path, max_count=options.max_count,
+                                            count_only=options.count_only, before=options.before_context,
+                                            after=options.after_context, regex=options.regex)
+
+    def cmd_index(self, args):
+        usage = "Usage: index build|update <directory> [-j N]"
+        parser = CommandArgParser('index')
+        parser.add_argument('action', choices=['build', 'update'])
+        parser.add_argument('directory')
+        parser.add_argument('-j', '--jobs', type=int, metavar='N')
+        try:
+            options = parser.parse_args(args)
+            if options.jobs is not None and options.jobs < 1:
+                raise ValueError("-j must be at least 1")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print(usage)
+            return False
+        if options.action == 'build':
+            return self.indexer.build(options.directory, jobs=options.jobs)
+        return self.indexer.update(options.directory, jobs=options.jobs)
 
     def cmd_scan(self, args):
+        usage = "Usage: scan <filename> [--rules FILE]"
         if not args:
             print("❌ Error: Please specify a filename to scan")
-            print("Usage: scan <filename>")
-            return
-        self.scanner.scan_file(args[0])
+            print(usage)
+            return False
+        parser = CommandArgParser('scan')
+        parser.add_argument('filename')
+        parser.add_argument('--rules', metavar='FILE')
+        try:
+            options = parser.parse_args(args)
+            rules = None
+            if options.rules:
+                try:
+                    rules = self.scanner.load_rules(options.rules)
+                except OSError as e:
+                    raise ValueError(f"cannot read rules file {options.rules}: {e.strerror}") from None
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print(usage)
+            return False
+        return self.scanner.scan_file(options.filename, rules=rules)
 
     def cmd_info(self, args):
         if not args:
             print("❌ Error: Please specify a filename")
             print("Usage: info <filename>")
-            return
-        self.info.show_file_info(args[0])
+            return False
+        return self.info.show_file_info(args[0])
 
     def cmd_help(self, args):
         if args and args[0] in self.commands:
@@ -189,7 +417,7 @@ class RunITLinuxCLI:
         if not args:
             print("❌ Error: Please provide a question or topic")
             print("Usage: runai <question>")
-            return
+            return False
         query = ' '.join(args)
         if query.startswith('file:'):
             filename = query[5:].strip()
@@ -199,18 +427,77 @@ class RunITLinuxCLI:
             self.ai_assistant.format_ai_response(response)
 
     def cmd_deploy(self, args):
+        usage = ("Usage: deploy <folder> [--cache-mb N] [--precompress] [--engine threaded|async] [--workers N]\n"
+                 "              [--access-log FILE] [--live] [--proxy PREFIX=URL[,timeout=SECONDS]]...")
         if not args:
             print("❌ Error: Please specify a folder to deploy")
-            print("Usage: deploy <folder>")
-            return
-        folder_path = args[0]
+            print(usage)
+            return False
+        parser = CommandArgParser('deploy')
+        parser.add_argument('folder')
+        parser.add_argument('--cache-mb', type=int, metavar='N')
+        parser.add_argument('--precompress', action='store_true')
+        parser.add_argument('--engine', choices=['threaded', 'async'], default='threaded')
+        parser.add_argument('--workers', type=int, default=1, metavar='N')
+        parser.add_argument('--access-log', metavar='FILE')
+        parser.add_argument('--live', action='store_true')
+        parser.add_argument('--proxy', action='append', metavar='PREFIX=URL')
+        try:
+            options = parser.parse_args(args)
+            if options.cache_mb is not None and options.cache_mb < 0:
+                raise ValueError("--cache-mb must not be negative")
+            if options.workers < 1:
+                raise ValueError("--workers must be at least 1")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print(usage)
+            return False
+        folder_path = options.folder
         if not os.path.isdir(folder_path):
             print(f"❌ Error: '{folder_path}' is not a valid directory")
-            return
-        self.deployer.deploy_site(folder_path)
+            return False
+        return self.deployer.deploy_site(folder_path, cache_mb=options.cache_mb,
+                                         precompress=options.precompress, engine=options.engine,
+                                         workers=options.workers, access_log=options.access_log,
+                                         live=options.live, proxy=options.proxy)
 
     def cmd_stopdeploy(self, args):
-        self.deployer.stop_deployment()
+        return self.deployer.stop_deployment()
+
+    def cmd_deploystats(self, args):
+        return self.deployer.show_stats()
+
+    def cmd_bench(self, args):
+        usage = "Usage: bench <url> [-c CONNECTIONS] [-d SECONDS | -n REQUESTS] [--no-keepalive] [--timeout SECONDS]"
+        if not args:
+            print("❌ Error: Please specify a URL to benchmark")
+            print(usage)
+            return False
+        parser = CommandArgParser('bench')
+        parser.add_argument('url')
+        parser.add_argument('-c', '--concurrency', type=int, default=10, metavar='CONNECTIONS')
+        limit = parser.add_mutually_exclusive_group()
+        limit.add_argument('-d', '--duration', type=float, metavar='SECONDS')
+        limit.add_argument('-n', '--requests', type=int, metavar='REQUESTS')
+        parser.add_argument('--no-keepalive', action='store_true')
+        parser.add_argument('--timeout', type=float, default=10.0, metavar='SECONDS')
+        try:
+            options = parser.parse_args(args)
+            if options.concurrency < 1:
+                raise ValueError("-c must be at least 1")
+            if options.duration is not None and options.duration <= 0:
+                raise ValueError("-d must be positive")
+            if options.requests is not None and options.requests < 1:
+                raise ValueError("-n must be at least 1")
+            if options.timeout <= 0:
+                raise ValueError("--timeout must be positive")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            print(usage)
+            return False
+        return self.bencher.run(options.url, concurrency=options.concurrency, duration=options.duration,
+                                requests=options.requests, keep_alive=not options.no_keepalive,
+                                timeout=options.timeout)
 
     def cmd_share(self, args):
         try:
@@ -233,42 +520,43 @@ class RunITLinuxCLI:
         if not args:
             print("❌ Please specify a package to install")
             print("Usage: install <package_name>")
-            return
+            return False
         package_name = args[0]
         if self.package_manager.install_package(package_name):
             print(f"✅ Successfully installed {package_name}")
         else:
             print(f"❌ Failed to install {package_name}. Check logs for details.")
+            return False
 
     def cmd_update(self, args):
         if not args:
             print("❌ Error: Please specify what to update")
             print("Usage: update <package_name@latest> or update RunIT@latest")
-            return
-        self.package_manager.update_package(args[0])
+            return False
+        return self.package_manager.update_package(args[0])
 
     def cmd_show(self, args):
         if not args:
             print("❌ Error: Please specify a file or directory to show")
             print("Usage: show <filename_or_directory>")
-            return
-        self.file_manager.show_file_structure(args[0])
+            return False
+        return self.file_manager.show_file_structure(args[0])
 
     def cmd_edit(self, args):
         if not args:
             print("❌ Error: Please specify a file to edit")
             print("Usage: edit <filename> [editor]")
-            return
+            return False
         filepath = args[0]
         editor = args[1] if len(args) > 1 else None
-        self.file_manager.edit_file(filepath, editor)
+        return self.file_manager.edit_file(filepath, editor)
 
     def cmd_go(self, args):
         if not args:
             print("❌ Error: Please specify a directory path")
             print("Usage: go <directory_path>")
-            return
-        self.file_manager.go_to_directory(args[0])
+            return False
+        return self.file_manager.go_to_directory(args[0])
 
     def cmd_version(self, args):
         version = self.package_manager.get_version()
@@ -284,12 +572,12 @@ class RunITLinuxCLI:
             for conversion, details in self.converter.get_supported_conversions().items():
                 source, target = details
                 print(f"  • {source} → {target}")
-            return
+            return False
         source_file = args[0]
         target_language = args[1].lower()
         if not os.path.exists(source_file):
             print(f"❌ Source file '{source_file}' not found")
-            return
+            return False
         converted_code = self.converter.convert_code(source_file, target_language)
         if converted_code:
             ext_map = {'python': 'py', 'javascript': 'js', 'markdown': 'md'}
@@ -301,8 +589,10 @@ class RunITLinuxCLI:
                 print(f"✅ Code converted successfully! Output saved to: {output_file}")
             except Exception as e:
                 print(f"❌ Error saving converted code: {str(e)}")
+                return False
         else:
             print("❌ Code conversion failed. Please check the supported conversions and try again.")
+            return False
 
     def cmd_test(self, args):
         print("🧪 Testing RunIT (Linux) functionality...")
@@ -319,7 +609,7 @@ class RunITLinuxCLI:
         if not args:
             print("❌ Error: Please specify an HTML file to preview")
             print("Usage: preview <filename.html>")
-            return
+            return False
         try:
             sys.path.insert(0, str(Path("packages/preview_RunIT")))
             import importlib.util
@@ -334,6 +624,7 @@ class RunITLinuxCLI:
             print("❌ Preview package not installed or not working")
             print("   Install it with: install preview_RunIT@latest")
             self.logger.error(f"Preview command failed: {e}")
+            return False
 
     def cmd_restart(self, args):
         self.logger.info("Restarting RunIT (Linux)...")
@@ -382,6 +673,7 @@ class RunITLinuxCLI:
         except Exception as e:
             self.logger.error(f"p2pmsg error: {e}")
             print(f"❌ p2pmsg error: {e}")
+            return False
 
     def cmd_adm(self, args):
         if not self.package_manager.is_package_installed("IDER_RunIT"):
@@ -417,6 +709,7 @@ class RunITLinuxCLI:
         except Exception as e:
             self.logger.error(f"cid error: {e}")
             print(f"❌ cid error: {e}")
+            return False
 
     def cmd_systeminfo(self, args):
         self.sysinfo.show()
@@ -424,13 +717,118 @@ class RunITLinuxCLI:
     def run_command(self, command, args):
         if command in self.commands:
             try:
-                self.commands[command](args)
+                return command_status(self.commands[command](args))
             except Exception as e:
                 self.logger.error(f"Error executing command '{command}': {e}")
                 print(f"❌ An error occurred while executing '{command}': {e}")
+                return STATUS_FAILED
         else:
             print(f"❌ Unknown command: '{command}'")
             print("Type 'help' to see available commands")
+            return STATUS_UNKNOWN
+
+    def split_commands(self, text):
+        """Split a line on unquoted ';' (and newlines) into individual commands."""
+        commands = []
+        current = []
+        quote = None
+        escaped = False
+        for ch in text:
+            if escaped:
+                escaped = False
+            elif ch == '\\' and quote != "'":
+                escaped = True
+            elif quote:
+                if ch == quote:
+                    quote = None
+            elif ch in ('"', "'"):
+                quote = ch
+            elif ch in ';\n':
+                commands.append(''.join(current).strip())
+                current = []
+                continue
+            current.append(ch)
+        commands.append(''.join(current).strip())
+        return [c for c in commands if c and not c.startswith('#')]
+
+    def _run_batch_line(self, index, line, status_stream):
+        failed = STATUS_OK
+        for text in self.split_commands(line):
+            if not self.running:
+                break
+            command, args = self.parse_command(text)
+            started = time.perf_counter()
+            if command:
+                status = self.run_command(command, args)
+            else:
+                print(f"❌ Could not parse command: {text}")
+                status = STATUS_FAILED
+            record = {
+                'line': index,
+                'command': text,
+                'status': status,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            }
+            status_stream.write(json.dumps(record) + '\n')
+            status_stream.flush()
+            if status != STATUS_OK and failed == STATUS_OK:
+                failed = status
+        return failed
+
+    def run_batch(self, lines, jobs=1, status_stream=None):
+        """Run commands without the banner or prompt and return a process exit code.
+
+        Every command reports one JSON line (line, command, status, duration_ms)
+        on ``status_stream``. With ``jobs`` > 1 the lines run concurrently; the
+        commands inside one line always run in order.
+        """
+        status_stream = status_stream or sys.stderr
+        lines = [(i, line) for i, line in enumerate(lines, 1) if self.split_commands(line)]
+        if jobs > 1 and len(lines) > 1:
+            for index, line in lines:
+                for text in self.split_commands(line):
+                    command, _ = self.parse_command(text)
+                    if command in CWD_COMMANDS:
+                        print(f"❌ '{command}' (line {index}) changes the working directory of every job "
+                              f"and cannot be used with --jobs")
+                        return STATUS_FAILED
+        statuses = []
+        if jobs <= 1 or len(lines) <= 1:
+            for index, line in lines:
+                statuses.append(self._run_batch_line(index, line, status_stream))
+                if not self.running:
+                    break
+        else:
+            import io
+            from concurrent.futures import ThreadPoolExecutor
+            from utils.output import redirect_thread_stdout
+            status_lock = threading.Lock()
+
+            class _LockedStream:
+                def write(self, data):
+                    with status_lock:
+                        status_stream.write(data)
+
+                def flush(self):
+                    with status_lock:
+                        status_stream.flush()
+
+            def run_line(index, line):
+                buffer = io.StringIO()
+                with redirect_thread_stdout(buffer):
+                    status = self._run_batch_line(index, line, _LockedStream())
+                return status, buffer.getvalue()
+
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(run_line, index, line) for index, line in lines]
+                # Output is replayed in input order so logs stay deterministic
+                for future in futures:
+                    status, output = future.result()
+                    sys.stdout.write(output)
+                    sys.stdout.flush()
+                    statuses.append(status)
+        self.logger.info(f"RunIT batch finished: {len(statuses)} lines")
+        return next((s for s in statuses if s != STATUS_OK), STATUS_OK)
 
     def run(self):
         self.display_banner()
@@ -455,10 +853,57 @@ class RunITLinuxCLI:
                 print(f"❌ An unexpected error occurred: {e}")
 
 
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog='runit', description='RunIT - Smart Terminal Assistant (Linux Edition)')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='print per-module import times at startup and when a command subsystem loads')
+    parser.add_argument('-c', dest='command_lines', action='append', metavar='COMMANDS',
+                        help="run ';'-separated commands without the prompt (may be repeated)")
+    parser.add_argument('--script', metavar='FILE',
+                        help="run commands from FILE, one line per entry ('-' reads stdin)")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='run up to N independent lines concurrently in -c/--script mode')
+    parser.add_argument('--daemon', action='store_true',
+                        help='keep a warm RunIT in memory and serve commands on a Unix socket')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Unix socket path for --daemon (default: $XDG_RUNTIME_DIR/runit.sock)')
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help='number of daemon worker processes (default: CPU count, max 8)')
+    return parser
+
+
+def read_script(path):
+    if path == '-':
+        return sys.stdin.read().splitlines()
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
 def main():
+    parser = build_arg_parser()
+    options = parser.parse_args()
+    if options.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    lines = []
+    for text in options.command_lines or []:
+        lines.extend(text.splitlines())
+    if options.script:
+        try:
+            lines.extend(read_script(options.script))
+        except OSError as e:
+            parser.error(f"cannot read script: {e}")
     cli = RunITLinuxCLI()
+    if STARTUP_PROFILER:
+        STARTUP_PROFILER.report()
+        cli.profiler = STARTUP_PROFILER
+    if options.daemon:
+        from runit_daemon import RunITDaemon
+        sys.exit(RunITDaemon(cli, options.socket, options.workers).serve_forever())
+    if options.command_lines is not None or options.script:
+        sys.exit(cli.run_batch(lines, jobs=options.jobs))
+    cli.warm_caches()
     cli.run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
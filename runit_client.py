@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Thin client for the RunIT daemon: forwards one command line and relays its output.
+
+Usage: runit_client.py [--socket PATH] <command> [args...]
+"""
+import os
+import sys
+import shlex
+import socket
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from utils.ipc import check_peer, default_socket_path, send_message, MessageReader
+
+EXIT_NO_DAEMON = 69
+
+
+def forward(line: str, socket_path: str | None = None) -> int:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        socket_path = socket_path or default_socket_path()
+        sock.connect(socket_path)
+        # The request carries our cwd and command line; only hand them to our own daemon
+        check_peer(sock)
+    except OSError as e:
+        sock.close()
+        print(f"❌ Cannot reach RunIT daemon at {socket_path or 'its default socket'}: {e}", file=sys.stderr)
+        print("   Start it with: runit --daemon", file=sys.stderr)
+        return EXIT_NO_DAEMON
+    try:
+        send_message(sock, {'line': line, 'cwd': os.getcwd()})
+        for message in MessageReader(sock):
+            if message.get('type') == 'output':
+                stream = sys.stderr if message.get('stream') == 'stderr' else sys.stdout
+                stream.write(message.get('data', ''))
+                stream.flush()
+            elif message.get('type') == 'result':
+                if message.get('error'):
+                    print(f"❌ {message['error']}", file=sys.stderr)
+                return int(message.get('status', 1))
+        print("❌ RunIT daemon closed the connection", file=sys.stderr)
+        return 1
+    finally:
+        sock.close()
+
+
+def main():
+    args = sys.argv[1:]
+    socket_path = None
+    if len(args) >= 2 and args[0] == '--socket':
+        socket_path = args[1]
+        args = args[2:]
+    if not args:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        sys.exit(2)
+    line = args[0] if len(args) == 1 else shlex.join(args)
+    sys.exit(forward(line, socket_path))
+
+
+if __name__ == "__main__":
+    main()
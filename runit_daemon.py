@@ -0,0 +1,299 @@
+import io
+import os
+import sys
+import time
+import codecs
+import errno
+import signal
+import socket
+import threading
+
+from utils.ipc import default_socket_path, send_message, MessageReader
+from utils.logger import Logger
+
+# Deployment state lives in whichever process ran `deploy`, so these always run in the state worker
+STATE_COMMANDS = {'deploy', 'stopdeploy', 'deploystats', 'share', 'setport'}
+
+
+class _DaemonStop(Exception):
+    pass
+
+
+class _OutputPump:
+    """Forwards everything written to one of the worker's fds to the client."""
+
+    def __init__(self, conn, send_lock, fd: int, stream: str):
+        self.conn = conn
+        self.send_lock = send_lock
+        self.fd = fd
+        self.stream = stream
+        self.closed = False
+        self.saved_fd = os.dup(fd)
+        read_fd, write_fd = os.pipe()
+        os.dup2(write_fd, fd)
+        os.close(write_fd)
+        self.read_fd = read_fd
+        self.thread = threading.Thread(target=self._pump, daemon=True)
+        self.thread.start()
+
+    def _pump(self):
+        # Incremental, so a character split across two reads is not replaced
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            while True:
+                data = os.read(self.read_fd, 65536)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    self._send(text)
+                if not data:
+                    break
+        except OSError:
+            pass
+        finally:
+            os.close(self.read_fd)
+
+    def _send(self, text: str):
+        with self.send_lock:
+            if not self.closed:
+                send_message(self.conn, {'type': 'output', 'stream': self.stream, 'data': text})
+
+    def finish(self, linger: float = 0.5):
+        # Restoring the fd closes our write end; a background grandchild that
+        # still holds the pipe only gets `linger` seconds before it is dropped.
+        os.dup2(self.saved_fd, self.fd)
+        os.close(self.saved_fd)
+        self.thread.join(linger)
+        with self.send_lock:
+            self.closed = True
+
+
+class RunITDaemon:
+    """Keeps a warm RunITLinuxCLI and serves commands over a Unix socket.
+
+    The CLI is built (and its handlers preloaded) once in the supervisor,
+    which then forks ``workers`` processes that share the listening socket.
+    Each worker serves one connection at a time, so per-session state such as
+    the working directory that ``go`` changes never leaks between clients.
+    Deployments are the exception: they must outlive the connection that
+    started them, so one extra state worker runs every command in
+    STATE_COMMANDS, reached by the other workers over a private socket.
+    """
+
+    def __init__(self, cli, socket_path: str | None = None, workers: int | None = None):
+        self.cli = cli
+        self.logger = Logger()
+        self.socket_path = socket_path
+        self.state_socket_path = None
+        self.workers = max(1, workers or min(os.cpu_count() or 1, 8))
+        self.listener = None
+        self.state_listener = None
+        self.is_state_worker = False
+        self.children = {}
+        self.stopping = False
+        self.base_dir = os.getcwd()
+
+    def _bind(self) -> bool:
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                print(f"❌ A RunIT daemon is already listening on {self.socket_path}")
+                return False
+            except OSError:
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+        try:
+            os.unlink(self.state_socket_path)
+        except FileNotFoundError:
+            pass
+        self.listener = self._listen(self.socket_path, 128)
+        self.state_listener = self._listen(self.state_socket_path, 16)
+        return True
+
+    @staticmethod
+    def _listen(path: str, backlog: int):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(backlog)
+        return listener
+
+    def serve_forever(self) -> int:
+        try:
+            self.socket_path = self.socket_path or default_socket_path()
+        except OSError as e:
+            print(f"❌ Cannot create the daemon socket: {e}")
+            return 1
+        self.state_socket_path = f"{os.path.splitext(self.socket_path)[0]}-state.sock"
+        self.cli.preload_handlers()
+        self.cli.warm_caches(background=False)
+        if not self._bind():
+            return 1
+        print(f"✨ RunIT daemon listening on {self.socket_path} ({self.workers} workers)")
+        sys.stdout.flush()
+        self.logger.info(f"RunIT daemon started on {self.socket_path}")
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        try:
+            self._spawn_worker(state=True)
+            for _ in range(self.workers):
+                self._spawn_worker()
+            self._supervise()
+        except _DaemonStop:
+            pass
+        finally:
+            self._shutdown()
+        return 0
+
+    def _handle_stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        raise _DaemonStop()
+
+    def _spawn_worker(self, state: bool = False):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.is_state_worker = state
+                self._worker_main(self.state_listener if state else self.listener)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = (time.monotonic(), state)
+
+    def _supervise(self):
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                if self.stopping:
+                    break
+                self._spawn_worker()
+                continue
+            child = self.children.pop(pid, None)
+            if child is None or self.stopping:
+                continue
+            started, state = child
+            print(f"⚠️  Daemon {'state ' if state else ''}worker {pid} exited (status {status}); restarting")
+            sys.stdout.flush()
+            if time.monotonic() - started < 1.0:
+                # Avoid a hot restart loop when workers die immediately
+                time.sleep(1.0)
+            self._spawn_worker(state)
+
+    def _shutdown(self):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.children.clear()
+        for listener, path in ((self.listener, self.socket_path), (self.state_listener, self.state_socket_path)):
+            if listener:
+                listener.close()
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        print("✅ RunIT daemon stopped")
+        self.logger.info("RunIT daemon stopped")
+
+    def _worker_main(self, listener):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        sys.stdin = io.StringIO('')
+        sys.stdout.reconfigure(line_buffering=True)
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            try:
+                self._serve_connection(conn)
+            except Exception as e:
+                self.logger.error(f"Daemon session error: {e}")
+            finally:
+                conn.close()
+
+    def _serve_connection(self, conn):
+        send_lock = threading.Lock()
+        session_cwd = self.base_dir
+        for request in MessageReader(conn):
+            cwd = request.get('cwd') or session_cwd
+            try:
+                os.chdir(cwd)
+            except OSError as e:
+                with send_lock:
+                    send_message(conn, {'type': 'result', 'status': 2, 'error': f"bad cwd: {e}", 'cwd': session_cwd})
+                continue
+            status = self._run_request(conn, send_lock, request)
+            session_cwd = os.getcwd()
+            with send_lock:
+                send_message(conn, {'type': 'result', 'status': status, 'cwd': session_cwd})
+
+    def _run_request(self, conn, send_lock, request: dict) -> int:
+        if 'command' in request:
+            commands = [(str(request['command']).lower(), [str(a) for a in request.get('args', [])])]
+        else:
+            commands = [self.cli.parse_command(text) for text in self.cli.split_commands(str(request.get('line', '')))]
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pumps = [_OutputPump(conn, send_lock, 1, 'stdout'), _OutputPump(conn, send_lock, 2, 'stderr')]
+        failed = 0
+        try:
+            for command, args in commands:
+                if not command:
+                    print("❌ Could not parse command")
+                    status = 1
+                elif command in STATE_COMMANDS and not self.is_state_worker:
+                    sys.stdout.flush()
+                    status = self._forward(conn, send_lock, command, args)
+                else:
+                    status = self.cli.run_command(command, args)
+                if status and not failed:
+                    failed = status
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            for pump in pumps:
+                pump.finish()
+            self.cli.running = True
+        return failed
+
+    def _forward(self, conn, send_lock, command: str, args: list) -> int:
+        """Run a command in the state worker and relay its output to our client."""
+        state = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            state.connect(self.state_socket_path)
+            send_message(state, {'command': command, 'args': args, 'cwd': os.getcwd()})
+            for message in MessageReader(state):
+                if message.get('type') == 'result':
+                    return int(message.get('status', 1))
+                with send_lock:
+                    send_message(conn, message)
+        except (OSError, ValueError) as e:
+            print(f"❌ Deployment worker unavailable: {e}")
+            return 1
+        finally:
+            state.close()
+        print("❌ Deployment worker closed the connection")
+        return 1
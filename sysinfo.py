@@ -3,10 +3,14 @@ import os
 import socket
 import subprocess
 
-try:
-    import psutil
-except Exception:
-    psutil = None
+
+def _load_psutil():
+    # psutil is optional and slow to import, so only pull it in for 'systeminfo'
+    try:
+        import psutil
+    except Exception:
+        psutil = None
+    return psutil
 
 
 class SystemInfo:
@@ -44,6 +48,7 @@ class SystemInfo:
         print(f"Hostname: {socket.gethostname()}")
         cpu = platform.processor() or platform.machine()
         print(f"CPU: {cpu}")
+        psutil = _load_psutil()
         if psutil:
             print(f"CPU Cores: {psutil.cpu_count(logical=True)}")
             vm = psutil.virtual_memory()
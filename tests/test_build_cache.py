@@ -0,0 +1,109 @@
+import os
+import time
+
+from utils.build_cache import BUILDING_SECONDS, BuildCache, STALE_SECONDS, parse_depfile
+
+
+def _build(cache, name='prog', data=b'x' * 10):
+    build_dir = cache.temp_dir()
+    (build_dir / name).write_bytes(data)
+    return build_dir
+
+
+def test_key_depends_on_source_compiler_and_flags(tmp_path):
+    cache = BuildCache(tmp_path / 'cache', max_bytes=1 << 20)
+    source = tmp_path / 'a.c'
+    source.write_text('int main(){}')
+    key = cache.key(source, 'gcc|13', ['-O2'], kind='gcc')
+    assert key == cache.key(source, 'gcc|13', ['-O2'], kind='gcc')
+    assert key != cache.key(source, 'gcc|14', ['-O2'], kind='gcc')
+    assert key != cache.key(source, 'gcc|13', ['-O3'], kind='gcc')
+    assert key != cache.key(source, 'gcc|13', ['-O', '2'], kind='gcc')
+    source.write_text('int main(){return 1;}')
+    assert key != cache.key(source, 'gcc|13', ['-O2'], kind='gcc')
+
+
+def test_store_then_lookup(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=1 << 20)
+    artifact = cache.store('ab' * 32, _build(cache))
+    assert (artifact / 'prog').read_bytes() == b'x' * 10
+    assert cache.lookup('ab' * 32) == artifact
+    assert cache.lookup('cd' * 32) is None
+
+
+def test_changed_dependency_is_a_miss(tmp_path):
+    cache = BuildCache(tmp_path / 'cache', max_bytes=1 << 20)
+    header = tmp_path / 'a.h'
+    header.write_text('#define A 1\n')
+    cache.store('ab' * 32, _build(cache), deps=[header])
+    assert cache.lookup('ab' * 32) is not None
+    header.write_text('#define A 22\n')
+    assert cache.lookup('ab' * 32) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=25)
+    first = cache.store('aa' * 32, _build(cache))
+    os.utime(first, (1, 1))
+    second = cache.store('bb' * 32, _build(cache))
+    assert first.exists() and second.exists()
+    third = cache.store('cc' * 32, _build(cache))
+    assert not first.exists()
+    assert cache.lookup('aa' * 32) is None
+    assert second.exists() and third.exists()
+
+
+def test_oversized_build_is_not_cached_but_still_runnable(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=0)
+    artifact = cache.store('ab' * 32, _build(cache))
+    assert (artifact / 'prog').exists()
+    assert cache.lookup('ab' * 32) is None
+    assert cache.entries() == []
+
+
+def test_stored_entry_is_never_evicted(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=15)
+    cache.store('aa' * 32, _build(cache))
+    artifact = cache.store('bb' * 32, _build(cache, data=b'y' * 12))
+    assert (artifact / 'prog').exists()
+    assert cache.lookup('bb' * 32) == artifact
+
+
+def test_rebuild_keeps_previous_build_until_stale(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=1 << 20)
+    old = cache.store('ab' * 32, _build(cache, data=b'old'))
+    new = cache.store('ab' * 32, _build(cache, data=b'new'))
+    assert old != new
+    assert (old / 'prog').read_bytes() == b'old'
+    assert cache.lookup('ab' * 32) == new
+    stale = time.time() - STALE_SECONDS - 60
+    os.utime(old, (stale, stale))
+    cache.evict()
+    assert not old.exists()
+    assert (new / 'prog').read_bytes() == b'new'
+
+
+def test_parse_depfile(tmp_path):
+    depfile = tmp_path / 'deps.d'
+    depfile.write_text('main: main.c util.h \\\n  my\\ dir/x.h\n')
+    assert parse_depfile(depfile) == ['main.c', 'util.h', 'my dir/x.h']
+    assert parse_depfile(tmp_path / 'missing.d') == []
+
+
+def test_replaced_builds_count_toward_the_limit(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=25)
+    builds = [cache.store('ab' * 32, _build(cache, data=b'z' * 10)) for _ in range(3)]
+    assert not builds[0].exists()
+    assert builds[1].exists() and builds[2].exists()
+    assert cache.lookup('ab' * 32) == builds[2]
+
+
+def test_uncached_builds_count_toward_the_limit(tmp_path):
+    cache = BuildCache(tmp_path, max_bytes=15)
+    first = cache.store('aa' * 32, _build(cache, data=b'x' * 20))
+    old = time.time() - BUILDING_SECONDS - 60
+    os.utime(first, (old, old))
+    in_progress = _build(cache, data=b'y' * 20)
+    second = cache.store('bb' * 32, _build(cache, data=b'x' * 20))
+    assert not first.exists()
+    assert second.exists() and in_progress.exists()
@@ -0,0 +1,35 @@
+import os
+
+from utils.build_cache import file_digest
+from utils.precompress import PrecompressedAssets, _compress
+
+
+def test_compress_drops_files_edited_after_hashing(tmp_path):
+    source = tmp_path / 'a.html'
+    source.write_text('x' * 2000)
+    digest = file_digest(source)
+    dest, size = _compress((str(source), 'gzip', str(tmp_path / 'a.gz'), digest))
+    assert size and os.path.exists(dest)
+    source.write_text('y' * 2000)
+    assert _compress((str(source), 'gzip', str(tmp_path / 'b.gz'), digest)) == (str(tmp_path / 'b.gz'), None)
+    assert not (tmp_path / 'b.gz').exists()
+    assert _compress((str(tmp_path / 'gone.html'), 'gzip', str(tmp_path / 'c.gz'), digest))[1] is None
+
+
+def test_lookup_follows_client_q_values(tmp_path):
+    site = tmp_path / 'site'
+    site.mkdir()
+    page = site / 'index.html'
+    page.write_text('hello world ' * 500)
+    assets = PrecompressedAssets(str(site), variant_root=tmp_path / 'variants', encodings=['gzip'])
+    summary = assets.build(jobs=1)
+    assert summary['compressed'] == 1
+    st = os.stat(page)
+    assert assets.lookup(str(page), st, 'gzip')[0] == 'gzip'
+    assert assets.lookup(str(page), st, 'br, gzip;q=0.5')[0] == 'gzip'
+    assert assets.lookup(str(page), st, '*, gzip;q=0') is None
+    assert assets.lookup(str(page), st, 'identity') is None
+    assets.encodings = ['zstd', 'gzip']
+    assets.variants[str(page)]['encodings']['zstd'] = ('/variant.zst', 10)
+    assert assets.lookup(str(page), st, 'zstd;q=0.5, gzip')[0] == 'gzip'
+    assert assets.lookup(str(page), st, 'gzip, zstd')[0] == 'zstd'
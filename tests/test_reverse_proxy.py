@@ -0,0 +1,53 @@
+import email.parser
+import http.client
+
+import pytest
+
+from utils.reverse_proxy import forward_headers, parse_proxy_spec, request_framing
+
+
+def _headers(*lines):
+    block = ''.join(f'{line}\r\n' for line in lines) + '\r\n'
+    return email.parser.BytesParser(_class=http.client.HTTPMessage).parsebytes(block.encode('latin-1'))
+
+
+@pytest.mark.parametrize('lines, expected', [
+    ((), (False, None)),
+    (('Content-Length: 12',), (False, 12)),
+    (('Content-Length: 3', 'Content-Length: 3'), (False, 3)),
+    (('Content-Length: 3, 3',), (False, 3)),
+    (('Transfer-Encoding: chunked',), (True, None)),
+    (('Transfer-Encoding: Chunked',), (True, None)),
+])
+def test_request_framing(lines, expected):
+    assert request_framing(_headers(*lines)) == expected
+
+
+@pytest.mark.parametrize('lines', [
+    ('Content-Length: 3', 'Content-Length: 30'),
+    ('Content-Length: 3, 4',),
+    ('Content-Length: -1',),
+    ('Content-Length: abc',),
+    ('Transfer-Encoding: chunked', 'Content-Length: 4'),
+    ('Transfer-Encoding: gzip, chunked',),
+    ('Transfer-Encoding: chunked', 'Transfer-Encoding: chunked'),
+    ('Transfer-Encoding: identity',),
+])
+def test_request_framing_rejects_ambiguous_bodies(lines):
+    with pytest.raises(ValueError):
+        request_framing(_headers(*lines))
+
+
+def test_forward_headers_sets_its_own_content_length():
+    route = parse_proxy_spec('/api=http://127.0.0.1:5000')
+    headers = _headers('Host: example.com', 'Content-Length: 3', 'Content-Length: 3',
+                       'Connection: keep-alive, Content-Length, Host, X-Secret', 'X-Secret: 1', 'Accept: */*')
+    forwarded = forward_headers(headers, '10.0.0.1', route, 3)
+    names = [name.lower() for name, _ in forwarded]
+    assert names.count('content-length') == 1
+    assert ('Content-Length', '3') in forwarded
+    assert ('Host', 'example.com') in forwarded
+    assert 'x-secret' not in names and 'connection' not in names
+    assert ('Accept', '*/*') in forwarded
+    assert ('X-Forwarded-For', '10.0.0.1') in forwarded
+    assert 'content-length' not in [n.lower() for n, _ in forward_headers(headers, '10.0.0.1', route)]
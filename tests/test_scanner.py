@@ -0,0 +1,44 @@
+import io
+import random
+
+import pytest
+
+from commands.scanner import VirusScanner, iter_hits
+
+
+def reference(data: bytes, signatures: tuple) -> list:
+    hits = []
+    for index, signature in enumerate(signatures):
+        start = data.find(signature)
+        while start != -1:
+            hits.append((start, data.count(b'\n', 0, start) + 1, index))
+            start = data.find(signature, start + 1)
+    return sorted(hits)
+
+
+def test_hits_with_offsets_and_lines():
+    data = b'import os\nos.system("ls")\neval(x); eval(y)\n'
+    hits = list(iter_hits(io.BytesIO(data), (b'eval(', b'os.system')))
+    assert hits == [(10, 2, 1), (26, 3, 0), (35, 3, 0)]
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 2, 3, 5, 7, 64])
+def test_signature_split_across_chunks_is_found_once(chunk_bytes):
+    data = b'xxeval(\n' * 5 + b'abcabcab\nabcab'
+    signatures = (b'eval(', b'abcab', b'cab', b'x')
+    assert sorted(iter_hits(io.BytesIO(data), signatures, chunk_bytes)) == reference(data, signatures)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_matches_reference(seed):
+    rng = random.Random(seed)
+    data = bytes(rng.choice(b'ab\nc') for _ in range(rng.randint(0, 400)))
+    signatures = tuple(sorted({bytes(rng.choice(b'abc\n') for _ in range(rng.randint(1, 6))) for _ in range(4)}))
+    chunk_bytes = rng.randint(1, 50)
+    assert sorted(iter_hits(io.BytesIO(data), signatures, chunk_bytes)) == reference(data, signatures)
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / 'rules.txt'
+    path.write_text('# comment\n\nshell = os.system\ndecode = base64.b64decode(  \n')
+    assert VirusScanner.load_rules(str(path)) == {'shell': 'os.system', 'decode': 'base64.b64decode('}
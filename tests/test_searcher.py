@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from commands.searcher import MMAP_MIN_BYTES, count_matching_lines, open_buffer, scan_buffer
+from utils.pattern_set import compile_patterns
+
+
+def reference(text: bytes, needle: bytes, max_count=None, before=0, after=0):
+    """grep-style result built the slow, obvious way, for comparison with scan_buffer."""
+    lines = text.split(b'\n')
+    if text.endswith(b'\n'):
+        lines.pop()
+    matched = [needle in line for line in lines]
+    count, records, printed, i = 0, [], 0, 0
+    while i < len(lines) and (max_count is None or count < max_count):
+        if not matched[i]:
+            i += 1
+            continue
+        count += 1
+        context = list(range(max(printed + 1, i + 1 - before), i + 1))
+        if (before or after) and records and (context[0] if context else i + 1) > printed + 1:
+            records.append(None)
+        records += [(n, False, lines[n - 1]) for n in context]
+        records.append((i + 1, True, lines[i]))
+        printed = i = i + 1
+        for _ in range(after):
+            if i >= len(lines) or matched[i]:
+                break
+            records.append((i + 1, False, lines[i]))
+            printed = i = i + 1
+    return count, records
+
+
+def _scan(text, needle, **options):
+    count, records = scan_buffer(text, compile_patterns((needle.decode(),)), **options)
+    return count, [r if r is None else (r[0], r[1] is not None, r[2]) for r in records]
+
+
+def test_plain_search():
+    text = b'alpha\nbeta\nalphabet\ngamma'
+    assert _scan(text, b'alpha') == (2, [(1, True, b'alpha'), (3, True, b'alphabet')])
+    assert _scan(text, b'delta') == (0, [])
+
+
+def test_context_and_separators():
+    text = b'\n'.join(b'hit' if n in (3, 4, 10) else b'line %d' % n for n in range(1, 13))
+    count, records = _scan(text, b'hit', before=1, after=1)
+    assert count == 3
+    assert records == [(2, False, b'line 2'), (3, True, b'hit'), (4, True, b'hit'), (5, False, b'line 5'),
+                       None, (9, False, b'line 9'), (10, True, b'hit'), (11, False, b'line 11')]
+
+
+def test_max_count_stops_early():
+    text = b'x1\ny\nx2\nx3\n'
+    assert _scan(text, b'x', max_count=2) == (2, [(1, True, b'x1'), (3, True, b'x2')])
+    assert _scan(text, b'x', max_count=2, count_only=True) == (2, [])
+
+
+def test_multiple_hits_on_one_line_count_once():
+    assert _scan(b'aaa\nbab\n', b'a', count_only=True)[0] == 2
+    assert _scan(b'aaa\nbab\n', b'a')[0] == 2
+
+
+@pytest.mark.parametrize('pattern', ['$', '^', 'a*'])
+def test_empty_matches_stop_at_the_end(pattern):
+    patterns = compile_patterns((pattern,), True)
+    assert scan_buffer(b'ab\nc', patterns)[0] == 2
+    assert scan_buffer(b'ab\nc\n', patterns)[0] == 2
+    assert scan_buffer(b'ab\n\nc\n', patterns, after=1)[0] == 3
+    assert scan_buffer(b'', patterns) == (0, [])
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_reference(seed):
+    rng = random.Random(seed)
+    lines = [rng.choice([b'', b'ab', b'xabx', b'zz', b'abab', b'q']) for _ in range(rng.randint(0, 60))]
+    text = b'\n'.join(lines) + rng.choice([b'', b'\n'])
+    options = {'max_count': rng.choice([None, 1, 3, 10]), 'before': rng.randint(0, 3), 'after': rng.randint(0, 3)}
+    assert _scan(text, b'ab', **options) == reference(text, b'ab', **options)
+    assert _scan(text, b'ab', count_only=True)[0] == reference(text, b'ab')[0]
+
+
+def test_count_matching_lines_dense_and_sparse():
+    rng = random.Random(7)
+    lines = [rng.choice([b'needle', b'hay', b'needle needle', b'']) for _ in range(5000)]
+    lines += [b'hay'] * 3000 + [b'needle']
+    text = b'\n'.join(lines)
+    expected = sum(b'needle' in line for line in lines)
+    assert count_matching_lines(text, b'needle') == expected
+    assert count_matching_lines(text + b'\n', b'needle') == expected
+    assert count_matching_lines(b'', b'needle') == 0
+
+
+def test_large_files_are_mapped(tmp_path):
+    path = tmp_path / 'big.txt'
+    line = b'some filler text\n'
+    path.write_bytes(line * (MMAP_MIN_BYTES // len(line)) + b'the end marker\n' + line * 10)
+    with open_buffer(str(path)) as buf:
+        assert not isinstance(buf, bytes)
+        count, records = _scan(buf, b'marker', before=1)
+        assert count == 1
+        line_no = MMAP_MIN_BYTES // len(line) + 1
+        assert records == [(line_no - 1, False, b'some filler text'), (line_no, True, b'the end marker')]
+        assert count_matching_lines(buf, b'filler') == MMAP_MIN_BYTES // len(line) + 10
@@ -0,0 +1,91 @@
+import pytest
+
+from utils.static_files import MAX_RANGES, StaticFiles, parse_range
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-4', [(0, 4)]),
+    ('bytes=5-', [(5, 9)]),
+    ('bytes=-3', [(7, 9)]),
+    ('bytes=-30', [(0, 9)]),
+    ('bytes=8-100', [(8, 9)]),
+    ('BYTES = 1-2', [(1, 2)]),
+    ('bytes=6-7, 0-1', [(0, 1), (6, 7)]),
+    ('bytes=0-3,2-5', [(0, 5)]),
+    ('bytes=0-1,2-3', [(0, 3)]),
+    ('bytes=10-20', []),
+    ('bytes=-0', []),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+@pytest.mark.parametrize('header', [
+    None, '', 'items=0-1', 'bytes=', 'bytes=-', 'bytes=3', 'bytes=5-2', 'bytes=a-b', 'bytes=0-1,x',
+    'bytes=' + ','.join(f'{i}-{i}' for i in range(0, 2 * (MAX_RANGES + 1), 2)),
+])
+def test_parse_range_ignores_invalid_headers(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'data.txt').write_bytes(b'0123456789')
+    files = StaticFiles(str(tmp_path))
+    yield files, str(tmp_path / 'data.txt')
+    files.close()
+
+
+def _body(response):
+    if response.file is None:
+        return response.body
+    out = b''
+    for part in response.parts:
+        if isinstance(part, bytes):
+            out += part
+        else:
+            response.file.seek(part[0])
+            out += response.file.read(part[1])
+    response.close()
+    return out
+
+
+def test_single_range_response(site):
+    files, path = site
+    response = files.file_response(path, {'Range': 'bytes=2-4'})
+    headers = dict(response.headers)
+    assert response.status == 206
+    assert headers['Content-Range'] == 'bytes 2-4/10'
+    assert headers['Content-Length'] == '3'
+    assert _body(response) == b'234'
+
+
+def test_multiple_ranges_are_multipart(site):
+    files, path = site
+    response = files.file_response(path, {'Range': 'bytes=0-0,-2'})
+    content_type = dict(response.headers)['Content-Type']
+    assert response.status == 206
+    assert content_type.startswith('multipart/byteranges; boundary=')
+    body = _body(response)
+    assert b'Content-Range: bytes 0-0/10\r\n\r\n0\r\n' in body
+    assert b'Content-Range: bytes 8-9/10\r\n\r\n89\r\n' in body
+    assert body.endswith(f"--{content_type.split('=')[1]}--\r\n".encode())
+    assert int(dict(response.headers)['Content-Length']) == len(body)
+
+
+def test_unsatisfiable_range(site):
+    files, path = site
+    response = files.file_response(path, {'Range': 'bytes=20-30'})
+    assert response.status == 416
+    assert dict(response.headers)['Content-Range'] == 'bytes */10'
+
+
+def test_if_range_mismatch_sends_whole_file(site):
+    files, path = site
+    response = files.file_response(path, {'Range': 'bytes=2-4', 'If-Range': '"stale"'})
+    assert response.status == 200
+    assert _body(response) == b'0123456789'
+    etag = dict(response.headers)['ETag']
+    response = files.file_response(path, {'Range': 'bytes=2-4', 'If-Range': etag})
+    assert response.status == 206
+    assert _body(response) == b'234'
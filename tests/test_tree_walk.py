@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from utils.tree_walk import GitIgnore, iter_files, parse_gitignore
+
+
+def _matches(pattern: str, path: str, is_dir: bool = False) -> bool:
+    ignore = GitIgnore(tuple(('/r', regex, negated, dir_only) for regex, negated, dir_only in parse_gitignore(pattern)))
+    return ignore.ignored('/r/' + path, is_dir)
+
+
+@pytest.mark.parametrize('pattern, path, expected', [
+    ('*.log', 'a.log', True),
+    ('*.log', 'deep/dir/a.log', True),
+    ('*.log', 'a.logx', False),
+    ('/build', 'build', True),
+    ('/build', 'build/out.o', True),
+    ('/build', 'src/build', False),
+    ('doc/*.txt', 'doc/a.txt', True),
+    ('doc/*.txt', 'doc/sub/a.txt', False),
+    ('doc/*.txt', 'x/doc/a.txt', False),
+    ('**/foo', 'foo', True),
+    ('**/foo', 'a/b/foo', True),
+    ('a/**/b', 'a/b', True),
+    ('a/**/b', 'a/x/y/b', True),
+    ('a/**/b', 'x/a/b', False),
+    ('abc/**', 'abc/x/y', True),
+    ('abc/**', 'abc', False),
+    ('?.py', 'a.py', True),
+    ('?.py', 'ab.py', False),
+    ('[!a]b', 'cb', True),
+    ('[!a]b', 'ab', False),
+    ('[a-c].txt', 'b.txt', True),
+    ('[a-c].txt', 'd.txt', False),
+    ('\\#notes', '#notes', True),
+    ('\\!bang', '!bang', True),
+    ('# comment', '# comment', False),
+    ('name   ', 'name', True),
+    ('a+b(c)', 'a+b(c)', True),
+])
+def test_translate(pattern, path, expected):
+    assert _matches(pattern, path) is expected
+
+
+def test_directory_only_patterns():
+    assert _matches('logs/', 'logs', is_dir=True)
+    assert not _matches('logs/', 'logs', is_dir=False)
+
+
+def test_last_matching_rule_wins():
+    rules = '*.log\n!keep.log\n'
+    assert _matches(rules, 'a.log')
+    assert not _matches(rules, 'keep.log')
+    assert _matches(rules + 'keep.log\n', 'keep.log')
+
+
+def test_rules_only_apply_below_their_directory():
+    ignore = GitIgnore(tuple(('/r/sub', regex, negated, dir_only)
+                             for regex, negated, dir_only in parse_gitignore('*.tmp')))
+    assert ignore.ignored('/r/sub/x.tmp', False)
+    assert not ignore.ignored('/r/x.tmp', False)
+    assert not ignore.ignored('/r/subway/x.tmp', False)
+
+
+def _tree(root, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def test_iter_files_applies_nested_and_enclosing_rules(tmp_path):
+    (tmp_path / '.git' / 'info').mkdir(parents=True)
+    _tree(tmp_path, {
+        '.git/info/exclude': 'secret.txt\n',
+        '.gitignore': '*.log\n',
+        'project/.gitignore': '/out/\n!important.log\n',
+        'project/a.py': 'a',
+        'project/debug.log': 'x',
+        'project/important.log': 'x',
+        'project/secret.txt': 'x',
+        'project/out/gen.py': 'x',
+        'project/lib/out/keep.py': 'x',
+        'project/lib/b.py': 'b',
+        'project/node_modules/m.js': 'x',
+    })
+    found = [os.path.relpath(path, tmp_path / 'project') for path, _ in iter_files(str(tmp_path / 'project'))]
+    assert found == ['.gitignore', 'a.py', 'important.log', 'lib/b.py', 'lib/out/keep.py']
+
+
+def test_iter_files_without_gitignore(tmp_path):
+    _tree(tmp_path, {'.gitignore': '*.log\n', 'a.log': 'xy', 'b/c.txt': 'z'})
+    found = {os.path.relpath(path, tmp_path): size for path, size in iter_files(str(tmp_path), use_gitignore=False)}
+    assert found == {'.gitignore': 6, 'a.log': 2, 'b/c.txt': 1}
+
+
+@pytest.mark.parametrize('marker', ['dir', 'file'])
+def test_nested_repository_ignores_outer_rules(tmp_path, marker):
+    (tmp_path / '.git').mkdir()
+    _tree(tmp_path, {'.gitignore': '*\n', 'proj/src/main.py': 'x', 'proj/.gitignore': '*.log\n', 'proj/a.log': 'x'})
+    if marker == 'dir':
+        (tmp_path / 'proj' / '.git').mkdir()
+    else:
+        (tmp_path / 'proj' / '.git').write_text('gitdir: ../.git/modules/proj\n')
+    root = tmp_path / 'proj'
+    found = [os.path.relpath(path, root) for path, _ in iter_files(str(root))]
+    assert found == ['.gitignore', 'src/main.py']
+    assert [os.path.relpath(p, root) for p, _ in iter_files(str(root / 'src'))] == ['src/main.py']
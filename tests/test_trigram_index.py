@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from commands.indexer import CodeIndexer, _merge
+from commands.searcher import FileSearcher
+from utils.trigram_index import (TrigramIndex, decode_postings, encode_postings, regex_literals, trigrams,
+                                 write_index)
+
+
+def test_trigrams():
+    assert trigrams(b'ab') == set()
+    assert trigrams(b'abcab') == {0x616263, 0x626361, 0x636162}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_postings_round_trip(seed):
+    rng = random.Random(seed)
+    ids = sorted(rng.sample(range(1 << 20), rng.randint(0, 200)))
+    assert decode_postings(encode_postings(ids)) == ids
+
+
+def test_postings_append_after_previous():
+    head, tail = [0, 5, 130], [131, 20000, 20001]
+    data = encode_postings(head) + encode_postings(tail, head[-1])
+    assert decode_postings(data) == head + tail
+    # Small deltas take one byte each, larger ones continue into more
+    assert len(encode_postings([0, 1, 2])) == 3
+    assert len(encode_postings([200])) == 2
+
+
+def test_regex_literals():
+    assert regex_literals(rb'def \w+_handler\(') == [b'def ', b'_handler(']
+    assert regex_literals(rb'(?i)abc') == []
+    assert regex_literals(rb'[') == []
+
+
+def _write(path, postings: dict, next_id: int = 10):
+    entries = ((gram, encode_postings(ids), ids[-1]) for gram, ids in sorted(postings.items()))
+    write_index(path, '/root', next_id, [['a.txt', 1, 1, 0, 0]], entries)
+    return TrigramIndex(path)
+
+
+def test_write_and_query(tmp_path):
+    abc, bcd, xyz = sorted(trigrams(b'abc') | trigrams(b'bcd') | trigrams(b'xyz'))
+    index = _write(tmp_path / 'i.bin', {abc: [0, 1, 2], bcd: [1, 2, 3], xyz: [4]})
+    try:
+        assert index.files == [['a.txt', 1, 1, 0, 0]]
+        assert index.postings(bcd) == [1, 2, 3]
+        assert index.postings(0) == []
+        assert index.postings(0xFFFFFF) == []
+        assert index.candidates([[b'abcd']]) == {1, 2}
+        assert index.candidates([[b'abcd'], [b'xyz']]) == {1, 2, 4}
+        assert index.candidates([[b'abc', b'zzz']]) == set()
+        assert index.candidates([[b'ab']]) is None
+    finally:
+        index.close()
+
+
+def test_merge_appends_and_inserts_in_order(tmp_path):
+    old = _write(tmp_path / 'old.bin', {10: [0, 3], 30: [1]})
+    try:
+        merged = [(gram, decode_postings(data), last)
+                  for gram, data, last in _merge(old, {5: [7], 10: [8, 9], 40: [8]})]
+    finally:
+        old.close()
+    assert merged == [(5, [7], 7), (10, [0, 3, 8, 9], 9), (30, [1], 1), (40, [8], 8)]
+    assert [(gram, decode_postings(data)) for gram, data, _ in _merge(None, {2: [1]})] == [(2, [1])]
+
+
+def test_indexed_search_sees_new_and_changed_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    root = tmp_path / 'tree'
+    root.mkdir()
+    (root / 'a.txt').write_text('needle here\n')
+    (root / 'b.txt').write_text('nothing\n')
+    CodeIndexer().build(str(root), jobs=1)
+    (root / 'b.txt').write_text('a needle too\n')
+    (root / 'c.txt').write_text('new needle\n')
+    capsys.readouterr()
+    assert FileSearcher().search_indexed(['needle'], str(root), jobs=1)
+    out = capsys.readouterr().out
+    assert '2 files are new or changed' in out
+    for name in ('a.txt', 'b.txt', 'c.txt'):
+        assert name in out
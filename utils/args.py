@@ -0,0 +1,16 @@
+import argparse
+
+
+class CommandArgParser(argparse.ArgumentParser):
+    """argparse for REPL commands: bad input raises ValueError instead of exiting."""
+
+    def __init__(self, prog: str, **kwargs):
+        kwargs.setdefault('add_help', False)
+        kwargs.setdefault('allow_abbrev', False)
+        super().__init__(prog=prog, **kwargs)
+
+    def error(self, message):
+        raise ValueError(message)
+
+    def exit(self, status=0, message=None):
+        raise ValueError(message or f"{self.prog} exited with status {status}")
@@ -0,0 +1,389 @@
+import time
+import socket
+import asyncio
+import threading
+import email.utils
+import email.parser
+import http.client
+from http import HTTPStatus
+
+from utils.file_cache import HotFileCache
+from utils.static_files import StaticFiles, FileResponse
+from utils.live_reload import PING_SECONDS
+from utils.reverse_proxy import (CHUNK, AsyncUpstreamPool, ReverseProxy, aiter_chunked, encode_chunk,
+                                 forward_headers, read_response_head, request_framing, response_headers)
+
+MAX_HEADER_BYTES = 64 * 1024
+# Slowest body transfer we tolerate before treating the client as stalled
+MIN_SEND_RATE = 64 * 1024
+
+
+class AsyncStaticServer:
+    """asyncio HTTP/1.1 engine for the deploy server.
+
+    One event loop thread serves every connection. Connections are
+    persistent and pipelined requests are answered in order; at most
+    ``max_connections`` are served at once, and connections beyond that are
+    accepted but not read from until a slot frees up. Path resolution,
+    stat, open and small-file reads run on the default executor so a slow
+    disk never stalls the loop. Clients that are slow to send headers, idle
+    too long between requests or stop reading a response are disconnected.
+    """
+
+    def __init__(self, address, site_root: str, file_cache: HotFileCache | None = None, assets=None,
+                 max_connections: int = 10000, header_timeout: float = 10.0, idle_timeout: float = 30.0,
+                 write_timeout: float = 30.0, backlog: int = 1024, reuse_port: bool = False, metrics=None,
+                 live=None, proxy: list | None = None):
+        self.files = StaticFiles(site_root, file_cache, assets, metrics, live)
+        self.proxy = ReverseProxy(proxy, AsyncUpstreamPool) if proxy else None
+        self.site_root = self.files.site_root
+        self.max_connections = max_connections
+        self.header_timeout = header_timeout
+        self.idle_timeout = idle_timeout
+        self.write_timeout = write_timeout
+        self.backlog = backlog
+        # Bind here so a busy port is reported by the constructor, as with StaticServer
+        # An explicit IPPROTO_TCP lets asyncio set TCP_NODELAY on accepted connections
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        try:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reuse_port:
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            self.socket.bind(address)
+            self.socket.listen(backlog)
+        except OSError:
+            self.socket.close()
+            raise
+        self.socket.setblocking(False)
+        self.loop = None
+        self._thread = None
+        self._stopping = None
+        self._ready = threading.Event()
+        self._connections = {}
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self._run, name='runit-deploy-async', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self._thread
+
+    def serve_forever(self):
+        """Run the event loop in the calling thread until stop() is called."""
+        self._run()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_connections)
+        server = await asyncio.start_server(self._handle, sock=self.socket, backlog=self.backlog,
+                                            limit=MAX_HEADER_BYTES)
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+            server.close()
+            # Dropping the transports wakes every handler with EOF
+            for task, writer in list(self._connections.items()):
+                writer.transport.abort()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=5)
+            if self.proxy is not None:
+                self.proxy.close()
+
+    def stop(self):
+        if self.loop is not None and self._thread is not None and self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join()
+        self.socket.close()
+        self.files.close()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        metrics = self.files.metrics
+        if metrics is not None:
+            metrics.connection_opened()
+        try:
+            async with self._slots:
+                await self._serve_connection(reader, writer)
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            if metrics is not None:
+                metrics.connection_closed()
+            writer.close()
+
+    async def _serve_connection(self, reader, writer):
+        timeout = self.header_timeout
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+            except asyncio.LimitOverrunError:
+                await self._send_error(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                return
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                return
+            request_line, _, header_block = head.partition(b'\r\n')
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+                headers = email.parser.BytesParser(_class=http.client.HTTPMessage).parsebytes(header_block)
+            except ValueError:
+                await self._send_error(writer, HTTPStatus.BAD_REQUEST)
+                return
+            if version not in ('HTTP/1.0', 'HTTP/1.1'):
+                await self._send_error(writer, HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+                return
+            connection = headers.get('Connection', '').lower()
+            keep_alive = 'keep-alive' in connection if version == 'HTTP/1.0' else 'close' not in connection
+            pool = self.proxy.match(target) if self.proxy is not None else None
+            if pool is not None:
+                started = time.perf_counter()
+                status, sent, keep_alive = await self._proxy(pool, method, target, version, headers, reader,
+                                                             writer, keep_alive)
+            else:
+                try:
+                    chunked, length = request_framing(headers)
+                    if chunked or (length or 0) > MAX_HEADER_BYTES:
+                        raise ValueError("request body too large")
+                except ValueError:
+                    await self._send_error(writer, HTTPStatus.BAD_REQUEST)
+                    return
+                if length:
+                    await asyncio.wait_for(reader.readexactly(length), self.header_timeout)
+                started = time.perf_counter()
+                if method not in ('GET', 'HEAD'):
+                    response = self._error_response(HTTPStatus.METHOD_NOT_ALLOWED, [('Allow', 'GET, HEAD')])
+                else:
+                    # stat/open/read (up to the hot-file limit) and directory listings block
+                    response = await asyncio.to_thread(self._respond, target, headers)
+                status = response.status
+                if method in ('GET', 'HEAD') and self.files.is_live(target):
+                    keep_alive = False
+                    sent = await self._stream_events(reader, writer, response, head_only=method == 'HEAD')
+                else:
+                    sent = await self._send(writer, response, keep_alive, head_only=method == 'HEAD')
+            if self.files.metrics is not None:
+                self.files.metrics.observe(self._peer(writer), request_line.decode('latin-1'), target, int(status), sent,
+                                           time.perf_counter() - started)
+            if not keep_alive:
+                return
+            timeout = self.idle_timeout
+
+    def _respond(self, target: str, headers) -> FileResponse:
+        kind, path = self.files.resolve(target)
+        if kind == 'metrics':
+            return self.files.metrics_response()
+        if kind == 'live':
+            return self.files.live_response()
+        if kind == 'redirect':
+            return FileResponse(HTTPStatus.MOVED_PERMANENTLY, [('Location', path)])
+        if kind == 'directory':
+            body = self.files.listing(path, target)
+            return FileResponse(HTTPStatus.OK, [('Content-Type', 'text/html; charset=utf-8')], body=body)
+        response = self.files.file_response(path, headers) if kind == 'file' else None
+        return response or self._error_response(HTTPStatus.NOT_FOUND)
+
+    async def _proxy(self, pool, method: str, target: str, version: str, headers, reader, writer,
+                     keep_alive: bool):
+        """Forward one request upstream and stream the answer back; return (status, bytes, keep_alive)."""
+        route = pool.route
+        try:
+            chunked, length = request_framing(headers)
+        except ValueError:
+            # Ambiguous framing is how requests get smuggled past a proxy, so refuse it
+            await self._send_error(writer, HTTPStatus.BAD_REQUEST)
+            return HTTPStatus.BAD_REQUEST, 0, False
+        has_body = chunked or bool(length)
+        if has_body and headers.get('Expect', '').lower() == '100-continue' and version == 'HTTP/1.1':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+        lines = [f"{method} {route.upstream_target(target)} HTTP/1.1"]
+        lines += [f"{name}: {value}" for name, value in forward_headers(headers, self._peer(writer), route, length)]
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        for attempt in (0, 1):
+            upstream = None
+            try:
+                upstream, reused = await pool.acquire()
+                up_reader, up_writer = upstream
+                up_writer.write(head)
+                if chunked:
+                    async for data in aiter_chunked(reader, self.header_timeout):
+                        up_writer.write(encode_chunk(data))
+                        await asyncio.wait_for(up_writer.drain(), route.timeout)
+                    up_writer.write(b'0\r\n\r\n')
+                elif has_body:
+                    remaining = length
+                    while remaining:
+                        data = await asyncio.wait_for(reader.read(min(remaining, CHUNK)), self.header_timeout)
+                        if not data:
+                            raise asyncio.IncompleteReadError(b'', remaining)
+                        up_writer.write(data)
+                        remaining -= len(data)
+                        await asyncio.wait_for(up_writer.drain(), route.timeout)
+                await asyncio.wait_for(up_writer.drain(), route.timeout)
+                up_version, status, reason, up_headers = await read_response_head(up_reader, route.timeout)
+                break
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError) as e:
+                if upstream is not None:
+                    upstream[1].close()
+                    if reused and not has_body and attempt == 0 and not isinstance(e, asyncio.TimeoutError):
+                        # The pooled connection went stale; nothing was consumed, so try a fresh one
+                        continue
+                status = (HTTPStatus.GATEWAY_TIMEOUT if isinstance(e, asyncio.TimeoutError)
+                          else HTTPStatus.BAD_GATEWAY)
+                await self._send_error(writer, status)
+                return status, 0, False
+        no_body = method == 'HEAD' or status in (204, 304)
+        up_length = up_headers.get('Content-Length')
+        up_chunked = 'chunked' in up_headers.get('Transfer-Encoding', '').lower()
+        reusable = (up_version == 'HTTP/1.1' and 'close' not in up_headers.get('Connection', '').lower()
+                    and (no_body or up_chunked or up_length is not None))
+        out_headers = response_headers(up_headers.items())
+        chunk_out = False
+        if not no_body and up_length is None:
+            if version == 'HTTP/1.1':
+                out_headers.append(('Transfer-Encoding', 'chunked'))
+                chunk_out = True
+            else:
+                keep_alive = False
+        if not keep_alive:
+            out_headers.append(('Connection', 'close'))
+        lines = [f"HTTP/1.1 {status} {reason}"] + [f"{name}: {value}" for name, value in out_headers]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        sent = 0
+        finished = False
+        try:
+            if not no_body:
+                if up_chunked:
+                    body = aiter_chunked(up_reader, route.timeout)
+                else:
+                    body = self._read_body(up_reader, None if up_length is None else int(up_length), route.timeout)
+                async for data in body:
+                    writer.write(encode_chunk(data) if chunk_out else data)
+                    sent += len(data)
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+                if chunk_out:
+                    writer.write(b'0\r\n\r\n')
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+            finished = True
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            keep_alive = False
+        finally:
+            if reusable and finished:
+                pool.release(upstream)
+            else:
+                up_writer.close()
+        return status, sent, keep_alive
+
+    @staticmethod
+    async def _read_body(reader, length: int | None, timeout: float):
+        """Yield ``length`` bytes from ``reader``, or everything up to EOF when length is None."""
+        remaining = length
+        while remaining is None or remaining > 0:
+            data = await asyncio.wait_for(reader.read(CHUNK if remaining is None else min(remaining, CHUNK)), timeout)
+            if not data:
+                if remaining is not None:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                return
+            if remaining is not None:
+                remaining -= len(data)
+            yield data
+
+    @staticmethod
+    def _peer(writer) -> str:
+        return (writer.get_extra_info('peername') or ('-',))[0]
+
+    async def _stream_events(self, reader, writer, response: FileResponse, head_only: bool = False) -> int:
+        """Send live-reload events until the client leaves or the server stops."""
+        status = HTTPStatus(response.status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {email.utils.formatdate(usegmt=True)}",
+                 "Server: RunIT"] + [f"{name}: {value}" for name, value in response.headers]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if head_only:
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+            return 0
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def listener(event):
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, event)
+            except RuntimeError:
+                pass  # the loop is already closed
+
+        live = self.files.live
+        live.subscribe(listener)
+        # Clients never send anything more, so a finished read means they hung up
+        hangup = asyncio.ensure_future(reader.read(1))
+        sent = 0
+        try:
+            event = b'retry: 1000\n\n'
+            while event is not None:
+                writer.write(event)
+                sent += len(event)
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+                pending = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({pending, hangup}, timeout=PING_SECONDS,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if hangup in done:
+                    pending.cancel()
+                    break
+                if pending in done:
+                    event = pending.result()
+                else:
+                    pending.cancel()
+                    event = b': ping\n\n'
+        finally:
+            live.unsubscribe(listener)
+            if hangup.done() and not hangup.cancelled():
+                hangup.exception()
+            hangup.cancel()
+        return sent
+
+    @staticmethod
+    def _error_response(status: HTTPStatus, extra: list | None = None) -> FileResponse:
+        body = f"<html><body><h1>{status.value} {status.phrase}</h1></body></html>\n".encode('ascii')
+        return FileResponse(status, [('Content-Type', 'text/html; charset=utf-8')] + (extra or []), body=body)
+
+    async def _send_error(self, writer, status: HTTPStatus, keep_alive: bool = False, extra: list | None = None):
+        await self._send(writer, self._error_response(status, extra), keep_alive)
+
+    async def _send(self, writer, response: FileResponse, keep_alive: bool, head_only: bool = False) -> int:
+        """Write the response; return the number of body bytes sent."""
+        status = HTTPStatus(response.status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+                 f"Date: {email.utils.formatdate(usegmt=True)}", "Server: RunIT"]
+        lines += [f"{name}: {value}" for name, value in response.headers]
+        if status != HTTPStatus.NOT_MODIFIED and not any(n == 'Content-Length' for n, _ in response.headers):
+            lines.append(f"Content-Length: {response.length}")
+        if not keep_alive:
+            lines.append("Connection: close")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        sent = 0 if head_only or status == HTTPStatus.NOT_MODIFIED else response.length
+        try:
+            if sent and response.file is None:
+                writer.write(response.body)
+            elif sent:
+                loop = asyncio.get_running_loop()
+                for part in response.parts:
+                    if isinstance(part, bytes):
+                        writer.write(part)
+                        continue
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+                    # loop.sendfile waits for the transport to flush and uses
+                    # os.sendfile when it can, so large bodies never sit in our buffers
+                    offset, length = part
+                    await asyncio.wait_for(loop.sendfile(writer.transport, response.file, offset, length),
+                                           self.write_timeout + length / MIN_SEND_RATE)
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        finally:
+            response.close()
+        return sent
@@ -0,0 +1,237 @@
+import os
+import json
+import shutil
+import hashlib
+import time
+import tempfile
+from pathlib import Path
+
+MANIFEST = 'manifest.json'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Unreferenced build directories younger than this are only removed to stay within the size limit
+STALE_SECONDS = 24 * 60 * 60
+# Temp build directories younger than this may belong to a compile still running elsewhere
+BUILDING_SECONDS = 10 * 60
+
+
+def default_cache_root() -> Path:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'runit' / 'builds'
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_depfile(path: Path) -> list:
+    """Return the prerequisites listed in a make-style ``-MMD`` depfile."""
+    try:
+        text = Path(path).read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return []
+    deps = []
+    for rule in text.replace('\\\n', ' ').splitlines():
+        if ':' not in rule:
+            continue
+        _, prereqs = rule.split(':', 1)
+        token = ''
+        escaped = False
+        for ch in prereqs + ' ':
+            if escaped:
+                token += ch
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch.isspace():
+                if token:
+                    deps.append(token)
+                token = ''
+            else:
+                token += ch
+    return deps
+
+
+class BuildCache:
+    """Content-addressed store for compiled artifacts with LRU size eviction.
+
+    Each entry is a symlink named after the build key (a hash of the source,
+    compiler identity and flags) pointing at a hidden build directory. Its
+    manifest lists the headers the build depended on so a changed header is a
+    miss even when the key matches. A rebuild swaps the symlink atomically, so
+    a program still running from the previous build keeps its files, as long
+    as the cache stays within its size limit.
+    """
+
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None):
+        self.root = Path(root) if root else default_cache_root()
+        if max_bytes is None:
+            try:
+                max_bytes = int(os.environ.get('RUNIT_BUILD_CACHE_MB', '')) * 1024 * 1024
+            except ValueError:
+                max_bytes = DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+
+    def key(self, source: Path, compiler_id: str, flags: list, kind: str = '') -> str:
+        h = hashlib.sha256()
+        for part in (kind, compiler_id, '\0'.join(flags), file_digest(source)):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _read_manifest(self, entry: Path):
+        try:
+            with open(entry / MANIFEST, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _deps_unchanged(self, deps: dict) -> bool:
+        for dep, recorded in deps.items():
+            try:
+                st = os.stat(dep)
+            except OSError:
+                return False
+            if st.st_size == recorded['size'] and st.st_mtime_ns == recorded['mtime_ns']:
+                continue
+            if st.st_size != recorded['size'] or file_digest(Path(dep)) != recorded['sha256']:
+                return False
+        return True
+
+    def lookup(self, key: str):
+        entry = self._entry_dir(key)
+        manifest = self._read_manifest(entry)
+        if manifest is None or not self._deps_unchanged(manifest.get('deps', {})):
+            return None
+        target = entry.resolve()
+        try:
+            os.utime(target)
+        except OSError:
+            pass
+        return target
+
+    def temp_dir(self) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix='.build-', dir=self.root))
+
+    def store(self, key: str, build_dir: Path, deps=None, extra=None) -> Path:
+        """Move a finished build into the cache and return the directory to run it from.
+
+        A build larger than the whole cache is not cached: its temporary
+        directory is returned as-is and swept up later by evict().
+        """
+        build_dir = Path(build_dir)
+        recorded = {}
+        for dep in deps or []:
+            try:
+                st = os.stat(dep)
+                recorded[str(Path(dep).resolve())] = {
+                    'size': st.st_size,
+                    'mtime_ns': st.st_mtime_ns,
+                    'sha256': file_digest(Path(dep)),
+                }
+            except OSError:
+                continue
+        size = sum(f.stat().st_size for f in build_dir.rglob('*') if f.is_file())
+        if size > self.max_bytes:
+            self.evict(keep=build_dir)
+            return build_dir
+        manifest = {'key': key, 'size': size, 'deps': recorded}
+        manifest.update(extra or {})
+        with open(build_dir / MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        entry = self._entry_dir(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        target = entry.parent / f".{key}{build_dir.name}"
+        link = entry.parent / f"{target.name}.link"
+        try:
+            os.rename(build_dir, target)
+            os.symlink(target.name, link)
+            os.replace(link, entry)
+        except OSError:
+            if not target.exists():
+                # Could not move the build into the cache; run it from where it is
+                self.evict(keep=build_dir)
+                return build_dir
+            link.unlink(missing_ok=True)
+        self.evict(keep=target)
+        return target
+
+    def entries(self) -> list:
+        found = []
+        if not self.root.exists():
+            return found
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or shard.name.startswith('.'):
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.'):
+                    continue
+                manifest = self._read_manifest(Path(entry.path))
+                if manifest is None:
+                    continue
+                found.append((entry.stat().st_mtime, manifest.get('size', 0), Path(entry.path)))
+        return found
+
+    def _unreferenced(self, referenced: set) -> list:
+        """(mtime, size, path) of build directories no entry points at: replaced builds and temp dirs."""
+        dirs = []
+        if not self.root.exists():
+            return dirs
+        for shard in os.scandir(self.root):
+            if shard.name.startswith('.build-'):
+                dirs.append(shard)
+            elif shard.is_dir() and not shard.name.startswith('.'):
+                dirs.extend(e for e in os.scandir(shard.path)
+                            if e.name.startswith('.') and not e.name.endswith('.link'))
+        found = []
+        for path in (Path(d.path).resolve() for d in dirs):
+            if path in referenced:
+                continue
+            manifest = self._read_manifest(path)
+            try:
+                if manifest is not None:
+                    size = manifest.get('size', 0)
+                else:
+                    size = sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+                found.append((path.stat().st_mtime, size, path))
+            except OSError:
+                continue
+        return found
+
+    def evict(self, keep: Path | None = None):
+        """Trim the cache down to max_bytes, never touching ``keep``.
+
+        Replaced and uncached builds count toward the limit and go first,
+        since lookups can no longer reach them; then entries are dropped
+        least-recently-used first.
+        """
+        keep = Path(keep).resolve() if keep else None
+        entries = self.entries()
+        unreferenced = self._unreferenced({path.resolve() for _, _, path in entries})
+        total = sum(size for _, size, _ in entries) + sum(size for _, size, _ in unreferenced)
+        now = time.time()
+        for mtime, size, path in sorted(unreferenced):
+            if path == keep:
+                continue
+            if mtime >= now - STALE_SECONDS:
+                # A young temp dir may be a compile still in progress in another process
+                if total <= self.max_bytes or (path.name.startswith('.build-') and mtime >= now - BUILDING_SECONDS):
+                    continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            target = path.resolve()
+            if target == keep:
+                continue
+            path.unlink(missing_ok=True)
+            shutil.rmtree(target, ignore_errors=True)
+            total -= size
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import queue
+import threading
+
+METRICS_PATH = '/__runit/metrics'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_PREFIXES = 64
+
+
+def path_prefix(target: str) -> str:
+    path = target.split('?', 1)[0].split('#', 1)[0]
+    first = path.lstrip('/').split('/', 1)[0]
+    return '/' + first if first and '/' in path.lstrip('/') else '/'
+
+
+def empty_snapshot() -> dict:
+    return {'requests': {}, 'bytes_sent': 0, 'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+            'latency_sum': 0.0, 'latency_count': 0, 'connections_open': 0, 'connections_total': 0,
+            'cache_hits': 0, 'cache_misses': 0, 'started': time.time(), 'processes': 1}
+
+
+def merge_snapshots(snapshots: list) -> dict:
+    total = empty_snapshot()
+    total['processes'] = 0
+    for snap in snapshots:
+        for key, count in snap['requests'].items():
+            total['requests'][key] = total['requests'].get(key, 0) + count
+        total['latency_buckets'] = [a + b for a, b in zip(total['latency_buckets'], snap['latency_buckets'])]
+        for field in ('bytes_sent', 'latency_sum', 'latency_count', 'connections_open', 'connections_total',
+                      'cache_hits', 'cache_misses', 'processes'):
+            total[field] += snap[field]
+        total['started'] = min(total['started'], snap['started'])
+    return total
+
+
+def read_snapshots(directory: str, exclude_pid: int | None = None) -> list:
+    snapshots = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return snapshots
+    for name in names:
+        if not name.endswith('.json') or name == f"{exclude_pid}.json":
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def latency_quantile(snapshot: dict, q: float):
+    """Upper bound of the histogram bucket that holds the q-quantile."""
+    count = snapshot['latency_count']
+    if not count:
+        return None
+    rank = q * count
+    seen = 0
+    for bound, bucket in zip(LATENCY_BUCKETS + (float('inf'),), snapshot['latency_buckets']):
+        seen += bucket
+        if seen >= rank:
+            return bound
+    return float('inf')
+
+
+class AccessLog:
+    """Access log written by a background thread so requests never wait on disk."""
+
+    def __init__(self, path: str, batch: int = 256):
+        self.path = path
+        self.batch = batch
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=65536)
+        # One O_APPEND write per batch keeps lines from several workers intact
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._thread = threading.Thread(target=self._write_loop, name='runit-access-log', daemon=True)
+        self._thread.start()
+
+    def log(self, entry: tuple):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def _format(entry: tuple) -> str:
+        when, client, request_line, status, nbytes, seconds = entry
+        stamp = time.strftime('%d/%b/%Y:%H:%M:%S %z', time.localtime(when))
+        return f'{client} - - [{stamp}] "{request_line}" {status} {nbytes} {seconds * 1000:.2f}ms\n'
+
+    def _write_loop(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            lines = [self._format(entry)]
+            stop = False
+            while len(lines) < self.batch:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                lines.append(self._format(entry))
+            try:
+                os.write(self._fd, ''.join(lines).encode('utf-8', 'replace'))
+            except OSError:
+                self.dropped += len(lines)
+            if stop:
+                break
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        os.close(self._fd)
+
+
+class DeployMetrics:
+    """Request counters and latency histogram for one deploy server process.
+
+    With ``snapshot_dir`` set (worker mode) the process publishes its
+    counters to ``<snapshot_dir>/<pid>.json`` every second, and
+    ``aggregate`` folds in what the other workers published.
+    """
+
+    def __init__(self, file_cache=None, access_log: AccessLog | None = None, snapshot_dir: str | None = None):
+        self.file_cache = file_cache
+        self.access_log = access_log
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._data = empty_snapshot()
+        if snapshot_dir:
+            threading.Thread(target=self._publish_loop, name='runit-deploy-metrics', daemon=True).start()
+
+    def connection_opened(self):
+        with self._lock:
+            self._data['connections_open'] += 1
+            self._data['connections_total'] += 1
+
+    def connection_closed(self):
+        with self._lock:
+            self._data['connections_open'] -= 1
+
+    def observe(self, client: str, request_line: str, target: str, status: int, nbytes: int, seconds: float):
+        key = f"{status} {path_prefix(target)}"
+        bucket = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                bucket = i
+                break
+        data = self._data
+        with self._lock:
+            requests = data['requests']
+            if key not in requests and len(requests) >= MAX_PREFIXES:
+                key = f"{status} other"
+            requests[key] = requests.get(key, 0) + 1
+            data['bytes_sent'] += nbytes
+            data['latency_buckets'][bucket] += 1
+            data['latency_sum'] += seconds
+            data['latency_count'] += 1
+        if self.access_log is not None:
+            self.access_log.log((time.time(), client, request_line, status, nbytes, seconds))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snap = json.loads(json.dumps(self._data))
+        if self.file_cache is not None:
+            snap['cache_hits'] = self.file_cache.hits
+            snap['cache_misses'] = self.file_cache.misses
+        return snap
+
+    def aggregate(self) -> dict:
+        snapshots = [self.snapshot()]
+        if self.snapshot_dir:
+            snapshots += read_snapshots(self.snapshot_dir, exclude_pid=os.getpid())
+        return merge_snapshots(snapshots)
+
+    def _publish_loop(self):
+        path = os.path.join(self.snapshot_dir, f"{os.getpid()}.json")
+        while True:
+            tmp = f"{path}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+            time.sleep(1.0)
+
+    def close(self):
+        if self.access_log is not None:
+            self.access_log.close()
+
+
+def render_prometheus(snapshot: dict) -> str:
+    lines = ['# HELP runit_deploy_requests_total HTTP requests by status and path prefix.',
+             '# TYPE runit_deploy_requests_total counter']
+    for key, count in sorted(snapshot['requests'].items()):
+        status, prefix = key.split(' ', 1)
+        prefix = prefix.replace('\\', '\\\\').replace('"', '\\"')
+        lines.append(f'runit_deploy_requests_total{{status="{status}",prefix="{prefix}"}} {count}')
+    lines += ['# HELP runit_deploy_request_duration_seconds Time to answer a request.',
+              '# TYPE runit_deploy_request_duration_seconds histogram']
+    cumulative = 0
+    for bound, bucket in zip(LATENCY_BUCKETS + (float('inf'),), snapshot['latency_buckets']):
+        cumulative += bucket
+        label = '+Inf' if bound == float('inf') else repr(bound)
+        lines.append(f'runit_deploy_request_duration_seconds_bucket{{le="{label}"}} {cumulative}')
+    lines.append(f"runit_deploy_request_duration_seconds_sum {snapshot['latency_sum']:.6f}")
+    lines.append(f"runit_deploy_request_duration_seconds_count {snapshot['latency_count']}")
+    for name, kind, help_text, value in (
+            ('runit_deploy_bytes_sent_total', 'counter', 'Response bytes sent.', snapshot['bytes_sent']),
+            ('runit_deploy_cache_hits_total', 'counter', 'Hot-file cache hits.', snapshot['cache_hits']),
+            ('runit_deploy_cache_misses_total', 'counter', 'Hot-file cache misses.', snapshot['cache_misses']),
+            ('runit_deploy_connections_total', 'counter', 'Accepted connections.', snapshot['connections_total']),
+            ('runit_deploy_connections_open', 'gauge', 'Connections currently open.', snapshot['connections_open']),
+            ('runit_deploy_processes', 'gauge', 'Server processes reporting.', snapshot['processes'])):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,154 @@
+import io
+import os
+import sys
+import time
+import errno
+import shutil
+import signal
+import socket
+import threading
+
+
+class DeployWorkers:
+    """Forks N server processes that share one port through SO_REUSEPORT.
+
+    ``factory`` builds a bound server (StaticServer or AsyncStaticServer,
+    created with ``reuse_port=True``) inside each child, so the kernel
+    spreads incoming connections across the processes. One supervisor
+    thread per slot waits on its worker and forks a replacement when it
+    dies; ``stop`` terminates them all. Workers publish their metrics to
+    ``stats_dir``, which is where ``metrics_snapshot`` reads them from.
+    """
+
+    def __init__(self, address, factory, workers: int, stats_dir: str | None = None):
+        self.address = address
+        self.factory = factory
+        self.workers = workers
+        self.stats_dir = stats_dir
+        self.pids = {}
+        self.restarts = 0
+        self.stopping = False
+        self._lock = threading.Lock()
+        self._threads = []
+        self._check_port()
+
+    def _check_port(self):
+        # Fail in the parent, with the usual OSError, when the port is taken by
+        # something that did not opt into SO_REUSEPORT
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            probe.bind(self.address)
+        finally:
+            probe.close()
+
+    def _worker_main(self, ready_fd: int):
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        sys.stdin = io.StringIO('')
+        try:
+            server = self.factory()
+        except OSError as e:
+            os.write(ready_fd, f"error:{e}".encode('utf-8'))
+            raise
+        os.write(ready_fd, b'ok')
+        os.close(ready_fd)
+        try:
+            server.serve_forever()
+        finally:
+            # Flushes the access log and closes keep-alive connections
+            server.stop()
+
+    def _spawn(self, slot: int):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            code = 0
+            try:
+                self._worker_main(write_fd)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        with self._lock:
+            self.pids[slot] = pid
+            if self.stopping:
+                os.kill(pid, signal.SIGTERM)
+        try:
+            status = os.read(read_fd, 4096).decode('utf-8', 'replace')
+        finally:
+            os.close(read_fd)
+        return pid, status
+
+    def _supervise(self, slot: int, pid: int):
+        while True:
+            started = time.monotonic()
+            try:
+                _, status = os.waitpid(pid, 0)
+            except ChildProcessError:
+                status = None
+            self._forget_stats(pid)
+            with self._lock:
+                self.pids.pop(slot, None)
+                if self.stopping:
+                    return
+                self.restarts += 1
+            print(f"\n⚠️  Deploy worker {pid} exited (status {status}); restarting")
+            if time.monotonic() - started < 1.0:
+                # Avoid a hot restart loop when workers die immediately
+                time.sleep(1.0)
+            with self._lock:
+                if self.stopping:
+                    return
+            pid, ready = self._spawn(slot)
+
+    def _forget_stats(self, pid: int):
+        if self.stats_dir:
+            try:
+                os.unlink(os.path.join(self.stats_dir, f"{pid}.json"))
+            except OSError:
+                pass
+
+    def metrics_snapshot(self) -> dict:
+        from utils.deploy_metrics import read_snapshots, merge_snapshots
+        return merge_snapshots(read_snapshots(self.stats_dir)) if self.stats_dir else None
+
+    def start(self):
+        failures = []
+        for slot in range(self.workers):
+            pid, ready = self._spawn(slot)
+            if ready != 'ok':
+                failures.append(ready.removeprefix('error:') or f"worker {pid} exited during startup")
+                os.waitpid(pid, 0)
+                with self._lock:
+                    self.pids.pop(slot, None)
+                continue
+            thread = threading.Thread(target=self._supervise, args=(slot, pid), name=f'runit-deploy-{slot}',
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if failures:
+            self.stop()
+            raise OSError(errno.EADDRINUSE if 'in use' in failures[0] else errno.EIO, failures[0])
+        return self._threads
+
+    def stop(self):
+        with self._lock:
+            self.stopping = True
+            pids = list(self.pids.values())
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self.stats_dir:
+            shutil.rmtree(self.stats_dir, ignore_errors=True)
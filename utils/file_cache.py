@@ -0,0 +1,78 @@
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_MB = 64
+DEFAULT_MAX_FILE_KB = 1024
+
+
+def file_validator(st) -> tuple:
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def file_etag(st) -> str:
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+class HotFileCache:
+    """Byte-budgeted LRU of small file bodies, keyed by path.
+
+    An entry is only returned while the file's (inode, size, mtime) still
+    match the stat result the caller passes in, so edits and atomic
+    replacements are picked up on the next request.
+    """
+
+    def __init__(self, max_bytes: int | None = None, max_file_bytes: int | None = None):
+        if max_bytes is None:
+            try:
+                max_bytes = int(os.environ.get('RUNIT_DEPLOY_CACHE_MB', DEFAULT_CACHE_MB)) * 1024 * 1024
+            except ValueError:
+                max_bytes = DEFAULT_CACHE_MB * 1024 * 1024
+        if max_file_bytes is None:
+            try:
+                max_file_bytes = int(os.environ.get('RUNIT_DEPLOY_CACHE_FILE_KB', DEFAULT_MAX_FILE_KB)) * 1024
+            except ValueError:
+                max_file_bytes = DEFAULT_MAX_FILE_KB * 1024
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def admits(self, size: int) -> bool:
+        return 0 < self.max_bytes and size <= self.max_file_bytes
+
+    def get(self, path: str, st):
+        if not self.admits(st.st_size):
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != file_validator(st):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path: str, st, data: bytes):
+        if not self.admits(len(data)):
+            return
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self._entries[path] = (file_validator(st), data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
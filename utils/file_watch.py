@@ -0,0 +1,207 @@
+import os
+import time
+import threading
+from pathlib import Path
+
+DEFAULT_IGNORED_DIRS = {'.git', '.hg', '.svn', 'node_modules', '__pycache__', '.runit-build', '.venv', 'venv'}
+
+
+class Changes:
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+        self.modified = set()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def merge(self, other: 'Changes'):
+        for path in other.added:
+            if path in self.removed:
+                self.removed.discard(path)
+                self.modified.add(path)
+            else:
+                self.added.add(path)
+        for path in other.removed:
+            if path in self.added:
+                self.added.discard(path)
+            else:
+                self.modified.discard(path)
+                self.removed.add(path)
+        for path in other.modified:
+            if path not in self.added:
+                self.modified.add(path)
+
+    def paths(self) -> list:
+        return sorted(self.added | self.removed | self.modified)
+
+    def summary(self) -> str:
+        parts = []
+        for label, items in (('added', self.added), ('modified', self.modified), ('removed', self.removed)):
+            if items:
+                parts.append(f"{len(items)} {label}")
+        return ', '.join(parts) or 'no changes'
+
+
+class StatSnapshot:
+    """Index of (inode, size, mtime_ns) for the files under a directory.
+
+    ``refresh`` re-stats every known directory but only re-lists those whose
+    mtime changed, which is where files were created, deleted or renamed into
+    place. Files in unchanged directories are re-statted ``file_budget`` at a
+    time in round-robin order (all of them when the budget is None), so
+    in-place writes are still noticed without touching a huge tree at once.
+    """
+
+    def __init__(self, root, recursive: bool = True, include=None, ignored_dirs=None,
+                 file_budget: int | None = None):
+        self.root = str(Path(root).resolve())
+        self.recursive = recursive
+        self.include = include
+        self.ignored_dirs = DEFAULT_IGNORED_DIRS if ignored_dirs is None else set(ignored_dirs)
+        self.file_budget = file_budget
+        self.dirs = {}
+        self.dir_files = {}
+        self.dir_subdirs = {}
+        self.files = {}
+        self._order = []
+        self._cursor = 0
+
+    @staticmethod
+    def _key(st) -> tuple:
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _wanted(self, name: str) -> bool:
+        return self.include is None or self.include(name)
+
+    def _list_dir(self, path: str, changes: Changes | None):
+        try:
+            dir_mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            self._drop_dir(path, changes)
+            return
+        self.dirs[path] = dir_mtime
+        seen = set()
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive and entry.name not in self.ignored_dirs and not entry.name.startswith('.'):
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file() or not self._wanted(entry.name):
+                    continue
+                key = self._key(entry.stat())
+            except OSError:
+                continue
+            seen.add(entry.path)
+            previous = self.files.get(entry.path)
+            if previous is None:
+                self._order.append(entry.path)
+                if changes is not None:
+                    changes.added.add(entry.path)
+            elif previous != key and changes is not None:
+                changes.modified.add(entry.path)
+            self.files[entry.path] = key
+        for gone in self.dir_files.get(path, set()) - seen:
+            self.files.pop(gone, None)
+            if changes is not None:
+                changes.removed.add(gone)
+        self.dir_files[path] = seen
+        known_subdirs = self.dir_subdirs.get(path, set())
+        self.dir_subdirs[path] = set(subdirs)
+        for sub in subdirs:
+            if sub not in self.dirs:
+                self._list_dir(sub, changes)
+        for gone in known_subdirs - set(subdirs):
+            self._drop_dir(gone, changes)
+
+    def _drop_dir(self, path: str, changes: Changes | None):
+        self.dirs.pop(path, None)
+        for f in self.dir_files.pop(path, set()):
+            self.files.pop(f, None)
+            if changes is not None:
+                changes.removed.add(f)
+        for sub in self.dir_subdirs.pop(path, set()):
+            self._drop_dir(sub, changes)
+
+    def scan(self):
+        self.dirs.clear()
+        self.dir_files.clear()
+        self.dir_subdirs.clear()
+        self.files.clear()
+        self._order = []
+        self._list_dir(self.root, None)
+        return self
+
+    def refresh(self) -> Changes:
+        changes = Changes()
+        relisted = set()
+        for path, mtime in sorted(self.dirs.items()):
+            if path not in self.dirs:
+                continue
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                self._drop_dir(path, changes)
+                continue
+            if current != mtime:
+                self._list_dir(path, changes)
+                relisted.add(path)
+        if changes.removed:
+            self._order = [p for p in self._order if p in self.files]
+        if not self._order:
+            return changes
+        budget = len(self._order) if self.file_budget is None else min(self.file_budget, len(self._order))
+        for _ in range(budget):
+            self._cursor %= len(self._order)
+            path = self._order[self._cursor]
+            self._cursor += 1
+            if os.path.dirname(path) in relisted:
+                continue
+            try:
+                key = self._key(os.stat(path))
+            except OSError:
+                continue
+            if key != self.files.get(path):
+                self.files[path] = key
+                changes.modified.add(path)
+        return changes
+
+
+class FileWatcher:
+    """Polls a StatSnapshot and yields debounced, coalesced change sets."""
+
+    def __init__(self, snapshot: StatSnapshot, interval: float = 0.25, debounce: float = 0.3):
+        self.snapshot = snapshot
+        self.interval = interval
+        self.debounce = debounce
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def wait_for_changes(self, timeout: float | None = None):
+        """Block until a burst of changes has settled; None on stop or timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = Changes()
+        last_change = None
+        while not self.stop_event.is_set():
+            changes = self.snapshot.refresh()
+            now = time.monotonic()
+            if changes:
+                pending.merge(changes)
+                last_change = now
+            elif pending and now - last_change >= self.debounce:
+                return pending
+            if deadline is not None and now >= deadline and not pending:
+                return None
+            self.stop_event.wait(self.interval)
+        return None
+
+    def __iter__(self):
+        while not self.stop_event.is_set():
+            changes = self.wait_for_changes()
+            if changes:
+                yield changes
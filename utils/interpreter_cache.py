@@ -0,0 +1,126 @@
+import os
+import json
+import shutil
+import threading
+import subprocess
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / 'data'
+CACHE_PATH = DATA_DIR / 'interpreters.json'
+
+
+class InterpreterCache:
+    """Remembers where each interpreter lives and what version it reports.
+
+    Entries are found with a PATH lookup and probed with ``--version`` once.
+    The whole cache is dropped when PATH changes, and a single entry is
+    re-probed when its binary's mtime or inode changes.
+    """
+
+    def __init__(self, cache_path: Path = CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.lock = threading.RLock()
+        self.entries = None
+        self.path_env = None
+        self.dirty = False
+
+    def _load(self):
+        path_env = os.environ.get('PATH', '')
+        if self.entries is not None and self.path_env == path_env:
+            return
+        entries = {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                obj = json.load(f)
+            if obj.get('path_env') == path_env:
+                entries = obj.get('interpreters', {})
+        except Exception:
+            pass
+        self.dirty = self.entries is not None
+        self.entries = entries
+        self.path_env = path_env
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            payload = {'path_env': self.path_env, 'interpreters': self.entries}
+            try:
+                self.cache_path.parent.mkdir(exist_ok=True)
+                tmp_path = self.cache_path.with_name(f'.{self.cache_path.name}.{os.getpid()}.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, indent=2)
+                os.replace(tmp_path, self.cache_path)
+                self.dirty = False
+            except Exception:
+                pass
+
+    def _probe(self, path: str):
+        for flag in ('--version', '-v'):
+            try:
+                result = subprocess.run([path, flag], capture_output=True, text=True, timeout=5)
+            except Exception:
+                continue
+            if result.returncode == 0:
+                output = (result.stdout or result.stderr).strip()
+                return True, output.splitlines()[0] if output else ''
+        return False, ''
+
+    def _is_fresh(self, entry: dict) -> bool:
+        # Misses are always looked up again: `which` is cheap, the probe is not
+        if not entry.get('path'):
+            return False
+        try:
+            st = os.stat(entry['path'])
+        except OSError:
+            return False
+        return st.st_mtime_ns == entry.get('mtime_ns') and st.st_ino == entry.get('inode')
+
+    def resolve(self, name: str, trust: bool = False):
+        """Return the cache entry for ``name`` or None when it is not on PATH.
+
+        With ``trust`` a cached entry is returned without re-statting the
+        binary, and an unknown interpreter is only looked up, never probed.
+        """
+        with self.lock:
+            self._load()
+            entry = self.entries.get(name)
+            if entry and (trust or self._is_fresh(entry)):
+                return entry if entry.get('path') else None
+        path = shutil.which(name)
+        if path is None:
+            with self.lock:
+                if self.entries.get(name) != {'path': None}:
+                    self.entries[name] = {'path': None}
+                    self.dirty = True
+            return None
+        if trust:
+            return {'path': path, 'available': True, 'version': ''}
+        st = os.stat(path)
+        available, version = self._probe(path)
+        entry = {
+            'path': path,
+            'available': available,
+            'version': version,
+            'mtime_ns': st.st_mtime_ns,
+            'inode': st.st_ino,
+        }
+        with self.lock:
+            self.entries[name] = entry
+            self.dirty = True
+        return entry
+
+    def is_available(self, name: str, trust: bool = False) -> bool:
+        entry = self.resolve(name, trust=trust)
+        available = bool(entry and entry.get('available'))
+        self.save()
+        return available
+
+    def prewarm(self, names):
+        for name in names:
+            try:
+                self.resolve(name)
+            except Exception:
+                continue
+        self.save()
@@ -0,0 +1,74 @@
+import os
+import json
+import stat
+import errno
+import socket
+import struct
+import tempfile
+
+
+def runtime_dir() -> str:
+    """$XDG_RUNTIME_DIR, or a 0700 directory of our own under the temp dir.
+
+    A fixed path in a world-writable directory could be created first by
+    another user, so the fallback is only used when we own it and nobody
+    else can enter it.
+    """
+    path = os.environ.get('XDG_RUNTIME_DIR')
+    if path and os.path.isdir(path):
+        return path
+    path = os.path.join(tempfile.gettempdir(), f'runit-{os.getuid()}')
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(errno.EPERM, f"{path} is not a private directory owned by you")
+    return path
+
+
+def default_socket_path() -> str:
+    return os.path.join(runtime_dir(), 'runit.sock')
+
+
+def check_peer(sock):
+    """Raise PermissionError unless the process behind a connected Unix socket runs as our uid."""
+    _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    if uid != os.getuid():
+        raise PermissionError(errno.EPERM, f"socket is owned by uid {uid}, not {os.getuid()}")
+
+
+def send_message(sock, payload: dict):
+    sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+
+
+class MessageReader:
+    """Reads newline-delimited JSON messages from a stream socket."""
+
+    def __init__(self, sock, max_line: int = 1 << 20, initial: bytes = b''):
+        self.sock = sock
+        self.max_line = max_line
+        self._buffer = initial
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        message = self.read()
+        if message is None:
+            raise StopIteration
+        return message
+
+    def read(self):
+        while b'\n' not in self._buffer:
+            if len(self._buffer) > self.max_line:
+                raise ValueError('message too large')
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        if not line.strip():
+            return self.read()
+        return json.loads(line.decode('utf-8'))
@@ -0,0 +1,82 @@
+import os
+import json
+import threading
+
+from utils.file_watch import FileWatcher, StatSnapshot
+
+LIVE_PATH = '/__runit/live'
+PING_SECONDS = 15
+# Files re-statted per poll in directories whose mtime did not change
+FILE_BUDGET = 2000
+
+LIVE_SCRIPT = (
+    '<script>(function(){var s=new EventSource("' + LIVE_PATH + '");'
+    's.addEventListener("change",function(e){var d=JSON.parse(e.data);'
+    'if(!d.css){location.reload();return;}'
+    'document.querySelectorAll(\'link[rel="stylesheet"]\').forEach(function(l){'
+    'var u=new URL(l.href);u.searchParams.set("runit-live",d.version);l.href=u.href;});});})();</script>'
+).encode('ascii')
+
+
+def event_stream_headers() -> list:
+    return [('Content-Type', 'text/event-stream'), ('Cache-Control', 'no-store'), ('Connection', 'close')]
+
+
+class LiveReload:
+    """Watches a site folder and pushes change events to Server-Sent Events clients.
+
+    The folder is polled through a StatSnapshot, so a poll re-lists only
+    directories whose mtime changed plus ``file_budget`` files, and bursts
+    of writes are debounced into one event. Listeners are callables that
+    receive each encoded event, and None when the watcher stops.
+    """
+
+    def __init__(self, site_root: str, interval: float = 0.25, debounce: float = 0.2,
+                 file_budget: int = FILE_BUDGET):
+        self.site_root = os.path.abspath(site_root)
+        self.version = 0
+        self.snapshot = StatSnapshot(self.site_root, file_budget=file_budget)
+        self.watcher = FileWatcher(self.snapshot, interval=interval, debounce=debounce)
+        self._listeners = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._watch_loop, name='runit-deploy-live', daemon=True)
+        self._thread.start()
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.add(listener)
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            self._listeners.discard(listener)
+
+    def _publish(self, event):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event)
+
+    def _watch_loop(self):
+        # The initial scan runs here so a large tree does not delay startup
+        self.snapshot.scan()
+        for changes in self.watcher:
+            self.version += 1
+            self._publish(self.encode(changes))
+        self._publish(None)
+
+    def encode(self, changes) -> bytes:
+        urls = ['/' + os.path.relpath(path, self.site_root).replace(os.sep, '/') for path in changes.paths()]
+        css = not changes.removed and all(url.endswith('.css') for url in urls)
+        data = json.dumps({'version': self.version, 'paths': urls[:100], 'css': css})
+        return f"id: {self.version}\nevent: change\ndata: {data}\n\n".encode('utf-8')
+
+    @staticmethod
+    def inject(body: bytes) -> bytes:
+        at = body.lower().rfind(b'</body>')
+        if at == -1:
+            return body + LIVE_SCRIPT
+        return body[:at] + LIVE_SCRIPT + body[at:]
+
+    def close(self):
+        self.watcher.stop()
+        self._thread.join(timeout=5)
@@ -0,0 +1,76 @@
+import io
+import sys
+import threading
+from contextlib import contextmanager
+
+_install_lock = threading.Lock()
+
+
+class ThreadLocalStdout(io.TextIOBase):
+    """Stand-in for sys.stdout that lets each thread send its prints elsewhere."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        return getattr(self._local, 'target', None)
+
+    def redirect(self, target):
+        self._local.target = target
+
+    def target(self):
+        return self.current or self._stream
+
+    def write(self, s):
+        return self.target().write(s)
+
+    def flush(self):
+        self.target().flush()
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        if self.current is not None:
+            return False
+        return self._stream.isatty()
+
+    def fileno(self):
+        if self.current is not None:
+            raise io.UnsupportedOperation('stdout is redirected for this thread')
+        return self._stream.fileno()
+
+    @property
+    def encoding(self):
+        return getattr(self.target(), 'encoding', None) or 'utf-8'
+
+
+def install_thread_stdout() -> ThreadLocalStdout:
+    with _install_lock:
+        if not isinstance(sys.stdout, ThreadLocalStdout):
+            sys.stdout = ThreadLocalStdout(sys.stdout)
+        return sys.stdout
+
+
+def is_redirected() -> bool:
+    return isinstance(sys.stdout, ThreadLocalStdout) and sys.stdout.current is not None
+
+
+def current_stdout():
+    """The stream the calling thread's prints really end up in."""
+    if isinstance(sys.stdout, ThreadLocalStdout):
+        return sys.stdout.target()
+    return sys.stdout
+
+
+@contextmanager
+def redirect_thread_stdout(target):
+    proxy = install_thread_stdout()
+    previous = proxy.current
+    proxy.redirect(target)
+    try:
+        yield target
+    finally:
+        proxy.redirect(previous)
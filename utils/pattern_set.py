@@ -0,0 +1,156 @@
+import re
+from collections import deque
+from functools import cached_property, lru_cache
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over byte patterns.
+
+    ``scan`` walks a buffer once and reports every (end offset, pattern
+    index), and can resume from a previous state so a stream can be fed in
+    chunks. ``regex`` turns the trie into one compiled regex that finds the
+    next position where any pattern starts, which is how whole files are
+    scanned at C speed; the automaton then names the patterns that hit.
+    """
+
+    def __init__(self, patterns: list):
+        if not patterns or not all(patterns):
+            raise ValueError("patterns must be non-empty")
+        self.patterns = [bytes(p) for p in patterns]
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        self.ends = [()]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for byte in pattern:
+                nxt = self.goto[state].get(byte)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.ends.append(())
+                    self.goto[state][byte] = nxt
+                state = nxt
+            self.out[state] += (index,)
+            self.ends[state] += (index,)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, target in self.goto[state].items():
+                queue.append(target)
+                fallback = self.fail[state]
+                while fallback and byte not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.goto[fallback].get(byte, 0) if state else 0
+                self.out[target] += self.out[self.fail[target]]
+        self.longest = max(len(p) for p in self.patterns)
+
+    def scan(self, data, state: int = 0, offset: int = 0):
+        """Return ([(end offset, pattern index), ...], final state); offsets are shifted by ``offset``."""
+        goto, fail, out = self.goto, self.fail, self.out
+        hits = []
+        for position, byte in enumerate(data, offset + 1):
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            if out[state]:
+                hits.extend((position, index) for index in out[state])
+        return hits, state
+
+    def matched(self, data) -> set:
+        return {index for _, index in self.scan(data)[0]}
+
+    def starting_at(self, data, position: int) -> list:
+        """Indices of the patterns that occur in ``data`` at ``position``."""
+        found = []
+        state = 0
+        for byte in data[position:position + self.longest]:
+            state = self.goto[state].get(byte)
+            if state is None:
+                break
+            found.extend(self.ends[state])
+        return found
+
+    @cached_property
+    def regex(self):
+        """The trie compiled into a regex that matches wherever some pattern starts."""
+        # Post-order over the trie; a node that ends a pattern needs no longer continuation
+        bodies = {}
+        stack = [(0, False)]
+        while stack:
+            state, expanded = stack.pop()
+            if self.ends[state]:
+                bodies[state] = b''
+                continue
+            if not expanded:
+                stack.append((state, True))
+                stack.extend((child, False) for child in self.goto[state].values())
+                continue
+            alternatives = [re.escape(bytes([byte])) + bodies.pop(child)
+                            for byte, child in sorted(self.goto[state].items())]
+            bodies[state] = alternatives[0] if len(alternatives) == 1 else b'(?:' + b'|'.join(alternatives) + b')'
+        return re.compile(bodies[0])
+
+
+def _scoped(pattern: bytes) -> bytes:
+    """Wrap a regex for an alternation, turning leading global flags like (?i) into a scoped group."""
+    flags = re.match(rb'\(\?([aiLmsux]+)\)', pattern)
+    if flags:
+        return b'(?' + flags.group(1) + b':' + pattern[flags.end():] + b')'
+    return b'(?:' + pattern + b')'
+
+
+class PatternSet:
+    """One or more literal or regex patterns, compiled for a single pass over a buffer."""
+
+    def __init__(self, patterns: tuple, regex: bool = False):
+        if not patterns or not all(patterns):
+            raise ValueError("patterns must be non-empty")
+        self.patterns = patterns
+        self.is_regex = regex
+        encoded = [p.encode('utf-8') for p in patterns]
+        self.needle = None
+        self.automaton = None
+        if regex:
+            try:
+                # Whole buffers are searched at once, so ^ and $ must anchor at line boundaries
+                self.compiled = [re.compile(p, re.MULTILINE) for p in encoded]
+            except re.error as e:
+                raise ValueError(f"invalid regex: {e}") from None
+            self.search = re.compile(b'|'.join(_scoped(p) for p in encoded), re.MULTILINE).search
+        elif len(encoded) == 1:
+            self.needle = encoded[0]
+        else:
+            self.automaton = compile_automaton(tuple(encoded))
+            self.search = self.automaton.regex.search
+
+    def find(self, buf, pos: int = 0) -> int:
+        if self.needle is not None:
+            return buf.find(self.needle, pos)
+        match = self.search(buf, pos)
+        return -1 if match is None else match.start()
+
+    def in_line(self, line) -> bool:
+        return self.find(line) != -1
+
+    def tags(self, line) -> tuple:
+        """Indices of the patterns that match ``line``."""
+        if self.needle is not None:
+            return (0,)
+        if self.automaton is not None:
+            return tuple(sorted(self.automaton.matched(line)))
+        return tuple(i for i, pattern in enumerate(self.compiled) if pattern.search(line))
+
+
+@lru_cache(maxsize=32)
+def compile_automaton(patterns: tuple) -> AhoCorasick:
+    """Memoized AhoCorasick for a tuple of byte patterns."""
+    return AhoCorasick(list(patterns))
+
+
+@lru_cache(maxsize=32)
+def compile_patterns(patterns: tuple, regex: bool = False) -> PatternSet:
+    """Memoized PatternSet; pool workers compile each pattern set once per process."""
+    return PatternSet(patterns, regex)
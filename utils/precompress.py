@@ -0,0 +1,213 @@
+import os
+import gzip
+import hashlib
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.build_cache import default_cache_root, file_digest
+from utils.file_cache import file_validator
+
+COMPRESSIBLE_SUFFIXES = {'.html', '.htm', '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml',
+                         '.csv', '.md', '.wasm', '.ico', '.ttf', '.otf', '.webmanifest'}
+MIN_SIZE = 1024
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _load_zstd():
+    # zstd support is optional: the zstandard package, or compression.zstd on newer Pythons
+    try:
+        import zstandard
+        return lambda data: zstandard.ZstdCompressor(level=19).compress(data)
+    except Exception:
+        pass
+    try:
+        from compression import zstd
+        return lambda data: zstd.compress(data, level=19)
+    except Exception:
+        return None
+
+
+def available_encodings() -> list:
+    """Encodings we can produce, in the order the server prefers them."""
+    return (['zstd'] if _load_zstd() else []) + ['gzip']
+
+
+def default_variant_root() -> Path:
+    return default_cache_root().parent / 'precompressed'
+
+
+def parse_accept_encoding(header: str | None) -> dict:
+    codings = {}
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[name] = q
+    return codings
+
+
+def _compress(task):
+    source, encoding, dest, digest = task
+    try:
+        data = Path(source).read_bytes()
+    except OSError:
+        # Deleted or unreadable since the walk; it is simply served as-is
+        return dest, None
+    if hashlib.sha256(data).hexdigest() != digest:
+        # Edited since it was hashed; storing it under the old digest would
+        # hand the wrong bytes to any site whose file really has that hash
+        return dest, None
+    if encoding == 'gzip':
+        packed = gzip.compress(data, compresslevel=9, mtime=0)
+    else:
+        packed = _load_zstd()(data)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(packed)
+        os.replace(tmp, dest)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return dest, None
+    return dest, len(packed)
+
+
+class PrecompressedAssets:
+    """Compressed variants of a site's text assets, stored by content hash.
+
+    ``build`` hashes every compressible file and only compresses the ones
+    whose hash has no variant on disk yet, so a redeploy pays for changed
+    files only. ``lookup`` hands out a variant while the original still has
+    the (inode, size, mtime) it had at build time. The store is shared by
+    every site and trimmed least-recently-used first to ``max_bytes``.
+    """
+
+    def __init__(self, site_root: str, variant_root: Path | None = None, encodings: list | None = None,
+                 max_bytes: int | None = None):
+        self.site_root = os.path.abspath(site_root)
+        self.variant_root = Path(variant_root) if variant_root else default_variant_root()
+        self.encodings = available_encodings() if encodings is None else encodings
+        if max_bytes is None:
+            try:
+                max_bytes = int(os.environ.get('RUNIT_PRECOMPRESS_CACHE_MB', '')) * 1024 * 1024
+            except ValueError:
+                max_bytes = DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+        self.variants = {}
+
+    def _candidates(self):
+        for dirpath, dirnames, filenames in os.walk(self.site_root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_SUFFIXES:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_size >= MIN_SIZE:
+                    yield path, st
+
+    def _variant_path(self, digest: str, encoding: str) -> Path:
+        return self.variant_root / digest[:2] / (digest + SUFFIXES[encoding])
+
+    def build(self, jobs: int | None = None) -> dict:
+        started = time.perf_counter()
+        self.variant_root.mkdir(parents=True, exist_ok=True)
+        pending = []
+        found = {}
+        files = 0
+        for path, st in self._candidates():
+            files += 1
+            try:
+                digest = file_digest(path)
+            except OSError:
+                continue
+            entry = {'validator': file_validator(st), 'size': st.st_size, 'encodings': {}}
+            for encoding in self.encodings:
+                dest = self._variant_path(digest, encoding)
+                try:
+                    entry['encodings'][encoding] = (str(dest), dest.stat().st_size)
+                    # Mark it recently used so evict() keeps it
+                    os.utime(dest)
+                except FileNotFoundError:
+                    dest.parent.mkdir(exist_ok=True)
+                    pending.append((path, encoding, str(dest), digest))
+                except OSError:
+                    continue
+            found[path] = entry
+        reused = sum(len(e['encodings']) for e in found.values())
+        if pending:
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+                for (path, encoding, _, _), (dest, size) in zip(pending, pool.map(_compress, pending, chunksize=4)):
+                    if size is not None:
+                        found[path]['encodings'][encoding] = (dest, size)
+        self.variants = found
+        self.evict()
+        saved = sum(e['size'] - min([s for _, s in e['encodings'].values()] + [e['size']]) for e in found.values())
+        return {'files': files, 'compressed': len(pending), 'reused': reused, 'saved_bytes': saved,
+                'seconds': time.perf_counter() - started}
+
+    def evict(self):
+        """Remove the least recently used variants until the store fits in max_bytes.
+
+        Variants of the site being served are never removed.
+        """
+        keep = {dest for e in self.variants.values() for dest, _ in e['encodings'].values()}
+        found = []
+        for dirpath, _, filenames in os.walk(self.variant_root):
+            for name in filenames:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in found)
+        for _, size, path in sorted(found):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def has_variants(self, path: str) -> bool:
+        return path in self.variants
+
+    def lookup(self, path: str, st, accept_encoding: str | None):
+        """Return (encoding, variant path) for the best acceptable variant, or None.
+
+        The client's q-values decide; the server's preference only breaks ties.
+        """
+        entry = self.variants.get(path)
+        if entry is None or entry['validator'] != file_validator(st):
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        best = None
+        for encoding in self.encodings:
+            q = accepted.get(encoding, accepted.get('*', 0.0))
+            variant = entry['encodings'].get(encoding)
+            if q > 0 and variant and variant[1] < entry['size'] and (best is None or q > best[0]):
+                best = (q, encoding, variant[0])
+        return best[1:] if best else None
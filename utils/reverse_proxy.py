@@ -0,0 +1,276 @@
+import time
+import socket
+import asyncio
+import threading
+import http.client
+import email.parser
+import urllib.parse
+
+DEFAULT_TIMEOUT = 30.0
+MAX_IDLE = 32
+# Idle upstream connections are dropped before typical server keep-alive timeouts expire
+IDLE_SECONDS = 2.0
+CHUNK = 64 * 1024
+MAX_HEAD_BYTES = 64 * 1024
+RESERVED_PREFIX = '/__runit/'
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection', 'te',
+               'trailer', 'transfer-encoding', 'upgrade', 'expect'}
+
+
+class ProxyRoute:
+    """Requests under ``prefix`` are forwarded to http://host:port, with ``prefix`` swapped for ``base``."""
+
+    def __init__(self, prefix: str, host: str, port: int, base: str = '', timeout: float = DEFAULT_TIMEOUT):
+        self.prefix = prefix
+        self.host = host
+        self.port = port
+        self.base = base
+        self.timeout = timeout
+
+    @property
+    def url(self) -> str:
+        host = f"[{self.host}]" if ':' in self.host else self.host
+        return f"http://{host}:{self.port}{self.base}"
+
+    def matches(self, path: str) -> bool:
+        return self.prefix == '/' or path == self.prefix or path.startswith(self.prefix + '/')
+
+    def upstream_target(self, target: str) -> str:
+        if not self.base:
+            return target
+        rest = target if self.prefix == '/' else target[len(self.prefix):]
+        return self.base + (rest if rest.startswith(('/', '?')) or not rest else '/' + rest)
+
+
+def parse_proxy_spec(spec: str) -> ProxyRoute:
+    """Parse ``PREFIX=http://host:port[/base][,timeout=SECONDS]``."""
+    prefix, sep, rest = spec.partition('=')
+    if not sep or not prefix.startswith('/'):
+        raise ValueError(f"expected PREFIX=URL (e.g. /api=http://127.0.0.1:5000), got '{spec}'")
+    url, *options = rest.split(',')
+    timeout = DEFAULT_TIMEOUT
+    for option in options:
+        name, _, value = option.partition('=')
+        if name.strip() != 'timeout':
+            raise ValueError(f"unknown proxy option '{name.strip()}' in '{spec}'")
+        try:
+            timeout = float(value)
+        except ValueError:
+            raise ValueError(f"invalid proxy timeout '{value}' in '{spec}'") from None
+        if timeout <= 0:
+            raise ValueError(f"proxy timeout must be positive in '{spec}'")
+    parts = urllib.parse.urlsplit(url.strip())
+    if parts.scheme != 'http' or not parts.hostname or parts.query or parts.fragment:
+        raise ValueError(f"proxy upstream must be an http://host:port URL, got '{url}'")
+    try:
+        port = parts.port or 80
+    except ValueError:
+        raise ValueError(f"invalid port in '{url}'") from None
+    return ProxyRoute(prefix.rstrip('/') or '/', parts.hostname, port, parts.path.rstrip('/'), timeout)
+
+
+def request_framing(headers):
+    """Return (chunked, content length or None) of a request body.
+
+    Raises ValueError for framings a proxy cannot pass on safely: a
+    transfer coding other than chunked, Transfer-Encoding together with
+    Content-Length, or Content-Length values that disagree.
+    """
+    encodings = [e.strip().lower() for value in headers.get_all('Transfer-Encoding') or [] for e in value.split(',')]
+    lengths = {v.strip() for value in headers.get_all('Content-Length') or [] for v in value.split(',')}
+    if encodings:
+        if encodings != ['chunked'] or lengths:
+            raise ValueError("unsupported request body framing")
+        return True, None
+    if not lengths:
+        return False, None
+    length = lengths.pop()
+    if lengths or not length.isdigit():
+        raise ValueError("invalid Content-Length")
+    return False, int(length)
+
+
+def forward_headers(headers, client_ip: str, route: ProxyRoute, length: int | None = None) -> list:
+    """Request headers for the upstream: hop-by-hop ones dropped, X-Forwarded-* added.
+
+    Content-Length is never copied; ``length`` (when given) is sent as the
+    only one, so the upstream frames the body exactly as we forward it.
+    """
+    named = {token.strip().lower() for token in headers.get('Connection', '').split(',')}
+    # A client must not be able to strip the headers that frame and route the request
+    hop = HOP_HEADERS | (named - {'host', 'content-length'})
+    hop |= {'x-forwarded-for', 'content-length'}
+    forwarded = [(name, value) for name, value in headers.items() if name.lower() not in hop]
+    if length is not None:
+        forwarded.append(('Content-Length', str(length)))
+    host = headers.get('Host')
+    if host is None:
+        forwarded.append(('Host', f"{route.host}:{route.port}"))
+    prior = headers.get('X-Forwarded-For')
+    forwarded.append(('X-Forwarded-For', f"{prior}, {client_ip}" if prior else client_ip))
+    if host is not None and 'X-Forwarded-Host' not in headers:
+        forwarded.append(('X-Forwarded-Host', host))
+    if 'X-Forwarded-Proto' not in headers:
+        forwarded.append(('X-Forwarded-Proto', 'http'))
+    return forwarded
+
+
+def response_headers(items) -> list:
+    items = list(items)
+    hop = set(HOP_HEADERS)
+    for name, value in items:
+        if name.lower() == 'connection':
+            hop |= {token.strip().lower() for token in value.split(',')}
+    return [(name, value) for name, value in items if name.lower() not in hop]
+
+
+def encode_chunk(data: bytes) -> bytes:
+    return b'%x\r\n%s\r\n' % (len(data), data)
+
+
+def iter_chunked(rfile):
+    """Yield the decoded body of a chunked request read from a blocking file."""
+    while True:
+        line = rfile.readline(1024)
+        if not line.endswith(b'\n'):
+            raise ValueError("malformed chunk header")
+        size = int(line.split(b';', 1)[0], 16)
+        if size == 0:
+            while rfile.readline(1024) not in (b'\r\n', b'\n', b''):
+                pass
+            return
+        data = rfile.read(size + 2)
+        if len(data) != size + 2:
+            raise ValueError("truncated chunk")
+        yield data[:-2]
+
+
+async def aiter_chunked(reader, timeout: float):
+    """Yield the decoded body of a chunked message read from an asyncio stream."""
+    while True:
+        line = await asyncio.wait_for(reader.readuntil(b'\n'), timeout)
+        size = int(line.split(b';', 1)[0], 16)
+        if size == 0:
+            while (await asyncio.wait_for(reader.readuntil(b'\n'), timeout)) not in (b'\r\n', b'\n'):
+                pass
+            return
+        data = await asyncio.wait_for(reader.readexactly(size + 2), timeout)
+        yield data[:-2]
+
+
+async def read_response_head(reader, timeout: float):
+    """Return (version, status, reason, headers) of the next non-1xx response."""
+    while True:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        status_line, _, block = head.partition(b'\r\n')
+        version, status, *reason = status_line.decode('latin-1').split(' ', 2)
+        status = int(status)
+        if 100 <= status < 200 and status != 101:
+            continue
+        headers = email.parser.BytesParser(_class=http.client.HTTPMessage).parsebytes(block)
+        return version, status, reason[0] if reason else '', headers
+
+
+class UpstreamPool:
+    """Keep-alive http.client connections to one upstream, for the threaded engine."""
+
+    def __init__(self, route: ProxyRoute, max_idle: int = MAX_IDLE):
+        self.route = route
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return (connection, reused)."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, since = self._idle.pop()
+            if now - since < IDLE_SECONDS and self._quiet(conn.sock):
+                return conn, True
+            conn.close()
+        return http.client.HTTPConnection(self.route.host, self.route.port, timeout=self.route.timeout), False
+
+    @staticmethod
+    def _quiet(sock) -> bool:
+        # An idle socket with something to read was closed (or garbled) by the upstream
+        if sock is None:
+            return False
+        timeout = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            sock.recv(1, socket.MSG_PEEK)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(timeout)
+        return False
+
+    def release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_idle and conn.sock is not None:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+class AsyncUpstreamPool:
+    """Keep-alive stream pairs to one upstream, for the asyncio engine."""
+
+    def __init__(self, route: ProxyRoute, max_idle: int = MAX_IDLE):
+        self.route = route
+        self.max_idle = max_idle
+        self._idle = []
+
+    async def acquire(self):
+        """Return ((reader, writer), reused)."""
+        now = time.monotonic()
+        while self._idle:
+            (reader, writer), since = self._idle.pop()
+            if now - since < IDLE_SECONDS and not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+        pair = await asyncio.wait_for(asyncio.open_connection(self.route.host, self.route.port,
+                                                              limit=MAX_HEAD_BYTES), self.route.timeout)
+        return pair, False
+
+    def release(self, pair):
+        if len(self._idle) < self.max_idle and not pair[1].is_closing():
+            self._idle.append((pair, time.monotonic()))
+        else:
+            pair[1].close()
+
+    def close(self):
+        idle, self._idle = self._idle, []
+        for (_, writer), _ in idle:
+            writer.close()
+
+
+class ReverseProxy:
+    """Routes request targets to per-upstream connection pools, longest prefix first."""
+
+    def __init__(self, routes: list, pool_class=UpstreamPool):
+        self.pools = [pool_class(route) for route in sorted(routes, key=lambda r: -len(r.prefix))]
+
+    def match(self, target: str):
+        path = target.split('?', 1)[0]
+        if path.startswith(RESERVED_PREFIX):
+            return None
+        for pool in self.pools:
+            if pool.route.matches(path):
+                return pool
+        return None
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
@@ -0,0 +1,113 @@
+import json
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / 'data'
+HISTORY_PATH = DATA_DIR / 'run_history.jsonl'
+
+METRICS = [
+    ('wall_s', 'wall', 's'),
+    ('user_s', 'user CPU', 's'),
+    ('sys_s', 'sys CPU', 's'),
+    ('max_rss_kb', 'max RSS', 'KB'),
+    ('nvcsw', 'vol. ctx sw', ''),
+    ('nivcsw', 'invol. ctx sw', ''),
+    ('inblock', 'blocks in', ''),
+    ('oublock', 'blocks out', ''),
+]
+
+
+def usage_from_rusage(rusage, wall_seconds: float) -> dict:
+    if rusage is None:
+        return {'wall_s': round(wall_seconds, 6)}
+    return {
+        'wall_s': round(wall_seconds, 6),
+        'user_s': round(rusage.ru_utime, 6),
+        'sys_s': round(rusage.ru_stime, 6),
+        'max_rss_kb': rusage.ru_maxrss,
+        'nvcsw': rusage.ru_nvcsw,
+        'nivcsw': rusage.ru_nivcsw,
+        'inblock': rusage.ru_inblock,
+        'oublock': rusage.ru_oublock,
+    }
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(1, int(-(-pct * len(values) // 100)))
+    return values[min(rank, len(values)) - 1]
+
+
+def _format(value, unit: str) -> str:
+    if value is None:
+        return '-'
+    if unit == 's':
+        return f"{value * 1000:.1f}ms" if value < 1 else f"{value:.3f}s"
+    if unit == 'KB':
+        return f"{value / 1024:.1f}MB"
+    return str(value)
+
+
+class RunStats:
+    def __init__(self, history_path: Path = HISTORY_PATH):
+        self.history_path = Path(history_path)
+
+    def record(self, file_path: Path, exit_code, usage: dict, mode: str = 'normal'):
+        entry = {'file': str(file_path), 'time': round(time.time(), 3), 'exit': exit_code, 'mode': mode}
+        entry.update(usage)
+        try:
+            self.history_path.parent.mkdir(exist_ok=True)
+            # One short O_APPEND write per run keeps concurrent writers from interleaving
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        except OSError:
+            pass
+        return entry
+
+    def load(self, file_path: Path | None = None) -> list:
+        entries = []
+        target = str(file_path) if file_path else None
+        try:
+            with open(self.history_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if target is None or entry.get('file') == target:
+                        entries.append(entry)
+        except OSError:
+            pass
+        return entries
+
+    def print_usage(self, usage: dict):
+        print(f"⏱️  wall {_format(usage.get('wall_s'), 's')}  user {_format(usage.get('user_s'), 's')}"
+              f"  sys {_format(usage.get('sys_s'), 's')}  max RSS {_format(usage.get('max_rss_kb'), 'KB')}")
+        if 'nvcsw' in usage:
+            print(f"   context switches: {usage['nvcsw']} voluntary / {usage['nivcsw']} involuntary"
+                  f"   I/O: {usage['inblock']} blocks in / {usage['oublock']} blocks out")
+
+    def show(self, file_path: Path, last: int | None = None) -> bool:
+        entries = self.load(file_path)
+        if last:
+            entries = entries[-last:]
+        if not entries:
+            print(f"❌ No recorded runs for {file_path}")
+            print("   Record some with: run <file> --time")
+            return False
+        failures = sum(1 for e in entries if e.get('exit') not in (0, None))
+        print(f"\n📈 Run statistics: {file_path.name}")
+        print("=" * 72)
+        print(f"   Runs: {len(entries)} ({failures} failed)   Last run: "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entries[-1].get('time', 0)))}")
+        print(f"   {'metric':<14}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'last':>10}")
+        for key, label, unit in METRICS:
+            values = sorted(e[key] for e in entries if isinstance(e.get(key), (int, float)))
+            if not values:
+                continue
+            row = [percentile(values, 50), percentile(values, 90), percentile(values, 99), values[-1], entries[-1].get(key)]
+            print(f"   {label:<14}" + ''.join(f"{_format(v, unit):>10}" for v in row))
+        return True
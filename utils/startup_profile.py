@@ -0,0 +1,86 @@
+import sys
+import time
+
+
+class _TimedLoader:
+    def __init__(self, loader, name: str, profiler: 'StartupProfiler'):
+        self._loader = loader
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        create = getattr(self._loader, 'create_module', None)
+        return create(spec) if create else None
+
+    def exec_module(self, module):
+        self._profiler._enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave()
+
+
+class _TimingFinder:
+    def __init__(self, profiler: 'StartupProfiler'):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, fullname, self._profiler)
+            return spec
+        return None
+
+
+class StartupProfiler:
+    """Records how long each module takes to import (like ``python -X importtime``)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = []
+        self._stack = []
+        self._reported = 0
+        self._finder = _TimingFinder(self)
+
+    def install(self):
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _leave(self):
+        name, start, children = self._stack.pop()
+        cumulative = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][2] += cumulative
+        self.records.append((name, cumulative - children, cumulative))
+
+    def report(self, title: str = "Startup profile", limit: int = 25):
+        records = self.records[self._reported:]
+        self._reported = len(self.records)
+        elapsed = (time.perf_counter() - self.started) * 1000
+        total_self = sum(r[1] for r in records) * 1000
+        print(f"\n⏱️  {title}: {len(records)} modules imported, {total_self:.1f} ms in imports ({elapsed:.1f} ms since start)")
+        if not records:
+            return
+        print(f"   {'self ms':>9}  {'cumul ms':>9}  module")
+        for name, self_time, cumulative in sorted(records, key=lambda r: r[2], reverse=True)[:limit]:
+            print(f"   {self_time * 1000:9.2f}  {cumulative * 1000:9.2f}  {name}")
+        if len(records) > limit:
+            print(f"   ... {len(records) - limit} more")
@@ -0,0 +1,300 @@
+import os
+import stat
+import html
+import secrets
+import posixpath
+import mimetypes
+import email.utils
+import urllib.parse
+from http import HTTPStatus
+
+from utils.file_cache import HotFileCache, file_etag
+from utils.deploy_metrics import METRICS_PATH, render_prometheus
+from utils.live_reload import LIVE_PATH, event_stream_headers
+
+INDEX_PAGES = ('index.html', 'index.htm')
+MAX_RANGES = 32
+
+
+def parse_range(header: str | None, size: int):
+    """Parse a ``Range: bytes=...`` header into sorted, coalesced (start, end) pairs.
+
+    Returns None when the header should be ignored (absent, malformed or
+    not in bytes) and [] when no range overlaps a body of ``size`` bytes.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    ranges = []
+    for item in spec.split(','):
+        first, sep, last = item.strip().partition('-')
+        if not sep or not (first or last):
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else max(start, size - 1)
+                if start < 0 or end < start:
+                    return None
+            else:
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                start, end = max(0, size - suffix), size - 1
+                if suffix == 0:
+                    continue
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class FileResponse:
+    """Status, headers and body of a static response.
+
+    The body is ``body`` bytes, or, when ``file`` is set, the ``parts`` list:
+    bytes are written as they are and (offset, length) regions of the file
+    are streamed with sendfile. The engine closes the file afterwards.
+    """
+
+    def __init__(self, status: int, headers: list | None = None, body: bytes = b'', file=None,
+                 parts: list | None = None):
+        self.status = status
+        self.headers = headers or []
+        self.body = body
+        self.file = file
+        self.parts = parts if file is not None else [body]
+        self.length = sum(len(p) if isinstance(p, bytes) else p[1] for p in self.parts)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class StaticFiles:
+    """Maps URL paths onto a site folder and builds file responses.
+
+    This is the part of the deploy server that does not depend on how
+    requests are read: both the threaded and the asyncio engines resolve
+    paths, negotiate precompressed variants, consult the hot-file cache and
+    answer conditional requests through it. With ``live`` set, HTML pages
+    get the live-reload client script injected.
+    """
+
+    def __init__(self, site_root: str, file_cache: HotFileCache | None = None, assets=None, metrics=None,
+                 live=None):
+        self.site_root = os.path.abspath(site_root)
+        self.file_cache = HotFileCache() if file_cache is None else file_cache
+        self.assets = assets
+        self.metrics = metrics
+        self.live = live
+
+    def close(self):
+        if self.live is not None:
+            self.live.close()
+        if self.metrics is not None:
+            self.metrics.close()
+
+    def is_live(self, url_path: str) -> bool:
+        return self.live is not None and url_path.split('?', 1)[0] == LIVE_PATH
+
+    def translate_path(self, url_path: str) -> str:
+        # Same rules as SimpleHTTPRequestHandler.translate_path
+        path = url_path.split('?', 1)[0].split('#', 1)[0]
+        trailing_slash = path.rstrip().endswith('/')
+        try:
+            path = urllib.parse.unquote(path, errors='surrogatepass')
+        except UnicodeDecodeError:
+            path = urllib.parse.unquote(path)
+        result = self.site_root
+        for word in filter(None, posixpath.normpath(path).split('/')):
+            if os.path.dirname(word) or word in (os.curdir, os.pardir):
+                continue
+            result = os.path.join(result, word)
+        return result + '/' if trailing_slash else result
+
+    def resolve(self, url_path: str):
+        """Return ('file', path), ('redirect', url), ('directory', path), ('missing', path),
+        ('metrics', None) or ('live', None)."""
+        if self.metrics is not None and url_path.split('?', 1)[0] == METRICS_PATH:
+            return 'metrics', None
+        if self.is_live(url_path):
+            return 'live', None
+        path = self.translate_path(url_path)
+        if os.path.isdir(path):
+            parts = urllib.parse.urlsplit(url_path)
+            if not parts.path.endswith('/'):
+                return 'redirect', urllib.parse.urlunsplit(parts._replace(path=parts.path + '/'))
+            for index in INDEX_PAGES:
+                candidate = os.path.join(path, index)
+                if os.path.isfile(candidate):
+                    return 'file', candidate
+            return 'directory', path
+        if path.endswith('/') or not os.path.isfile(path):
+            return 'missing', path
+        return 'file', path
+
+    @staticmethod
+    def guess_type(path: str) -> str:
+        guess, _ = mimetypes.guess_type(path)
+        return guess or 'application/octet-stream'
+
+    @staticmethod
+    def not_modified(headers, etag: str, st) -> bool:
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip().removeprefix('W/') for t in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+        if_modified_since = headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since.tzinfo is None:
+                return False
+            return int(st.st_mtime) <= since.timestamp()
+        return False
+
+    def _open_body(self, path: str, st):
+        """Return (cached bytes or None, open file or None, stat of what was opened)."""
+        body = self.file_cache.get(path, st)
+        if body is not None:
+            return body, None, st
+        f = open(path, 'rb')
+        fst = os.fstat(f.fileno())
+        if self.file_cache.admits(fst.st_size):
+            try:
+                body = f.read()
+            finally:
+                f.close()
+            self.file_cache.put(path, fst, body)
+            return body, None, fst
+        return None, f, fst
+
+    def file_response(self, path: str, headers) -> FileResponse | None:
+        """Build the response for a regular file; None when it cannot be read."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        encoding, body_path, body_st = None, path, st
+        content_type = self.guess_type(path)
+        inject = self.live is not None and content_type == 'text/html'
+        if self.assets is not None and not inject:
+            variant = self.assets.lookup(path, st, headers.get('Accept-Encoding'))
+            if variant:
+                try:
+                    encoding, body_path, body_st = variant[0], variant[1], os.stat(variant[1])
+                except OSError:
+                    pass
+        etag = file_etag(st)
+        if encoding or inject:
+            # Each representation needs its own strong validator
+            etag = f'{etag[:-1]}-{encoding or "live"}"'
+        validators = [('ETag', etag), ('Last-Modified', email.utils.formatdate(int(st.st_mtime), usegmt=True))]
+        if self.assets is not None and not inject and self.assets.has_variants(path):
+            validators.append(('Vary', 'Accept-Encoding'))
+        if self.not_modified(headers, etag, st):
+            return FileResponse(HTTPStatus.NOT_MODIFIED, validators)
+        try:
+            body, f, body_st = self._open_body(body_path, body_st)
+            if inject:
+                if f is not None:
+                    with f:
+                        body, f = f.read(), None
+                body = self.live.inject(body)
+        except OSError:
+            return None
+        size = body_st.st_size if body is None else len(body)
+        ranges = None
+        if self._if_range_matches(headers.get('If-Range'), etag, st):
+            ranges = parse_range(headers.get('Range'), size)
+        response_headers = [('Accept-Ranges', 'bytes')]
+        if encoding:
+            response_headers.append(('Content-Encoding', encoding))
+        response_headers += validators
+        if ranges == []:
+            if f:
+                f.close()
+            return FileResponse(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                                response_headers + [('Content-Range', f'bytes */{size}'), ('Content-Length', '0')])
+        if ranges is None:
+            parts = [(0, size)]
+            response_headers.insert(0, ('Content-Type', content_type))
+            status = HTTPStatus.OK
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            parts = [(start, end - start + 1)]
+            response_headers[:0] = [('Content-Type', content_type), ('Content-Range', f'bytes {start}-{end}/{size}')]
+            status = HTTPStatus.PARTIAL_CONTENT
+        else:
+            boundary = secrets.token_hex(16)
+            parts = []
+            for start, end in ranges:
+                parts.append(f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+                             f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'.encode('latin-1'))
+                parts.append((start, end - start + 1))
+            parts.append(f'\r\n--{boundary}--\r\n'.encode('latin-1'))
+            response_headers.insert(0, ('Content-Type', f'multipart/byteranges; boundary={boundary}'))
+            status = HTTPStatus.PARTIAL_CONTENT
+        if body is not None:
+            # Cached bodies are small; slice them instead of keeping region lists
+            body = b''.join(p if isinstance(p, bytes) else body[p[0]:p[0] + p[1]] for p in parts)
+            response = FileResponse(status, response_headers, body=body)
+        else:
+            response = FileResponse(status, response_headers, file=f, parts=parts)
+        response.headers.insert(1, ('Content-Length', str(response.length)))
+        return response
+
+    @staticmethod
+    def _if_range_matches(if_range: str | None, etag: str, st) -> bool:
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            return if_range == etag
+        try:
+            return email.utils.parsedate_to_datetime(if_range).timestamp() == int(st.st_mtime)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+
+    def metrics_response(self) -> FileResponse:
+        body = render_prometheus(self.metrics.aggregate()).encode('utf-8')
+        return FileResponse(HTTPStatus.OK, [('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+                                            ('Cache-Control', 'no-store'), ('Content-Length', str(len(body)))],
+                            body=body)
+
+    def live_response(self) -> FileResponse:
+        """Headers of the event stream; the engines write the events themselves."""
+        return FileResponse(HTTPStatus.OK, event_stream_headers())
+
+    def listing(self, path: str, url_path: str) -> bytes:
+        try:
+            names = sorted(os.listdir(path), key=str.lower)
+        except OSError:
+            names = []
+        title = html.escape(urllib.parse.unquote(url_path.split('?', 1)[0]), quote=False)
+        items = []
+        for name in names:
+            full = os.path.join(path, name)
+            label = name + ('/' if os.path.isdir(full) else '')
+            items.append(f'<li><a href="{urllib.parse.quote(label)}">{html.escape(label, quote=False)}</a></li>')
+        return (f'<!DOCTYPE HTML>\n<html>\n<head>\n<meta charset="utf-8">\n<title>Directory listing for {title}</title>\n'
+                f'</head>\n<body>\n<h1>Directory listing for {title}</h1>\n<hr>\n<ul>\n'
+                + '\n'.join(items) + '\n</ul>\n<hr>\n</body>\n</html>\n').encode('utf-8', 'surrogateescape')
@@ -0,0 +1,306 @@
+import io
+import time
+import queue
+import socket
+import threading
+import http.client
+import http.server
+
+from utils.file_cache import HotFileCache
+from utils.static_files import StaticFiles
+from utils.live_reload import PING_SECONDS
+from utils.reverse_proxy import (CHUNK, ReverseProxy, encode_chunk, forward_headers, iter_chunked,
+                                 request_framing, response_headers)
+
+
+class StaticRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with keep-alive, caching and zero-copy bodies.
+
+    Files are resolved against the ``directory`` given at construction, so
+    the serving process never has to chdir into the site folder. File
+    responses come from the server's StaticFiles: small ones out of the
+    hot-file cache, larger ones streamed with sendfile.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'RunIT'
+    timeout = 30
+    # Headers and body go out as separate writes; without this every
+    # keep-alive response waits on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def handle_one_request(self):
+        self._status = None
+        self._sent = 0
+        self._started = None
+        super().handle_one_request()
+        metrics = self.server.files.metrics
+        if metrics is not None and self._status is not None:
+            elapsed = time.perf_counter() - (self._started or time.perf_counter())
+            sent = 0 if self.command == 'HEAD' else self._sent
+            metrics.observe(self.client_address[0], self.requestline, getattr(self, 'path', ''),
+                            self._status, sent, elapsed)
+
+    def parse_request(self):
+        # Start the clock once the request line is in, not while idling on keep-alive
+        self._started = time.perf_counter()
+        return super().parse_request()
+
+    def log_request(self, code='-', size='-'):
+        if isinstance(code, int):
+            self._status = int(code)
+        super().log_request(code, size)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'content-length':
+            self._sent = int(value)
+        super().send_header(keyword, value)
+
+    def _proxy_pool(self):
+        proxy = self.server.proxy
+        return proxy.match(self.path) if proxy is not None else None
+
+    def do_GET(self):
+        pool = self._proxy_pool()
+        if pool is None:
+            return super().do_GET()
+        self._proxy(pool)
+
+    def do_HEAD(self):
+        pool = self._proxy_pool()
+        if pool is None:
+            return super().do_HEAD()
+        self._proxy(pool)
+
+    def _proxy_only(self):
+        pool = self._proxy_pool()
+        if pool is None:
+            self.send_error(http.HTTPStatus.NOT_IMPLEMENTED, f"Unsupported method ({self.command!r})")
+            return
+        self._proxy(pool)
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _proxy_only
+
+    def _proxy(self, pool):
+        route = pool.route
+        try:
+            chunked, length = request_framing(self.headers)
+        except ValueError as e:
+            # Ambiguous framing is how requests get smuggled past a proxy, so refuse it
+            self.send_error(http.HTTPStatus.BAD_REQUEST, str(e).capitalize())
+            return
+        has_body = chunked or bool(length)
+        for attempt in (0, 1):
+            conn, reused = pool.acquire()
+            try:
+                conn.putrequest(self.command, route.upstream_target(self.path), skip_host=True,
+                                skip_accept_encoding=True)
+                for name, value in forward_headers(self.headers, self.client_address[0], route, length):
+                    conn.putheader(name, value)
+                if chunked:
+                    conn.putheader('Transfer-Encoding', 'chunked')
+                conn.endheaders()
+                if chunked:
+                    for data in iter_chunked(self.rfile):
+                        conn.send(encode_chunk(data))
+                    conn.send(b'0\r\n\r\n')
+                elif has_body:
+                    remaining = length
+                    while remaining:
+                        data = self.rfile.read(min(remaining, CHUNK))
+                        if not data:
+                            raise ValueError("client closed the request body early")
+                        conn.send(data)
+                        remaining -= len(data)
+                response = conn.getresponse()
+                break
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                conn.close()
+                if reused and not has_body and attempt == 0 and not isinstance(e, TimeoutError):
+                    # The pooled connection went stale; nothing was consumed, so try a fresh one
+                    continue
+                self.close_connection = True
+                if isinstance(e, TimeoutError):
+                    self.send_error(http.HTTPStatus.GATEWAY_TIMEOUT, f"Upstream {route.url} timed out")
+                else:
+                    self.send_error(http.HTTPStatus.BAD_GATEWAY, f"Upstream {route.url} failed: {e}")
+                return
+        try:
+            self._relay_response(response)
+        except (OSError, http.client.HTTPException):
+            self.close_connection = True
+        finally:
+            if response.isclosed() and not response.will_close:
+                pool.release(conn)
+            else:
+                conn.close()
+
+    def _relay_response(self, response):
+        self.log_request(response.status)
+        self.send_response_only(response.status, response.reason)
+        headers = response_headers(response.getheaders())
+        no_body = self.command == 'HEAD' or response.status in (204, 304)
+        chunked = False
+        if not no_body and response.getheader('Content-Length') is None:
+            if self.request_version == 'HTTP/1.1':
+                headers.append(('Transfer-Encoding', 'chunked'))
+                chunked = True
+            else:
+                self.close_connection = True
+        if self.close_connection:
+            headers.append(('Connection', 'close'))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if no_body:
+            response.read()
+            return
+        sent = 0
+        while data := response.read1(CHUNK):
+            self.wfile.write(encode_chunk(data) if chunked else data)
+            sent += len(data)
+        # Lets http.client see the body as consumed, so the connection can go back to the pool
+        response.read()
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+        self._sent = sent
+
+    def send_head(self):
+        files = self.server.files
+        kind, path = files.resolve(self.path)
+        if kind == 'metrics':
+            response = files.metrics_response()
+            self.send_response(response.status)
+            for name, value in response.headers:
+                self.send_header(name, value)
+            self.end_headers()
+            return io.BytesIO(response.body)
+        if kind == 'live':
+            self._stream_events(files)
+            return None
+        if kind != 'file':
+            # Redirects, listings and 404s are left to SimpleHTTPRequestHandler
+            return super().send_head()
+        response = files.file_response(path, self.headers)
+        if response is None:
+            self.send_error(http.HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if response.status == http.HTTPStatus.NOT_MODIFIED:
+            return None
+        self._response = response
+        return response.file if response.file is not None else io.BytesIO(response.body)
+
+    def _stream_events(self, files):
+        response = files.live_response()
+        self.send_response(response.status)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+        if self.command == 'HEAD':
+            return
+        events = queue.Queue()
+        files.live.subscribe(events.put)
+        try:
+            self.wfile.write(b'retry: 1000\n\n')
+            while True:
+                try:
+                    event = events.get(timeout=PING_SECONDS)
+                except queue.Empty:
+                    # Comment lines keep proxies from timing out the stream and reveal dead clients
+                    event = b': ping\n\n'
+                if event is None:
+                    break
+                self.wfile.write(event)
+        except OSError:
+            pass
+        finally:
+            files.live.unsubscribe(events.put)
+
+    def copyfile(self, source, outputfile):
+        response = getattr(self, '_response', None)
+        if response is None or source is not response.file:
+            return super().copyfile(source, outputfile)
+        # Headers are already on the wire (wfile is unbuffered), so file
+        # regions go straight from the page cache to the socket
+        outputfile.flush()
+        try:
+            for part in response.parts:
+                if isinstance(part, bytes):
+                    outputfile.write(part)
+                else:
+                    self.connection.sendfile(source, *part)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            self._response = None
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StaticServer(http.server.ThreadingHTTPServer):
+    """Thread-per-connection static server that can drop open connections on stop."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, site_root: str, handler_class=StaticRequestHandler, verbose: bool = False,
+                 file_cache: HotFileCache | None = None, assets=None, reuse_port: bool = False, metrics=None,
+                 live=None, proxy: list | None = None):
+        self.files = StaticFiles(site_root, file_cache, assets, metrics, live)
+        self.proxy = ReverseProxy(proxy) if proxy else None
+        self.reuse_port = reuse_port
+        self.site_root = self.files.site_root
+        self.verbose = verbose
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        super().__init__(address, lambda *a: handler_class(*a, directory=self.site_root))
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            self._connections.add(request)
+        if self.files.metrics is not None:
+            self.files.metrics.connection_opened()
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        with self._connections_lock:
+            tracked = request in self._connections
+            self._connections.discard(request)
+        if tracked and self.files.metrics is not None:
+            self.files.metrics.connection_closed()
+        super().shutdown_request(request)
+
+    def close_connections(self):
+        with self._connections_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name='runit-deploy', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.shutdown()
+        self.close_connections()
+        self.server_close()
+        if self.proxy is not None:
+            self.proxy.close()
+        self.files.close()
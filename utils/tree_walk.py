@@ -0,0 +1,158 @@
+import os
+import re
+
+from utils.file_watch import DEFAULT_IGNORED_DIRS
+
+
+def _translate(pattern: str) -> str:
+    """Regex body for a gitignore glob ('*', '?', '[...]' and '**')."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        c = pattern[i]
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def parse_gitignore(text: str) -> list:
+    """Return (regex, negated, dir_only) rules; patterns match paths relative to the file's folder."""
+    rules = []
+    for line in text.splitlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        line = line.rstrip()
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        body = _translate(line.lstrip('/'))
+        try:
+            regex = re.compile(('' if anchored else '(?:.*/)?') + body + '(?:/.*)?$', re.DOTALL)
+        except re.error:
+            continue
+        rules.append((regex, negated, dir_only))
+    return rules
+
+
+class GitIgnore:
+    """The .gitignore rules in effect for one directory of a walk.
+
+    ``child`` layers a subdirectory's own .gitignore on top, and the last
+    matching rule wins, as in git.
+    """
+
+    def __init__(self, rules: tuple = ()):
+        self.rules = rules
+
+    def child(self, directory: str) -> 'GitIgnore':
+        return self._with_file(directory, os.path.join(directory, '.gitignore'))
+
+    def _with_file(self, base: str, path: str) -> 'GitIgnore':
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                rules = parse_gitignore(f.read())
+        except OSError:
+            return self
+        if not rules:
+            return self
+        return GitIgnore(self.rules + tuple((base, regex, negated, dir_only) for regex, negated, dir_only in rules))
+
+    @classmethod
+    def for_root(cls, root: str) -> 'GitIgnore':
+        """Rules from the enclosing repository's .gitignore files above ``root``, if any.
+
+        ``root`` itself may be the top of a repository (``.git`` is a file
+        in submodules and worktrees); then no outer repository applies.
+        """
+        ancestors = []
+        current = os.path.abspath(root)
+        while not os.path.exists(os.path.join(current, '.git')):
+            parent = os.path.dirname(current)
+            if parent == current:
+                return cls()
+            current = parent
+            ancestors.append(current)
+        ignore = cls()._with_file(current, os.path.join(current, '.git', 'info', 'exclude'))
+        for directory in reversed(ancestors):
+            ignore = ignore.child(directory)
+        return ignore
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        result = False
+        for base, regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if not path.startswith(base + os.sep):
+                continue
+            if regex.match(path[len(base) + 1:].replace(os.sep, '/')):
+                result = not negated
+        return result
+
+
+def iter_files(root: str, use_gitignore: bool = True, ignored_dirs=None):
+    """Yield (path, size) for the regular files under ``root`` in a stable, sorted order.
+
+    Directories in ``ignored_dirs`` (VCS metadata, node_modules, virtualenvs
+    and caches by default) and paths excluded by .gitignore are skipped
+    without being descended into. Symlinks are not followed.
+    """
+    root = os.path.abspath(root)
+    ignored_dirs = DEFAULT_IGNORED_DIRS if ignored_dirs is None else set(ignored_dirs)
+    ignore = GitIgnore.for_root(root) if use_gitignore else None
+    stack = [(root, ignore.child(root) if ignore is not None else None)]
+    while stack:
+        directory, rules = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in ignored_dirs or (rules is not None and rules.ignored(entry.path, True)):
+                        continue
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    # In submodules and worktrees .git is a file pointing at the real metadata
+                    if entry.name == '.git' or (rules is not None and rules.ignored(entry.path, False)):
+                        continue
+                    yield entry.path, entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+        for path in reversed(subdirs):
+            stack.append((path, rules.child(path) if rules is not None else None))
@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+from pathlib import Path
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+from utils.build_cache import default_cache_root
+
+MAGIC = b'RUNITTG1'
+# magic, trigram count, table offset, metadata offset, metadata length
+HEADER = struct.Struct('<8sIQQQ')
+# trigram, postings offset, postings length, last file id in the list
+ENTRY = struct.Struct('<IQII')
+# File kinds recorded in the file table
+INDEXED, UNINDEXED, BINARY = 0, 1, 2
+
+
+def index_path(root: str) -> Path:
+    root = os.path.realpath(root)
+    key = hashlib.sha256(root.encode('utf-8', 'surrogateescape')).hexdigest()[:24]
+    return default_cache_root().parent / 'index' / f"{key}.bin"
+
+
+def trigrams(data: bytes) -> set:
+    """Distinct trigrams of ``data`` as 24-bit integers."""
+    return {a << 16 | b << 8 | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def encode_postings(ids, previous: int = -1) -> bytes:
+    """Delta + varint encode ascending file ids that follow ``previous``."""
+    out = bytearray()
+    for file_id in ids:
+        delta = file_id - previous
+        previous = file_id
+        while delta >= 0x80:
+            out.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_postings(data) -> list:
+    ids = []
+    value = shift = 0
+    previous = -1
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        ids.append(previous)
+        value = shift = 0
+    return ids
+
+
+def regex_literals(pattern: bytes) -> list:
+    """Literal runs that every match of ``pattern`` contains; empty when none can be derived."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+    runs, run = [], bytearray()
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(value)
+            continue
+        if run:
+            runs.append(bytes(run))
+            run = bytearray()
+    if run:
+        runs.append(bytes(run))
+    return runs
+
+
+def write_index(path: Path, root: str, next_id: int, files: list, postings):
+    """Atomically write an index; ``postings`` yields (trigram, encoded ids, last id) in trigram order."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.index-', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\0' * HEADER.size)
+            offset = HEADER.size
+            table = bytearray()
+            count = 0
+            for gram, data, last in postings:
+                table += ENTRY.pack(gram, offset, len(data), last)
+                f.write(data)
+                offset += len(data)
+                count += 1
+            f.write(table)
+            meta = json.dumps({'root': root, 'next_id': next_id, 'files': files},
+                              separators=(',', ':')).encode('utf-8')
+            f.write(meta)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, count, offset, offset + len(table), len(meta)))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class TrigramIndex:
+    """Memory-mapped trigram index of one directory tree.
+
+    ``files`` lists [relative path, size, mtime_ns, file id, kind] in walk
+    order. Posting lists only ever grow: ids of files that changed or
+    disappeared stay in them and are simply absent from ``files``.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.gram_count, self._table, meta_offset, meta_length = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError("not a RunIT index")
+            meta = json.loads(self._map[meta_offset:meta_offset + meta_length])
+        except (struct.error, ValueError) as e:
+            self._map.close()
+            raise ValueError(f"corrupt index {path}: {e}") from None
+        self.path = path
+        self.root = meta['root']
+        self.next_id = meta['next_id']
+        self.files = meta['files']
+
+    def entry(self, position: int) -> tuple:
+        return ENTRY.unpack_from(self._map, self._table + position * ENTRY.size)
+
+    def entries(self):
+        """Yield (trigram, encoded ids, last id) in trigram order."""
+        for position in range(self.gram_count):
+            gram, offset, length, last = self.entry(position)
+            yield gram, self._map[offset:offset + length], last
+
+    def postings(self, gram: int) -> list:
+        low, high = 0, self.gram_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < gram:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.gram_count:
+            return []
+        found, offset, length, _ = self.entry(low)
+        return decode_postings(self._map[offset:offset + length]) if found == gram else []
+
+    def candidates(self, alternatives: list):
+        """Ids of files that may match any alternative, each a list of literals a match must contain.
+
+        Returns None when some alternative has no trigram to narrow by.
+        """
+        result = set()
+        for literals in alternatives:
+            grams = set()
+            for literal in literals:
+                grams |= trigrams(literal)
+            if not grams:
+                return None
+            # Shortest posting lists first, so the intersection shrinks quickly
+            lists = sorted((self.postings(gram) for gram in grams), key=len)
+            ids = set(lists[0])
+            for ids_list in lists[1:]:
+                if not ids:
+                    break
+                ids.intersection_update(ids_list)
+            result |= ids
+        return result
+
+    def close(self):
+        self._map.close()